@@ -0,0 +1,108 @@
+import logging as log
+
+"""
+Framing of line based byte streams, e.g. the SBS output of dump1090 on port 30003.
+"""
+
+
+class LineFramer:
+    """
+    Splits a stream into lines ending on "\\n", a trailing "\\r" is removed.
+    Receives into one reusable buffer, extracts all complete lines of every receive at once and keeps the partial tail line.
+    A line longer than the buffer is discarded
+    """
+
+    def __init__(self, bufferSize: int = 65536):
+        self._buffer = bytearray(bufferSize)
+        self._view = memoryview(self._buffer)
+        # length of the partial tail line at the start of the buffer
+        self._tail = 0
+        self._discarding = False
+        self._bytesReceived = 0
+        self._linesReceived = 0
+        self._linesDiscarded = 0
+
+    @property
+    def bytesReceived(self) -> int:
+        return self._bytesReceived
+
+    @property
+    def linesReceived(self) -> int:
+        """
+        number of complete lines returned
+        """
+        return self._linesReceived
+
+    @property
+    def linesDiscarded(self) -> int:
+        """
+        number of lines longer than the buffer
+        """
+        return self._linesDiscarded
+
+    @property
+    def pending(self) -> bytes:
+        """
+        received bytes of the incomplete last line
+        """
+        return bytes(self._view[:self._tail])
+
+    def reset(self):
+        """
+        forget the partial tail line, e.g. after a reconnect
+        """
+        self._tail = 0
+        self._discarding = False
+
+    def recvLines(self, sock) -> list:
+        """
+        Receive from `sock` with one `recv_into` and return the complete lines, may be empty.
+        Raises `ConnectionError` if the connection was closed
+        """
+        self._makeSpace()
+        size = sock.recv_into(self._view[self._tail:])
+        if size == 0:
+            raise ConnectionError("connection closed")
+        self._bytesReceived += size
+        return self._extract(self._tail + size)
+
+    def feed(self, data: bytes) -> list:
+        """
+        Add `data` received by other means and return the complete lines
+        """
+        lines = list()
+        view = memoryview(data)
+        while len(view) > 0:
+            self._makeSpace()
+            size = min(len(view), len(self._buffer) - self._tail)
+            self._view[self._tail:self._tail + size] = view[:size]
+            self._bytesReceived += size
+            view = view[size:]
+            lines.extend(self._extract(self._tail + size))
+        return lines
+
+    def _makeSpace(self):
+        # a full buffer holds a single incomplete line, drop it until its end is received
+        if self._tail == len(self._buffer):
+            if not self._discarding:
+                log.warning("line longer than {} bytes, discard it".format(len(self._buffer)))
+                self._linesDiscarded += 1
+            self._discarding = True
+            self._tail = 0
+
+    def _extract(self, end: int) -> list:
+        last = self._buffer.rfind(b"\n", 0, end)
+        if last < 0:
+            self._tail = end
+            return []
+        lines = bytes(self._view[:last]).split(b"\n")
+        if self._discarding:
+            # first line is the rest of a discarded line
+            del lines[0]
+            self._discarding = False
+        self._tail = end - last - 1
+        self._buffer[:self._tail] = self._buffer[last + 1:end]
+        lines = [line[:-1] if line.endswith(b"\r") else line for line in lines]
+        lines = [line for line in lines if len(line) > 0]
+        self._linesReceived += len(lines)
+        return lines
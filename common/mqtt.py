@@ -6,6 +6,11 @@ from concurrent.futures import ThreadPoolExecutor, Future
 import json
 import uuid
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 
 def launch(client_name, host, port, topics: list = [], msgCallback=None) -> mq.Client:
     """
@@ -58,6 +63,69 @@ def _launchInBackground(client_name, host, port, topics: list, msgCallback):
     log.info("mqtt launched")
 
 
+class JsonCodec:
+    """
+    encodes notification payloads as JSON text, the default
+    """
+    name = "json"
+
+    def encode(self, obj) -> str:
+        return json.dumps(obj)
+
+    def decode(self, payload: bytes):
+        return json.loads(payload)
+
+
+class MsgpackCodec:
+    """
+    encodes notification payloads as MessagePack, requires the optional `msgpack` package.
+    JSON payloads of publishers without `msgpack` are decoded as well
+    """
+    name = "msgpack"
+
+    def encode(self, obj) -> bytes:
+        return msgpack.packb(obj)
+
+    def decode(self, payload: bytes):
+        # JSON objects and arrays start with an ascii character, MessagePack maps and arrays do not
+        if payload[:1] in (b"{", b"["):
+            return json.loads(payload)
+        return msgpack.unpackb(payload)
+
+
+CODECS = {JsonCodec.name: JsonCodec, MsgpackCodec.name: MsgpackCodec}
+
+
+def getCodec(name: str, receive: bool = False):
+    """
+    Returns the codec with `name`. A publisher uses JSON if the codec is not available,
+    a receiver (`receive`) raises ImportError as it could not decode the notifications
+    """
+    if name not in CODECS:
+        raise ValueError("codec {} unknown".format(name))
+    if name == MsgpackCodec.name and msgpack is None:
+        if receive:
+            raise ImportError("msgpack is not installed, required to receive msgpack notifications")
+        log.warning("msgpack is not installed, use json")
+        return JsonCodec()
+    return CODECS[name]()
+
+
+def loadTopicCodecs(path: str, topics: list, receive: bool = False) -> dict:
+    """
+    Returns the codec of every topic in `topics`, as configured with the optional "codec" field of the topics configuration at `path`.
+    Topics which are not configured use JSON. With `receive` the topics are subscribed and a missing codec raises ImportError
+    """
+    names = dict()
+    try:
+        with open(path) as f:
+            for meta in json.load(f).values():
+                names[meta["topic"]] = meta.get("codec", JsonCodec.name)
+    except (OSError, ValueError, KeyError) as ex:
+        log.warning("could not load topics configuration {}, use json, {}".format(path, str(ex)))
+    return {topic: getCodec(names.get(topic, JsonCodec.name), receive) for topic in topics}
+
+
 class RequestMessage(dict):
 
     def __init__(self, command: str, data: dict):
@@ -76,15 +144,22 @@ class MqttMessenger:
     """
     dispatch incoming mqtt messages to correct receiver
     supports dispatching of requests and responses
-    works only with json string message payloads
+    requests and responses are json, notifications are strings or encoded with the codec of their topic
     """
     REQUEST = 1
     RESPONSE = 2
     NOTIFICATION = 3
 
-    def __init__(self, mqClient, subscriptions):
+    def __init__(self, mqClient, subscriptions, executor=None, codecs=None):
+        """
+        Constructor, messages are handled by `executor` (default a pool of 3 threads),
+        or by the `executor` of their subscription if it has one.
+        `codecs` by topic (see `loadTopicCodecs`) encode sent notifications and decode received notifications,
+        receivers of other notifications get the payload string
+        """
         self._mqClient = mqClient
-        self._executor = ThreadPoolExecutor(max_workers=3)
+        self._executor = executor if executor is not None else ThreadPoolExecutor(max_workers=3)
+        self._codecs = codecs if codecs is not None else dict()
         self._requestFutures = dict()
         self._responseFutures = dict()
         self._subscriptions = dict()
@@ -100,9 +175,17 @@ class MqttMessenger:
         self._mqClient.on_connect = self._onConnect
 
     def sendNotification(self, topic, msg):
+        """
+        publish `msg`, strings and bytes as they are, other objects encoded with the codec of `topic` (default JSON)
+        """
+        if not isinstance(msg, (str, bytes)):
+            msg = self._codecs.get(topic, JsonCodec()).encode(msg)
         self._mqClient.publish(topic, msg)
 
-    def sendRequestAndWait(self, topic, msg: RequestMessage, timeout=3):
+    def sendRequest(self, topic, msg: RequestMessage) -> Future:
+        """
+        send a request without waiting, returns a `Future` which is resolved with the `ResponseMessage`
+        """
         if not topic.endswith("/request"):
             topic += "/request"
         requestId = str(uuid.uuid1())
@@ -110,7 +193,10 @@ class MqttMessenger:
         self._responseFutures[requestId] = future
         msg["requestId"] = requestId
         self._mqClient.publish(topic, json.dumps(msg))
-        return future.result(timeout)
+        return future
+
+    def sendRequestAndWait(self, topic, msg: RequestMessage, timeout=3):
+        return self.sendRequest(topic, msg).result(timeout)
 
     def _onConnect(self, client, userdata, flags, rc):
         if rc == 0:
@@ -123,25 +209,28 @@ class MqttMessenger:
 
     def _onMessage(self, client, userdata, msg):
         try:
-            msgStr = msg.payload.decode("UTF-8").strip()
             if msg.topic in self._subscriptions.keys():
                 sub = self._subscriptions[msg.topic]
                 if sub["type"] == MqttMessenger.REQUEST:
-                    msgData = json.loads(msgStr)
+                    msgData = json.loads(msg.payload)
                     requestId = msgData.pop("requestId")
                     responseTopic = self._getResponseTopic(msg.topic)
                     request = RequestMessage(msgData["command"], msgData["data"])
-                    future = self._executor.submit(sub["func"], request)
+                    future = sub.get("executor", self._executor).submit(sub["func"], request)
                     self._requestFutures[future] = (responseTopic, requestId)
                     future.add_done_callback(self._requestExecuted)
                 elif sub["type"] == MqttMessenger.RESPONSE:
-                    msgData = json.loads(msgStr)
+                    msgData = json.loads(msg.payload)
                     future = self._responseFutures.pop(msgData["requestId"])
                     response = ResponseMessage(msgData["success"], msgData["data"])
                     future.set_result(response)
                     future.done()
                 elif sub["type"] == MqttMessenger.NOTIFICATION:
-                    self._executor.submit(sub["func"], msgStr)
+                    executor = sub.get("executor", self._executor)
+                    if msg.topic in self._codecs.keys():
+                        executor.submit(sub["func"], self._codecs[msg.topic].decode(msg.payload))
+                    else:
+                        executor.submit(sub["func"], msg.payload.decode("UTF-8").strip())
                 else:
                     log.error("unknown subscription type")
             else:
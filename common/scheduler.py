@@ -0,0 +1,242 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+import logging as log
+
+"""
+Periodic jobs on the monotonic clock with fixed rate semantics.
+
+The n-th call of a job is due at `start + n * interval`, independent of how long the calls take, so jobs do not drift.
+Ticks missed because a call overran its interval are skipped and counted instead of being made up in a burst.
+Aligned jobs are due on multiples of their interval in UTC, e.g. every full second.
+"""
+
+# minimum seconds between two overrun warnings of the same job
+OVERRUN_WARNING_INTERVAL = 60
+
+
+class PeriodicJob:
+    """
+    Timing and statistics of a function called every `interval` seconds.
+    Executed by a :class:`Scheduler` or an event loop, which call :func:`run` when the job is due
+    """
+
+    def __init__(self, interval: float, func, name: str = None, align: bool = False):
+        self._interval = interval
+        self._func = func
+        self._name = name if name is not None else getattr(func, "__name__", "job")
+        self._align = align
+        self._due = None
+        self._cancelled = False
+        self._runs = 0
+        self._skipped = 0
+        self._overruns = 0
+        self._latenessSum = 0.0
+        self._latenessMax = 0.0
+        self._durationSum = 0.0
+        self._durationMax = 0.0
+        self._lastOverrunWarning = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def runs(self) -> int:
+        """
+        number of times the function was called
+        """
+        return self._runs
+
+    @property
+    def skipped(self) -> int:
+        """
+        number of ticks skipped because a call or other work took too long
+        """
+        return self._skipped
+
+    @property
+    def overruns(self) -> int:
+        """
+        number of calls which took longer than the interval
+        """
+        return self._overruns
+
+    def cancel(self):
+        """
+        do not call the function anymore, can be called from any thread
+        """
+        self._cancelled = True
+
+    def start(self, now: float, delay: float = None) -> float:
+        """
+        Returns the monotonic time the job is due for the first time, after `delay` seconds (default `interval`).
+        Aligned jobs are due on the next multiple of the interval instead
+        """
+        if self._align:
+            self._due = now + self._secondsToBoundary(time.time(), 0)
+        else:
+            self._due = now + (self._interval if delay is None else delay)
+        return self._due
+
+    def run(self, now: float) -> float:
+        """
+        call the function and return the monotonic time the job is due next
+        """
+        lateness = now - self._due
+        self._latenessSum += lateness
+        self._latenessMax = max(self._latenessMax, lateness)
+        self._runs += 1
+        try:
+            self._func()
+        except Exception as ex:
+            log.error("error in periodic job {}, {}".format(self._name, str(ex)))
+        end = time.monotonic()
+        duration = end - now
+        self._durationSum += duration
+        self._durationMax = max(self._durationMax, duration)
+        if duration > self._interval:
+            self._overruns += 1
+            if self._lastOverrunWarning is None or end - self._lastOverrunWarning >= OVERRUN_WARNING_INTERVAL:
+                log.warning("periodic job {} took {:.3f} seconds, longer than its interval of {} seconds".format(self._name, duration, self._interval))
+                self._lastOverrunWarning = end
+        if self._align:
+            # follow UTC, the monotonic clock and the system clock can drift apart
+            self._due = end + self._secondsToBoundary(time.time(), 1)
+        else:
+            self._due += self._interval
+            if self._due <= end:
+                skipped = int((end - self._due) // self._interval) + 1
+                self._skipped += skipped
+                self._due += skipped * self._interval
+        return self._due
+
+    def asdict(self) -> dict:
+        """
+        timing statistics, lateness is the time from due to call, duration the time the call took, in seconds
+        """
+        return {
+            "interval": self._interval,
+            "runs": self._runs,
+            "skipped": self._skipped,
+            "overruns": self._overruns,
+            "avgLateness": self._latenessSum / self._runs if self._runs > 0 else None,
+            "maxLateness": self._latenessMax,
+            "avgDuration": self._durationSum / self._runs if self._runs > 0 else None,
+            "maxDuration": self._durationMax,
+        }
+
+    def _secondsToBoundary(self, wallTime: float, minTicks: int) -> float:
+        # boundary nearest to wallTime plus minTicks, a call slightly before its boundary is not due again at the same boundary
+        ticks = math.floor(wallTime / self._interval + 0.5) + minTicks
+        if ticks * self._interval < wallTime:
+            ticks += 1
+        return ticks * self._interval - wallTime
+
+
+class Scheduler:
+    """
+    Runs :class:`PeriodicJob` in one thread, one job after the other.
+    Jobs which block for long should get their own scheduler
+    """
+
+    def __init__(self, name: str = "Scheduler"):
+        self._name = name
+        self._jobs = list()
+        self._queue = list()
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    @property
+    def jobs(self) -> list:
+        """
+        scheduled jobs which are not cancelled
+        """
+        with self._condition:
+            return [job for job in self._jobs if not job.cancelled]
+
+    def callEvery(self, interval: float, func, name: str = None, delay: float = None, align: bool = False) -> PeriodicJob:
+        """
+        call `func` every `interval` seconds, the first time after `delay` seconds (default `interval`)
+        or on the next multiple of `interval` in UTC if `align` is set. Can be called from any thread
+        """
+        job = PeriodicJob(interval, func, name, align)
+        with self._condition:
+            self._jobs.append(job)
+            heapq.heappush(self._queue, (job.start(time.monotonic(), delay), next(self._counter), job))
+            self._condition.notify()
+        return job
+
+    def start(self):
+        """
+        run the jobs in a background thread
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        stop running jobs, waits for the current job to finish if called from another thread
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
+
+    def run(self):
+        """
+        run the jobs in the calling thread until :func:`stop` is called, blocking function
+        """
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if len(self._queue) > 0:
+                        timeout = self._queue[0][0] - time.monotonic()
+                        if timeout <= 0:
+                            break
+                    else:
+                        timeout = None
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                if job.cancelled:
+                    self._jobs.remove(job)
+                    continue
+            due = job.run(time.monotonic())
+            with self._condition:
+                if job.cancelled:
+                    self._jobs.remove(job)
+                else:
+                    heapq.heappush(self._queue, (due, next(self._counter), job))
+
+
+_defaultScheduler = None
+_defaultSchedulerLock = threading.Lock()
+
+
+def defaultScheduler() -> Scheduler:
+    """
+    Returns the shared :class:`Scheduler` of the process, started with the first call
+    """
+    global _defaultScheduler
+    with _defaultSchedulerLock:
+        if _defaultScheduler is None:
+            _defaultScheduler = Scheduler("DefaultScheduler")
+            _defaultScheduler.start()
+        return _defaultScheduler
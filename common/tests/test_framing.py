@@ -0,0 +1,35 @@
+from common.framing import LineFramer
+import socket
+
+
+def test_feedKeepsPartialTail():
+    framer = LineFramer(64)
+    assert framer.feed(b"MSG,1\r\nMSG,2\r\nMS") == [b"MSG,1", b"MSG,2"]
+    assert framer.pending == b"MS"
+    assert framer.feed(b"G,3\r\n") == [b"MSG,3"]
+    assert framer.pending == b""
+    assert framer.feed(b"\r\n\n") == []
+    assert framer.linesReceived == 3
+
+
+def test_feedDiscardsLinesLongerThanBuffer():
+    framer = LineFramer(8)
+    assert framer.feed(b"MSG,1\nMSG,123456789012\nMSG,2\n") == [b"MSG,1", b"MSG,2"]
+    assert framer.linesDiscarded == 1
+
+
+def test_recvLinesFromSocket():
+    a, b = socket.socketpair()
+    framer = LineFramer(64)
+    a.sendall(b"MSG,1\r\nMSG,2\r\nMSG,")
+    assert framer.recvLines(b) == [b"MSG,1", b"MSG,2"]
+    a.sendall(b"3\r\n")
+    assert framer.recvLines(b) == [b"MSG,3"]
+    assert framer.bytesReceived == 21
+    a.close()
+    try:
+        framer.recvLines(b)
+        assert False
+    except ConnectionError:
+        pass
+    b.close()
@@ -1,6 +1,9 @@
 
-from common.mqtt import MqttMessenger, RequestMessage
+import common.mqtt as mqtt
+from common.mqtt import MqttMessenger, RequestMessage, JsonCodec, MsgpackCodec, loadTopicCodecs
 import json
+import pytest
+import threading
 from concurrent.futures import Future, ThreadPoolExecutor
 
 
@@ -88,3 +91,77 @@ def test_messengerProcessResponseMessage():
         response = future.result(1)
         assert response["success"] is True
         assert response["data"] is None
+
+
+def test_messengerEncodesAndDecodesNotificationsWithTopicCodec():
+    received = Future()
+    subscriptions = {
+        "topic1": {
+            "type": MqttMessenger.NOTIFICATION,
+            "func": received.set_result
+        }
+    }
+    mqClient = FakeMqClient()
+    messenger = MqttMessenger(mqClient, subscriptions, codecs={"topic1": JsonCodec()})
+    messenger.sendNotification("topic1", {"seq": 1})
+    topic, payload = mqClient.waitForPublish(1)
+    assert json.loads(payload) == {"seq": 1}
+    mqClient.on_message(None, None, FakeMqMessage("topic1", {"seq": 1}))
+    assert received.result(1) == {"seq": 1}
+
+
+def test_messengerPassesStringsOfTopicsWithoutCodec():
+    received = Future()
+    subscriptions = {
+        "topic1": {
+            "type": MqttMessenger.NOTIFICATION,
+            "func": received.set_result
+        }
+    }
+    mqClient = FakeMqClient()
+    MqttMessenger(mqClient, subscriptions)
+    mqClient.on_message(None, None, FakeMqMessage("topic1", {"seq": 1}))
+    assert received.result(1) == '{"seq": 1}'
+
+
+def test_messengerUsesExecutorOfSubscription():
+    received = Future()
+    subscriptions = {
+        "topic1": {
+            "type": MqttMessenger.NOTIFICATION,
+            "func": lambda msg: received.set_result(threading.current_thread().name),
+            "executor": ThreadPoolExecutor(max_workers=1, thread_name_prefix="Subscription")
+        }
+    }
+    mqClient = FakeMqClient()
+    MqttMessenger(mqClient, subscriptions)
+    mqClient.on_message(None, None, FakeMqMessage("topic1", {"seq": 1}))
+    assert received.result(1).startswith("Subscription")
+    subscriptions["topic1"]["executor"].shutdown()
+
+
+def test_loadTopicCodecs(tmp_path):
+    conf = tmp_path / "topics.json"
+    conf.write_text(json.dumps({"traffic": {"topic": "/traffic", "type": "notification", "codec": "json"}}))
+    codecs = loadTopicCodecs(str(conf), ["/traffic", "/position"])
+    assert isinstance(codecs["/traffic"], JsonCodec)
+    assert isinstance(codecs["/position"], JsonCodec)
+    codecs = loadTopicCodecs(str(tmp_path / "missing.json"), ["/traffic"])
+    assert isinstance(codecs["/traffic"], JsonCodec)
+
+
+def test_msgpackCodecDecodesJsonAndMsgpack():
+    pytest.importorskip("msgpack")
+    codec = MsgpackCodec()
+    obj = {"type": "delta", "seq": 2, "changed": [{"id": 1, "altitude": 1100}], "removed": []}
+    assert codec.decode(codec.encode(obj)) == obj
+    assert codec.decode(json.dumps(obj).encode("utf-8")) == obj
+
+
+def test_missingMsgpackFallsBackToJsonForPublishersOnly(tmp_path, monkeypatch):
+    monkeypatch.setattr(mqtt, "msgpack", None)
+    conf = tmp_path / "topics.json"
+    conf.write_text(json.dumps({"traffic": {"topic": "/traffic", "type": "notification", "codec": "msgpack"}}))
+    assert isinstance(loadTopicCodecs(str(conf), ["/traffic"])["/traffic"], JsonCodec)
+    with pytest.raises(ImportError):
+        loadTopicCodecs(str(conf), ["/traffic"], receive=True)
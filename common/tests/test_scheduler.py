@@ -0,0 +1,112 @@
+from common.scheduler import Scheduler, PeriodicJob
+import time
+import pytest
+
+
+class Recorder:
+
+    def __init__(self, duration=0):
+        self.calls = list()
+        self.duration = duration
+
+    def __call__(self):
+        self.calls.append(time.monotonic())
+        time.sleep(self.duration)
+
+
+def _waitFor(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_jobRunsAtFixedRate():
+    scheduler = Scheduler()
+    scheduler.start()
+    recorder = Recorder(duration=0.01)
+    start = time.monotonic()
+    job = scheduler.callEvery(0.03, recorder, delay=0)
+    _waitFor(lambda: len(recorder.calls) >= 10)
+    scheduler.stop()
+    # the duration of the calls does not accumulate
+    assert recorder.calls[9] - start == pytest.approx(9 * 0.03, abs=0.015)
+    stats = job.asdict()
+    assert stats["runs"] >= 10
+    assert stats["overruns"] == 0
+    assert stats["maxDuration"] >= 0.01
+
+
+def test_overrunningJobSkipsTicks():
+    scheduler = Scheduler()
+    scheduler.start()
+    recorder = Recorder(duration=0.05)
+    job = scheduler.callEvery(0.02, recorder, delay=0)
+    _waitFor(lambda: len(recorder.calls) >= 4)
+    scheduler.stop()
+    assert job.overruns >= 3
+    assert job.skipped >= 3
+    # no burst of calls to catch up
+    assert min(b - a for a, b in zip(recorder.calls, recorder.calls[1:])) >= 0.05
+
+
+def test_cancelledJobIsNotCalled():
+    scheduler = Scheduler()
+    scheduler.start()
+    recorder = Recorder()
+    job = scheduler.callEvery(0.01, recorder, delay=0)
+    other = scheduler.callEvery(0.01, Recorder())
+    _waitFor(lambda: len(recorder.calls) >= 2)
+    job.cancel()
+    time.sleep(0.02)
+    count = len(recorder.calls)
+    time.sleep(0.05)
+    assert len(recorder.calls) == count
+    assert scheduler.jobs == [other]
+    scheduler.stop()
+
+
+def test_jobContinuesAfterException():
+    calls = list()
+
+    def fail():
+        calls.append(1)
+        raise ValueError("job failed")
+
+    scheduler = Scheduler()
+    scheduler.start()
+    scheduler.callEvery(0.01, fail, delay=0)
+    _waitFor(lambda: len(calls) >= 3)
+    scheduler.stop()
+
+
+def test_runInCallingThreadUntilStopped():
+    scheduler = Scheduler()
+    calls = list()
+
+    def stopAfterThreeCalls():
+        calls.append(1)
+        if len(calls) == 3:
+            scheduler.stop()
+
+    scheduler.callEvery(0.01, stopAfterThreeCalls, delay=0)
+    scheduler.run()
+    assert len(calls) == 3
+
+
+def test_alignedJobIsDueOnIntervalBoundaries():
+    job = PeriodicJob(1, lambda: None, align=True)
+    now = time.monotonic()
+    wallTime = time.time()
+    due = job.start(now)
+    assert 0 <= due - now <= 1
+    offset = (wallTime + due - now) % 1
+    assert min(offset, 1 - offset) < 0.01
+
+
+def test_alignedJobBoundary():
+    job = PeriodicJob(1, lambda: None, align=True)
+    assert job._secondsToBoundary(100.3, 0) == pytest.approx(0.7)
+    # called slightly before its boundary, the next call is a full interval later
+    assert job._secondsToBoundary(100.999, 1) == pytest.approx(1.001)
+    assert job._secondsToBoundary(101.02, 1) == pytest.approx(0.98)
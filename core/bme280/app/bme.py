@@ -4,15 +4,15 @@ import logging as log
 import atexit
 import os
 import uuid
-import time
-import json
 
 try:
     import common.mqtt as mqtt
     import common.util as util
+    from common.scheduler import Scheduler
 except ImportError:
     import mqtt
     import util
+    from scheduler import Scheduler
 
 
 def onExit(mqClient):
@@ -27,28 +27,26 @@ def calculatePressureAltitude(pressure, temperature) -> float:
     return (((referencePressure / pressure) ** (1 / 5.257) - 1) * (temperature + 273.15)) / 0.0065
 
 
-def runPeriodicPublish(mqClient, bus, address, calibrationParams, publishTopic):
+def publishSample(mqClient, bus, address, calibrationParams, publishTopic, codec):
+    # x8 oversampling, 115ms, ~8.7Hz
+    # x16 oversampling, 225ms, ~4 Hz
+    data = bme280.sample(bus, address, calibrationParams, bme280.oversampling.x16)
+    obj = dict()
+    obj["humidity"] = round(data.humidity, 3)  # %H
+    obj["pressure"] = round(data.pressure, 3)  # hPa
+    obj["temperature"] = round(data.temperature, 3)  # °C
+    obj["pressureAltitude"] = round(calculatePressureAltitude(data.pressure, data.temperature), 3)  # m
+    log.debug(obj)
+    mqClient.publish(publishTopic, codec.encode(obj))
+
+
+def runPeriodicPublish(mqClient, bus, address, calibrationParams, publishTopic, codec):
     intervalSeconds = 1
-    while True:
-        start = time.perf_counter()
-        # x8 oversampling, 115ms, ~8.7Hz
-        # x16 oversampling, 225ms, ~4 Hz
-        data = bme280.sample(bus, address, calibrationParams, bme280.oversampling.x16)
-        obj = dict()
-        obj["humidity"] = round(data.humidity, 3)  # %H
-        obj["pressure"] = round(data.pressure, 3)  # hPa
-        obj["temperature"] = round(data.temperature, 3)  # °C
-        obj["pressureAltitude"] = round(calculatePressureAltitude(data.pressure, data.temperature), 3)  # m
-        js = json.dumps(obj)
-        log.debug(js)
-        mqClient.publish(publishTopic, js)
-        end = time.perf_counter()
-        usedSeconds = (end-start)
-        sleepSeconds = intervalSeconds - usedSeconds
-        if sleepSeconds < 0:
-            log.warning("periodic function takes longer than requested interval of {} seconds".format(intervalSeconds))
-            sleepSeconds = 0
-        time.sleep(sleepSeconds)
+    scheduler = Scheduler("BME280Publisher")
+    scheduler.callEvery(
+        intervalSeconds, lambda: publishSample(mqClient, bus, address, calibrationParams, publishTopic, codec), "publishSample", delay=0
+    )
+    scheduler.run()
 
 
 def main():
@@ -59,6 +57,7 @@ def main():
     port = int(os.getenv("BM_MQTT_PORT"))
     clientName = str(os.getenv("BM_MQTT_CLIENT_NAME"))
     publishTopic = str(os.getenv("BM_MQTT_PUBLISH_TOPIC"))
+    topicsConfPath = str(os.getenv("BM_MQTT_TOPICS_CONF", "/home/conf/topics.json"))
 
     util.setupLogging(logLevel)
 
@@ -73,7 +72,8 @@ def main():
     bus = smbus2.SMBus(i2cPort)
     calibration_params = bme280.load_calibration_params(bus, i2cAddress)
     log.info("start publishing i2c messages to {topic}".format(topic=publishTopic))
-    runPeriodicPublish(mqClient, bus, i2cAddress, calibration_params, publishTopic)
+    codec = mqtt.loadTopicCodecs(topicsConfPath, [publishTopic])[publishTopic]
+    runPeriodicPublish(mqClient, bus, i2cAddress, calibration_params, publishTopic, codec)
 
 
 if __name__ == "__main__":
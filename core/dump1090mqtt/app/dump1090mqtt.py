@@ -1,16 +1,25 @@
 import logging as log
 import atexit
+import collections
+import json
 import os
+import random
 import socket
+import threading
 import uuid
 import time
+import paho.mqtt.client as mq
 
 try:
     import common.mqtt as mqtt
     import common.util as util
+    from common.framing import LineFramer
+    from common.scheduler import defaultScheduler
 except ImportError:
     import mqtt
     import util
+    from framing import LineFramer
+    from scheduler import defaultScheduler
 
 
 def onExit(mqClient):
@@ -19,41 +28,328 @@ def onExit(mqClient):
         mqClient.disconnect()
 
 
-# works for protocols which have frames that end on \n
-def socketReadline(skt):
-    bufSize = 4096
-    line = skt.recv(bufSize, socket.MSG_PEEK)
-    if len(line) == 0:
-        raise Exception("connection lost")
-    elif len(line) < 5:
-        log.warning('very short message, "{}"'.format(line))
-    eol = line.find(b"\n")
-    if eol >= 0:
-        size = eol + 1
-    else:
-        log.warning("unable to find end of message")
-        size = len(line)
-    return skt.recv(size)
-
-
-def runTcpPublish(sock, mqClient, publishTopic, tcpHost, tcpPort, tcpConnected):
-    while True:
-        try:
-            line = socketReadline(sock)
-            log.debug(line)
-            mqClient.publish(publishTopic, line)
-        except Exception as ex:
-            log.error("socket readline error, {}".format(str(ex)))
-            tcpConnected = False
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            log.info('try reconnecting to "{}:{}"'.format(tcpHost, tcpPort))
-            while not tcpConnected:
-                try:
-                    sock.connect((tcpHost, tcpPort))
-                    tcpConnected = True
-                    log.info("reconnected")
-                except socket.error:
-                    time.sleep(5)
+class LineBatcher:
+    """
+    Packs lines into one mqtt message, separated by "\n".
+    A batch is published `maxLatency` seconds after its first line or as soon as it holds `maxLines` lines
+    """
+
+    def __init__(self, mqClient, publishTopic, maxLatency: float = 0.05, maxLines: int = 100):
+        self._mqClient = mqClient
+        self._publishTopic = publishTopic
+        self._maxLatency = maxLatency
+        self._maxLines = maxLines
+        self._lines = list()
+        self._deadline = None
+
+    @property
+    def timeout(self) -> float:
+        """
+        seconds until the current batch is due, None if there is none
+        """
+        if self._deadline is None:
+            return None
+        return max(self._deadline - time.monotonic(), 0)
+
+    def add(self, lines: list):
+        """
+        add lines to the current batch, publishes full batches
+        """
+        if len(lines) == 0:
+            return
+        if len(self._lines) == 0:
+            self._deadline = time.monotonic() + self._maxLatency
+        self._lines.extend(lines)
+        while len(self._lines) >= self._maxLines:
+            self._mqClient.publish(self._publishTopic, b"\n".join(self._lines[:self._maxLines]))
+            del self._lines[:self._maxLines]
+        if len(self._lines) == 0:
+            self._deadline = None
+
+    def flush(self):
+        """
+        publish the current batch
+        """
+        if len(self._lines) > 0:
+            self._mqClient.publish(self._publishTopic, b"\n".join(self._lines))
+            self._lines = list()
+        self._deadline = None
+
+
+def forwardLines(sock, mqClient, publishTopic, framer: LineFramer, batcher: LineBatcher = None):
+    """
+    publish every line received on `sock` until the connection is lost, blocking function.
+    All complete lines of a receive are extracted at once, the partial tail line is kept in `framer`.
+    Lines are published one by one or, with `batcher`, in batches
+    """
+    if batcher is None:
+        while True:
+            for line in framer.recvLines(sock):
+                log.debug(line)
+                mqClient.publish(publishTopic, line)
+    try:
+        while True:
+            timeout = batcher.timeout
+            # wait at least a millisecond, a timeout of 0 would make the socket non-blocking
+            sock.settimeout(max(timeout, 0.001) if timeout is not None else None)
+            try:
+                batcher.add(framer.recvLines(sock))
+            except socket.timeout:
+                pass
+            if batcher.timeout == 0:
+                batcher.flush()
+    finally:
+        batcher.flush()
+
+
+class Backoff:
+    """
+    Exponential backoff with jitter between reconnect attempts.
+    The n-th delay is `initial * factor ** n`, at most `maximum`, shortened by a random share of up to `jitter`
+    """
+
+    def __init__(self, initial: float = 0.5, maximum: float = 30, factor: float = 2, jitter: float = 0.5, rnd: random.Random = None):
+        self._initial = initial
+        self._maximum = maximum
+        self._factor = factor
+        self._jitter = jitter
+        self._random = rnd if rnd is not None else random.Random()
+        self._attempts = 0
+
+    def next(self) -> float:
+        """
+        seconds to wait before the next attempt
+        """
+        delay = min(self._initial * self._factor ** self._attempts, self._maximum)
+        if delay < self._maximum:
+            self._attempts += 1
+        return delay * (1 - self._jitter * self._random.random())
+
+    def reset(self):
+        """
+        start over with the initial delay, e.g. after a successful connection
+        """
+        self._attempts = 0
+
+
+class BacklogPublisher:
+    """
+    Publishes to the mqtt client while it is connected.
+    While it is disconnected or publishing fails, messages are kept in a backlog of at most `maxSize` messages,
+    which is published in order as soon as the client is connected again. If the backlog is full the oldest message is dropped
+    """
+
+    def __init__(self, mqClient, maxSize: int = 10000):
+        self._mqClient = mqClient
+        self._backlog = collections.deque()
+        self._maxSize = maxSize
+        self._lock = threading.Lock()
+        self._published = 0
+        self._publishFailures = 0
+        self._droppedLines = 0
+
+    @property
+    def backlog(self) -> int:
+        """
+        number of messages waiting to be published
+        """
+        return len(self._backlog)
+
+    @property
+    def droppedLines(self) -> int:
+        """
+        number of lines dropped because the backlog was full
+        """
+        return self._droppedLines
+
+    def asdict(self) -> dict:
+        return {
+            "isConnected": self._mqClient.is_connected(),
+            "published": self._published,
+            "publishFailures": self._publishFailures,
+            "backlog": len(self._backlog),
+            "maxBacklog": self._maxSize,
+            "droppedLines": self._droppedLines,
+        }
+
+    def publish(self, topic, payload):
+        """
+        publish `payload` after the messages in the backlog, keeps it in the backlog if that is not possible
+        """
+        with self._lock:
+            if self._drain() and self._publish(topic, payload):
+                return
+            if len(self._backlog) == self._maxSize:
+                _, dropped = self._backlog.popleft()
+                # a batch holds several lines
+                self._droppedLines += dropped.count(b"\n") + 1
+            self._backlog.append((topic, payload))
+
+    def drain(self) -> bool:
+        """
+        publish the backlog, returns False if messages are left
+        """
+        with self._lock:
+            return self._drain()
+
+    def _drain(self) -> bool:
+        if len(self._backlog) > 0 and self._mqClient.is_connected():
+            log.info("publish backlog of {} messages".format(len(self._backlog)))
+        while len(self._backlog) > 0:
+            if not self._publish(*self._backlog[0]):
+                return False
+            self._backlog.popleft()
+        return True
+
+    def _publish(self, topic, payload) -> bool:
+        if not self._mqClient.is_connected():
+            return False
+        if self._mqClient.publish(topic, payload).rc != mq.MQTT_ERR_SUCCESS:
+            self._publishFailures += 1
+            return False
+        self._published += 1
+        return True
+
+
+class TcpPublisher:
+    """
+    Publishes the lines of the dump1090 TCP server with :func:`forwardLines`.
+    Waits according to `backoff` before every connection attempt after a failure or a lost connection
+    """
+
+    def __init__(self, tcpHost, tcpPort, mqClient, publishTopic, batcher: LineBatcher = None, backoff: Backoff = None, connectTimeout: float = 5):
+        self._tcpHost = tcpHost
+        self._tcpPort = tcpPort
+        self._mqClient = mqClient
+        self._publishTopic = publishTopic
+        self._batcher = batcher
+        self._backoff = backoff if backoff is not None else Backoff()
+        self._connectTimeout = connectTimeout
+        self._framer = LineFramer()
+        self._socket = None
+        self._stopped = threading.Event()
+        self._connected = False
+        self._connects = 0
+        self._partialLinesDropped = 0
+
+    @property
+    def isConnected(self) -> bool:
+        return self._connected
+
+    @property
+    def lines(self) -> int:
+        """
+        number of lines received
+        """
+        return self._framer.linesReceived
+
+    @property
+    def droppedLines(self) -> int:
+        """
+        number of lines which could not be published, the partial line of a lost connection or a line longer than the receive buffer
+        """
+        return self._partialLinesDropped + self._framer.linesDiscarded
+
+    def asdict(self) -> dict:
+        return {
+            "host": self._tcpHost,
+            "port": self._tcpPort,
+            "isConnected": self._connected,
+            "connects": self._connects,
+            "reconnects": max(self._connects - 1, 0),
+            "lines": self._framer.linesReceived,
+            "bytesReceived": self._framer.bytesReceived,
+            "droppedLines": self.droppedLines,
+        }
+
+    def stop(self):
+        """
+        stop :func:`run`, can be called from any thread
+        """
+        self._stopped.set()
+        sock = self._socket
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def run(self):
+        """
+        connect and publish until :func:`stop` is called, blocking function
+        """
+        failureReported = False
+        while not self._stopped.is_set():
+            try:
+                self._socket = socket.create_connection((self._tcpHost, self._tcpPort), timeout=self._connectTimeout)
+                self._socket.settimeout(None)
+            except OSError as ex:
+                delay = self._backoff.next()
+                if not failureReported:
+                    log.error('could not connect to "{}:{}", {}'.format(self._tcpHost, self._tcpPort, str(ex)))
+                    failureReported = True
+                log.debug("retry in {:.1f} seconds".format(delay))
+                self._stopped.wait(delay)
+                continue
+            failureReported = False
+            self._connected = True
+            self._connects += 1
+            lines = self._framer.linesReceived
+            log.info('start publishing messages from "{}:{}" to {}'.format(self._tcpHost, self._tcpPort, self._publishTopic))
+            try:
+                forwardLines(self._socket, self._mqClient, self._publishTopic, self._framer, self._batcher)
+            except Exception as ex:
+                if not self._stopped.is_set():
+                    log.error("socket readline error, {}".format(str(ex)))
+            finally:
+                self._connected = False
+                self._socket.close()
+                self._socket = None
+                if len(self._framer.pending) > 0:
+                    # the rest of the line is lost with the connection
+                    self._partialLinesDropped += 1
+                self._framer.reset()
+            if self._framer.linesReceived > lines:
+                self._backoff.reset()
+            if not self._stopped.is_set():
+                delay = self._backoff.next()
+                log.info('reconnect to "{}:{}" in {:.1f} seconds'.format(self._tcpHost, self._tcpPort, delay))
+                self._stopped.wait(delay)
+
+
+class StatsPublisher:
+    """
+    Publishes the statistics of the `TcpPublisher` and the `BacklogPublisher` as JSON,
+    publishes the backlog as well, in case no lines are received which would do it
+    """
+
+    def __init__(self, mqClient, statsTopic, tcpPublisher: TcpPublisher, backlogPublisher: BacklogPublisher):
+        self._mqClient = mqClient
+        self._statsTopic = statsTopic
+        self._tcpPublisher = tcpPublisher
+        self._backlogPublisher = backlogPublisher
+        self._lastLines = 0
+        self._lastTime = time.monotonic()
+
+    def stats(self) -> dict:
+        """
+        statistics since the start, `linesPerSecond` since the last call
+        """
+        now = time.monotonic()
+        lines = self._tcpPublisher.lines
+        linesPerSecond = (lines - self._lastLines) / (now - self._lastTime) if now > self._lastTime else 0
+        self._lastLines = lines
+        self._lastTime = now
+        return {
+            "linesPerSecond": round(linesPerSecond, 1),
+            "droppedLines": self._tcpPublisher.droppedLines + self._backlogPublisher.droppedLines,
+            "tcp": self._tcpPublisher.asdict(),
+            "mqtt": self._backlogPublisher.asdict(),
+        }
+
+    def publish(self):
+        self._backlogPublisher.drain()
+        self._mqClient.publish(self._statsTopic, json.dumps(self.stats()))
 
 
 def main():
@@ -64,6 +360,12 @@ def main():
     port = int(os.getenv("DU_MQTT_PORT"))
     clientName = str(os.getenv("DU_MQTT_CLIENT_NAME"))
     publishTopic = str(os.getenv("DU_MQTT_PUBLISH_TOPIC"))
+    batchLatencyMs = int(os.getenv("DU_BATCH_LATENCY_MS", "0"))
+    batchMaxLines = int(os.getenv("DU_BATCH_MAX_LINES", "100"))
+    statsTopic = str(os.getenv("DU_MQTT_STATS_TOPIC", "/easyadsb/dump1090/stats"))
+    statsInterval = float(os.getenv("DU_STATS_INTERVAL", "10"))
+    backlogSize = int(os.getenv("DU_BACKLOG_SIZE", "10000"))
+    reconnectMaxDelay = float(os.getenv("DU_RECONNECT_MAX_DELAY", "30"))
 
     util.setupLogging(logLevel)
 
@@ -74,11 +376,15 @@ def main():
     mqClient = mqtt.launch(clientName, broker, port, [], None)
     atexit.register(onExit, mqClient)
 
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    log.debug('connect to "{host}:{port}"'.format(host=tcpHost, port=tcpPort))
-    sock.connect((tcpHost, tcpPort))
-    log.info('start publishing messages from "{host}:{port}" to {topic}'.format(host=tcpHost, port=tcpPort, topic=publishTopic))
-    runTcpPublish(sock, mqClient, publishTopic, tcpHost, tcpPort, True)
+    publisher = BacklogPublisher(mqClient, backlogSize)
+    batcher = None
+    if batchLatencyMs > 0:
+        log.info("publish batches of up to {} lines with max latency of {} ms".format(batchMaxLines, batchLatencyMs))
+        batcher = LineBatcher(publisher, publishTopic, batchLatencyMs / 1000, batchMaxLines)
+    tcpPublisher = TcpPublisher(tcpHost, tcpPort, publisher, publishTopic, batcher, Backoff(maximum=reconnectMaxDelay))
+    statsPublisher = StatsPublisher(mqClient, statsTopic, tcpPublisher, publisher)
+    defaultScheduler().callEvery(statsInterval, statsPublisher.publish, "publishStats")
+    tcpPublisher.run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+"""
+Per line compared to batched mqtt publishing of dump1090mqtt, at replayed peak traffic (10000 lines/s for 3 seconds).
+Reports the mqtt messages and bytes handed to the broker and the cpu time of the monitor receiving them
+(`MqttMessenger` thread pool, split, parse and `TrafficMonitor` update like `MessageDispatcher.onSbsMessage`).
+The broker itself is not part of the benchmark, its load grows with the number of messages.
+
+run from the `core` directory: `PYTHONPATH=.. python -m dump1090mqtt.benchmarks.bench_batching`
+"""
+import random
+import socket
+import threading
+import time
+import common.mqtt as mqtt
+from common.framing import LineFramer
+import dump1090mqtt.app.dump1090mqtt as dump1090mqtt
+import monitor.app.sbs as sbs
+import monitor.app.traffic as traffic
+from dump1090mqtt.tests.test_dump1090mqtt import FakeMqClient, _capture
+
+RATE = 10000
+BURST_INTERVAL = 0.01
+DURATION = 3.0
+TOPIC = "/easyadsb/dump1090/sbs"
+
+
+class _SubscribingClient(FakeMqClient):
+    def subscribe(self, topic):
+        pass
+
+
+class _Message:
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+def _replay(lines):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+
+    def serve():
+        conn, _ = server.accept()
+        burst = int(RATE * BURST_INTERVAL)
+        start = time.perf_counter()
+        pos = 0
+        while time.perf_counter() - start < DURATION:
+            conn.sendall(b"".join(line + b"\r\n" for line in lines[pos:pos + burst]))
+            pos = (pos + burst) % (len(lines) - burst)
+            time.sleep(BURST_INTERVAL)
+        conn.close()
+        server.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    return socket.create_connection(server.getsockname()), thread
+
+
+def _publish(lines, batched):
+    sock, server = _replay(lines)
+    mqClient = FakeMqClient()
+    batcher = dump1090mqtt.LineBatcher(mqClient, TOPIC) if batched else None
+    try:
+        dump1090mqtt.forwardLines(sock, mqClient, TOPIC, LineFramer(), batcher)
+    except ConnectionError:
+        pass
+    server.join()
+    sock.close()
+    return mqClient.published
+
+
+def _receive(payloads):
+    monitor = traffic.TrafficMonitor()
+
+    def onSbsMessage(msg):
+        messages = [sbs.SBSReader.parseTraffic(line.strip()) for line in msg.split("\n")]
+        if len(messages) == 1:
+            monitor.update(messages[0])
+        else:
+            monitor.updateBatch(messages)
+
+    client = _SubscribingClient()
+    messenger = mqtt.MqttMessenger(client, {TOPIC: {"type": mqtt.MqttMessenger.NOTIFICATION, "func": onSbsMessage}})
+    cpu = time.process_time()
+    for payload in payloads:
+        messenger._onMessage(None, None, _Message(TOPIC, payload))
+    messenger._executor.shutdown()
+    return time.process_time() - cpu
+
+
+def main():
+    lines = _capture(20000, random.Random(1))
+    print("{:<10} {:>12} {:>12} {:>14} {:>16}".format("", "lines", "messages", "bytes", "monitor cpu s"))
+    for name, batched in (("per line", False), ("batched", True)):
+        payloads = _publish(lines, batched)
+        cpu = _receive(payloads)
+        print(
+            "{:<10} {:>12,} {:>12,} {:>14,} {:>16.3f}".format(
+                name, sum(payload.count(b"\n") + 1 for payload in payloads), len(payloads), sum(len(payload) for payload in payloads), cpu
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
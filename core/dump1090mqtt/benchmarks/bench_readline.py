@@ -0,0 +1,86 @@
+"""
+Throughput of dump1090mqtt reading SBS lines from a local fake dump1090 replaying a capture as fast as possible,
+the previous `socketReadline` (recv with MSG_PEEK then recv per line) compared to :class:`LineFramer` (recv_into, bulk split).
+Replays the capture file given as argument (SBS lines as received from port 30003), a generated capture otherwise.
+
+run from the `core` directory: `PYTHONPATH=.. python -m dump1090mqtt.benchmarks.bench_readline [capture]`
+"""
+import random
+import socket
+import sys
+import threading
+import time
+import dump1090mqtt.app.dump1090mqtt as dump1090mqtt
+from common.framing import LineFramer
+from dump1090mqtt.tests.test_dump1090mqtt import FakeMqClient, _capture
+
+REPEAT = 5
+
+
+def _socketReadline(skt):
+    bufSize = 4096
+    line = skt.recv(bufSize, socket.MSG_PEEK)
+    if len(line) == 0:
+        raise ConnectionError("connection lost")
+    eol = line.find(b"\n")
+    if eol >= 0:
+        size = eol + 1
+    else:
+        size = len(line)
+    return skt.recv(size)
+
+
+def _forwardReadline(sock, mqClient):
+    while True:
+        mqClient.publish("topic", _socketReadline(sock))
+
+
+def _serve(data):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+
+    def serve():
+        conn, _ = server.accept()
+        for _ in range(REPEAT):
+            conn.sendall(data)
+        conn.close()
+        server.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    return socket.create_connection(server.getsockname()), thread
+
+
+def _run(forward, data):
+    sock, server = _serve(data)
+    mqClient = FakeMqClient()
+    start = time.perf_counter()
+    try:
+        forward(sock, mqClient)
+    except ConnectionError:
+        pass
+    elapsed = time.perf_counter() - start
+    server.join()
+    sock.close()
+    return len(mqClient.published), elapsed
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            data = f.read()
+    else:
+        data = b"".join(line + b"\r\n" for line in _capture(100000, random.Random(1)))
+    print("capture {:,} lines, {:,} bytes, replayed {} times".format(data.count(b"\n"), len(data), REPEAT))
+    print("{:<14} {:>12} {:>14}".format("", "lines", "lines/s"))
+    for name, forward in (
+        ("socketReadline", _forwardReadline),
+        ("LineFramer", lambda sock, mqClient: dump1090mqtt.forwardLines(sock, mqClient, "topic", LineFramer())),
+    ):
+        lines, elapsed = _run(forward, data)
+        print("{:<14} {:>12,} {:>14,.0f}".format(name, lines, lines / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import random
+import socket
+import threading
+import time
+import pytest
+import paho.mqtt.client as mq
+import dump1090mqtt.app.dump1090mqtt as dump1090mqtt
+from common.framing import LineFramer
+
+# message types in the proportions of a dump1090 capture
+TEMPLATES = [
+    "MSG,1,1,1,{hex},1,2023/10/26,07:20:12.001,2023/10/26,07:20:12.002,SWR{n:<5},,,,,,,,,,,",
+    "MSG,3,1,1,{hex},1,2023/10/26,07:20:11.481,2023/10/26,07:20:11.491,,{alt},,,46.91222,7.49917,,,0,,0,0",
+    "MSG,3,1,1,{hex},1,2023/10/26,07:20:11.481,2023/10/26,07:20:11.491,,{alt},,,46.91222,7.49917,,,0,,0,0",
+    "MSG,4,1,1,{hex},1,2023/10/26,07:20:11.512,2023/10/26,07:20:11.520,,,452,273,,,-640,,,,,0",
+    "MSG,4,1,1,{hex},1,2023/10/26,07:20:11.512,2023/10/26,07:20:11.520,,,452,273,,,-640,,,,,0",
+    "MSG,5,1,1,{hex},1,2023/10/26,07:20:11.530,2023/10/26,07:20:11.541,,{alt},,,,,,,0,,0,0",
+    "MSG,6,1,1,{hex},1,2023/10/26,07:20:11.602,2023/10/26,07:20:11.611,,,,,,,,7000,0,0,0,0",
+    "MSG,7,1,1,{hex},1,2023/10/26,07:20:11.650,2023/10/26,07:20:11.651,,{alt},,,,,,,,,,",
+    "MSG,8,1,1,{hex},1,2023/10/26,07:20:11.700,2023/10/26,07:20:11.703,,,,,,,,,,,,0",
+]
+
+
+class FakeMqClient:
+
+    def __init__(self):
+        self.published = list()
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    def publish(self, topic, msg):
+        if not self.connected:
+            return mq.MQTTMessageInfo(0)
+        self.published.append(msg)
+        info = mq.MQTTMessageInfo(0)
+        info.rc = mq.MQTT_ERR_SUCCESS
+        return info
+
+
+def _capture(count, rnd):
+    return [
+        rnd.choice(TEMPLATES).format(hex="{:06X}".format(0x4B0000 + rnd.randrange(300)), n=i % 1000, alt=rnd.randrange(0, 40000, 25)).encode("ascii")
+        for i in range(count)
+    ]
+
+
+def _replay(data, rnd):
+    # fake dump1090 sending the capture in chunks of random size, splitting lines anywhere
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+
+    def serve():
+        conn, _ = server.accept()
+        pos = 0
+        while pos < len(data):
+            size = rnd.randrange(1, 3000)
+            conn.sendall(data[pos:pos + size])
+            pos += size
+        conn.close()
+        server.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    return socket.create_connection(server.getsockname()), thread
+
+
+def test_forwardsEveryLineOfCapture():
+    rnd = random.Random(1)
+    lines = _capture(20000, rnd)
+    sock, server = _replay(b"".join(line + b"\r\n" for line in lines), rnd)
+    mqClient = FakeMqClient()
+    framer = LineFramer(4096)
+    with pytest.raises(ConnectionError):
+        dump1090mqtt.forwardLines(sock, mqClient, "/easyadsb/dump1090/sbs", framer)
+    server.join()
+    sock.close()
+    assert mqClient.published == lines
+    assert framer.pending == b""
+
+
+def test_keepsPartialLineBetweenReceives():
+    a, b = socket.socketpair()
+    mqClient = FakeMqClient()
+    a.sendall(b"MSG,8,1,1,4B1A2C,1,2023/10/26,07:20:11.700,2023/10/26,07:20:11.703,,,,,,,,,,,,0\r")
+    a.sendall(b"\nMSG,8,1,1,")
+    a.close()
+    with pytest.raises(ConnectionError):
+        dump1090mqtt.forwardLines(b, mqClient, "topic", LineFramer())
+    b.close()
+    assert mqClient.published == [b"MSG,8,1,1,4B1A2C,1,2023/10/26,07:20:11.700,2023/10/26,07:20:11.703,,,,,,,,,,,,0"]
+
+
+def test_batcherPublishesFullBatches():
+    mqClient = FakeMqClient()
+    batcher = dump1090mqtt.LineBatcher(mqClient, "topic", maxLatency=10, maxLines=2)
+    batcher.add([b"MSG,1", b"MSG,2", b"MSG,3"])
+    assert mqClient.published == [b"MSG,1\nMSG,2"]
+    assert batcher.timeout > 0
+    batcher.flush()
+    assert mqClient.published == [b"MSG,1\nMSG,2", b"MSG,3"]
+    assert batcher.timeout is None
+
+
+def test_forwardsBatchesAfterLatency():
+    a, b = socket.socketpair()
+    mqClient = FakeMqClient()
+    batcher = dump1090mqtt.LineBatcher(mqClient, "topic", maxLatency=0.05, maxLines=100)
+    errors = list()
+
+    def forward():
+        try:
+            dump1090mqtt.forwardLines(b, mqClient, "topic", LineFramer(), batcher)
+        except Exception as ex:
+            errors.append(ex)
+
+    thread = threading.Thread(target=forward)
+    thread.start()
+    a.sendall(b"MSG,1\r\nMSG,2\r\n")
+    a.sendall(b"MSG,3\r\n")
+    # published after the latency without further data
+    deadline = time.monotonic() + 2
+    while len(mqClient.published) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert mqClient.published == [b"MSG,1\nMSG,2\nMSG,3"]
+    a.sendall(b"MSG,4\r\n")
+    a.close()
+    thread.join()
+    b.close()
+    assert len(errors) == 1 and isinstance(errors[0], ConnectionError)
+    assert mqClient.published == [b"MSG,1\nMSG,2\nMSG,3", b"MSG,4"]
+
+
+def test_backoffGrowsExponentiallyWithJitter():
+    backoff = dump1090mqtt.Backoff(initial=1, maximum=8, factor=2, jitter=0.5, rnd=random.Random(1))
+    delays = [backoff.next() for _ in range(6)]
+    for delay, nominal in zip(delays, [1, 2, 4, 8, 8, 8]):
+        assert nominal * 0.5 <= delay <= nominal
+    assert len(set(delays)) == len(delays)
+    backoff.reset()
+    assert backoff.next() <= 1
+
+
+def test_backlogIsPublishedAfterReconnect():
+    mqClient = FakeMqClient()
+    publisher = dump1090mqtt.BacklogPublisher(mqClient, maxSize=2)
+    publisher.publish("topic", b"MSG,1")
+    mqClient.connected = False
+    publisher.publish("topic", b"MSG,2")
+    publisher.publish("topic", b"MSG,3\nMSG,4")
+    publisher.publish("topic", b"MSG,5")
+    assert publisher.droppedLines == 1
+    publisher.publish("topic", b"MSG,6")
+    # the oldest message is dropped, a batch counts with all its lines
+    assert publisher.backlog == 2
+    assert publisher.droppedLines == 3
+    mqClient.connected = True
+    publisher.publish("topic", b"MSG,7")
+    assert mqClient.published == [b"MSG,1", b"MSG,5", b"MSG,6", b"MSG,7"]
+    assert publisher.backlog == 0
+
+
+def test_tcpPublisherReconnects():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    mqClient = FakeMqClient()
+    publisher = dump1090mqtt.TcpPublisher("127.0.0.1", server.getsockname()[1], mqClient, "topic", backoff=dump1090mqtt.Backoff(initial=0.01))
+    thread = threading.Thread(target=publisher.run)
+    thread.start()
+    conn, _ = server.accept()
+    conn.sendall(b"MSG,1\r\nMSG,")
+    conn.close()
+    conn, _ = server.accept()
+    conn.sendall(b"MSG,2\r\n")
+    while publisher.lines < 2:
+        time.sleep(0.01)
+    publisher.stop()
+    thread.join()
+    conn.close()
+    server.close()
+    assert mqClient.published == [b"MSG,1", b"MSG,2"]
+    assert publisher.asdict()["reconnects"] == 1
+    assert publisher.droppedLines == 1
@@ -0,0 +1,190 @@
+import json
+import mmap
+import struct
+import functools
+import logging as log
+import sys
+
+"""
+Compact aircraft database, compiled from the mictronics json files and queried through mmap.
+
+File layout (little endian):
+- header: magic, format version, db version, offsets of the aircrafts, types and typesExtension tables
+- table: record count, key width, sorted fixed width records (zero padded key, value offset, value length), value pool
+- values are stored as compact json arrays, the same as in the source files
+"""
+
+MAGIC = b"EADB"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHI3I")
+_TABLE_HEADER = struct.Struct("<IH")
+_RECORD_VALUE = struct.Struct("<IH")
+
+
+class AircraftDbError(Exception):
+    pass
+
+
+class IndexedTable:
+    """
+    Read-only mapping of a table in an :class:`AircraftDb`.
+    Keys are looked up with a binary search over the memory mapped records, results are kept in a LRU cache
+    """
+
+    def __init__(self, buffer: mmap.mmap, offset: int, cacheSize: int = 4096):
+        self._buffer = buffer
+        self._count, self._keyWidth = _TABLE_HEADER.unpack_from(buffer, offset)
+        self._recordSize = self._keyWidth + _RECORD_VALUE.size
+        self._recordsOffset = offset + _TABLE_HEADER.size
+        self._poolOffset = self._recordsOffset + self._count * self._recordSize
+        self._lookup = functools.lru_cache(maxsize=cacheSize)(self._lookup)
+
+    def get(self, key: str, default=None):
+        """
+        Returns the value for `key` or `default` if the key does not exist
+        """
+        if key is None:
+            return default
+        value = self._lookup(key)
+        return default if value is None else value
+
+    def cacheInfo(self):
+        """
+        Returns the statistics of the lookup cache
+        """
+        return self._lookup.cache_info()
+
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _lookup(self, key: str):
+        encoded = key.encode("utf-8")
+        if len(encoded) > self._keyWidth:
+            return None
+        encoded = encoded.ljust(self._keyWidth, b"\x00")
+        buffer = self._buffer
+        low = 0
+        high = self._count - 1
+        while low <= high:
+            mid = (low + high) // 2
+            start = self._recordsOffset + mid * self._recordSize
+            current = buffer[start:start + self._keyWidth]
+            if current < encoded:
+                low = mid + 1
+            elif current > encoded:
+                high = mid - 1
+            else:
+                valueOffset, valueLength = _RECORD_VALUE.unpack_from(buffer, start + self._keyWidth)
+                start = self._poolOffset + valueOffset
+                return tuple(json.loads(buffer[start:start + valueLength]))
+        return None
+
+
+class AircraftDb:
+    """
+    Memory mapped aircraft database, created with :func:`compileDb`
+    """
+
+    def __init__(self, path: str, cacheSize: int = 4096):
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, formatVersion, self._version, aircraftsOffset, typesOffset, typesExtensionOffset = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or formatVersion != FORMAT_VERSION:
+            self._buffer.close()
+            raise AircraftDbError("{} is not an aircraft database of format version {}".format(path, FORMAT_VERSION))
+        self._aircrafts = IndexedTable(self._buffer, aircraftsOffset, cacheSize)
+        self._types = IndexedTable(self._buffer, typesOffset, cacheSize)
+        self._typesExtension = IndexedTable(self._buffer, typesExtensionOffset, cacheSize)
+
+    @property
+    def version(self) -> int:
+        """
+        version of the mictronics database
+        """
+        return self._version
+
+    @property
+    def aircrafts(self) -> IndexedTable:
+        """
+        registration, ICAO type designator and flags by transponder id (hex)
+        """
+        return self._aircrafts
+
+    @property
+    def types(self) -> IndexedTable:
+        """
+        name, ICAO description and wake turbulence category by ICAO type designator
+        """
+        return self._types
+
+    @property
+    def typesExtension(self) -> IndexedTable:
+        """
+        traffic category by ICAO type designator
+        """
+        return self._typesExtension
+
+    def close(self):
+        self._buffer.close()
+
+
+def _encodeTable(table: dict) -> bytes:
+    items = sorted((key.encode("utf-8"), json.dumps(value, separators=(",", ":")).encode("utf-8")) for key, value in table.items())
+    keyWidth = max((len(key) for key, _ in items), default=0)
+    records = bytearray()
+    pool = bytearray()
+    for key, value in items:
+        records += key.ljust(keyWidth, b"\x00")
+        records += _RECORD_VALUE.pack(len(pool), len(value))
+        pool += value
+    return _TABLE_HEADER.pack(len(items), keyWidth) + records + pool
+
+
+def compileDb(aircrafts: dict, types: dict, dbversion: int, typesExtension: dict, path: str):
+    """
+    Write the given databases to `path`, to be opened with :class:`AircraftDb`
+    """
+    tables = [_encodeTable(aircrafts), _encodeTable(types), _encodeTable(typesExtension)]
+    offsets = list()
+    offset = _HEADER.size
+    for table in tables:
+        offsets.append(offset)
+        offset += len(table)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, dbversion, *offsets))
+        for table in tables:
+            f.write(table)
+
+
+def compileJsonFiles(aircraftsFile: str, typesFile: str, dbversionFile: str, typesExtensionFile: str, path: str):
+    """
+    Compile the mictronics json files to `path`
+    """
+    with open(aircraftsFile) as f:
+        aircrafts = json.load(f)
+    with open(typesFile) as f:
+        types = json.load(f)
+    with open(dbversionFile) as f:
+        dbversion = json.load(f)
+    with open(typesExtensionFile) as f:
+        typesExtension = json.load(f)
+    compileDb(aircrafts, types, dbversion["version"], typesExtension, path)
+    log.info("compiled {} aircrafts and {} types to {}".format(len(aircrafts), len(types), path))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 6:
+        print("usage: aircraftdb.py <aircrafts.json> <types.json> <dbversion.json> <typesExtension.json> <output>")
+        sys.exit(1)
+    log.basicConfig(level=log.INFO)
+    compileJsonFiles(*sys.argv[1:])
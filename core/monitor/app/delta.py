@@ -0,0 +1,135 @@
+import threading
+import time
+
+"""
+Delta encoding of published monitor information.
+
+Instead of the full state every interval, only what changed since the last message is published.
+A snapshot of the full state is published first, on request and every `snapshotInterval` seconds,
+so receivers which joined late or missed a message can resynchronize.
+Every message carries a sequence number, a receiver which sees a gap requests a snapshot.
+
+Collections (traffic, satellites) are keyed by an entry field:
+    {"type": "snapshot", "seq": 7, "entries": [{...}, ...]}
+    {"type": "delta", "seq": 8, "added": [{...}], "changed": [{"id": 1, "altitude": 1100}], "removed": [2]}
+Single objects (position):
+    {"type": "snapshot", "seq": 7, "entry": {...}}
+    {"type": "delta", "seq": 8, "changed": {"latitude": 46.9}}
+"""
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+
+class _DeltaEncoder:
+    """
+    sequence numbers and snapshot scheduling shared by the encoders
+    """
+
+    def __init__(self, snapshotInterval: float = 30):
+        self._snapshotInterval = snapshotInterval
+        self._seq = 0
+        self._snapshotRequested = True
+        self._lastSnapshot = None
+        self._snapshots = 0
+        self._deltas = 0
+        self._lock = threading.Lock()
+
+    @property
+    def seq(self) -> int:
+        """
+        sequence number of the last encoded message
+        """
+        return self._seq
+
+    def requestSnapshot(self):
+        """
+        encode the next message as snapshot, can be called from any thread
+        """
+        self._snapshotRequested = True
+
+    def asdict(self) -> dict:
+        return {"seq": self._seq, "snapshots": self._snapshots, "deltas": self._deltas}
+
+    def _isSnapshotDue(self, now: float) -> bool:
+        if self._snapshotRequested:
+            return True
+        return self._snapshotInterval > 0 and now - self._lastSnapshot >= self._snapshotInterval
+
+    def _message(self, msgType: str, now: float, **fields) -> dict:
+        self._seq += 1
+        if msgType == SNAPSHOT:
+            self._snapshotRequested = False
+            self._lastSnapshot = now
+            self._snapshots += 1
+        else:
+            self._deltas += 1
+        msg = {"type": msgType, "seq": self._seq}
+        msg.update(fields)
+        return msg
+
+
+class CollectionDeltaEncoder(_DeltaEncoder):
+    """
+    Encodes a list of entries, identified by their `key` field, as snapshot or delta of added, changed and removed entries.
+    Changed entries contain the key and the changed fields only
+    """
+
+    def __init__(self, key: str, snapshotInterval: float = 30):
+        super().__init__(snapshotInterval)
+        self._key = key
+        # last published state of the entries by key
+        self._entries = dict()
+
+    def encode(self, entries: list, now: float = None) -> dict:
+        """
+        Returns the message to publish for the current `entries`, None if nothing changed
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            current = {entry[self._key]: dict(entry) for entry in entries}
+            if self._isSnapshotDue(now):
+                self._entries = current
+                return self._message(SNAPSHOT, now, entries=list(entries))
+            added = list()
+            changed = list()
+            for key, entry in current.items():
+                old = self._entries.get(key)
+                if old is None:
+                    added.append(entry)
+                else:
+                    fields = {field: value for field, value in entry.items() if old.get(field) != value}
+                    if len(fields) > 0:
+                        fields[self._key] = key
+                        changed.append(fields)
+            removed = [key for key in self._entries.keys() if key not in current]
+            self._entries = current
+            if len(added) == 0 and len(changed) == 0 and len(removed) == 0:
+                return None
+            return self._message(DELTA, now, added=added, changed=changed, removed=removed)
+
+
+class ObjectDeltaEncoder(_DeltaEncoder):
+    """
+    Encodes a single dictionary as snapshot or delta of its changed fields
+    """
+
+    def __init__(self, snapshotInterval: float = 30):
+        super().__init__(snapshotInterval)
+        self._entry = dict()
+
+    def encode(self, entry: dict, now: float = None) -> dict:
+        """
+        Returns the message to publish for the current `entry`, None if nothing changed
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            current = dict(entry)
+            if self._isSnapshotDue(now):
+                self._entry = current
+                return self._message(SNAPSHOT, now, entry=current)
+            changed = {field: value for field, value in current.items() if self._entry.get(field) != value}
+            self._entry = current
+            if len(changed) == 0:
+                return None
+            return self._message(DELTA, now, changed=changed)
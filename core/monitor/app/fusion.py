@@ -0,0 +1,178 @@
+import collections
+import threading
+import time
+
+"""
+Fusion of the SBS messages of several receivers (e.g. different antennas or locations) into one `TrafficMonitor`.
+
+A Mode S message heard by several receivers is forwarded once, the copies of the other receivers are dropped
+if they arrive within `dedupWindow` seconds. Messages are compared by the fields used by the `TrafficMonitor`,
+the receiver timestamps are ignored.
+Entries are attributed to the receivers they were heard by, and a position generated before the current one of an entry
+is ignored (see `TrafficEntry.update`), which requires the receiver clocks to be synchronized, e.g. by NTP.
+Every message costs one dictionary lookup and insert, expired messages are removed in the order they were received.
+"""
+
+
+def _messageKey(msg) -> tuple:
+    # the message types are not used by the `TrafficMonitor`, and hashing enums is slow
+    return (
+        msg.hexIdent,
+        msg.callsign,
+        msg.altitude,
+        msg.groundSpeed,
+        msg.track,
+        msg.latitude,
+        msg.longitude,
+        msg.verticalRate,
+        msg.squawk,
+        msg.alert,
+        msg.emergency,
+        msg.spi,
+        msg.isOnGround,
+    )
+
+
+class SBSFusionInput:
+    """
+    Input of one receiver to a :class:`SBSFusion`, can be fed like a `TrafficMonitor` with :func:`update` and :func:`updateBatch`,
+    e.g. by a `SBSTcpSource` or a `TrafficBatcher`
+    """
+
+    def __init__(self, fusion, name: str):
+        self._fusion = fusion
+        self._name = name
+        self._transport = None
+        self._messages = 0
+        self._duplicates = 0
+        # duplicates by the name of the receiver which delivered the message first
+        self._overlap = dict()
+        self._lastMessages = 0
+        self._lastTime = time.monotonic()
+        self._messagesPerSecond = 0.0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def setTransport(self, transport):
+        """
+        Set the object delivering the messages (e.g. `SBSTcpSource`), its `asdict` is included in the statistics
+        """
+        self._transport = transport
+
+    def update(self, msg):
+        self.updateBatch([msg])
+
+    def updateBatch(self, messages: list):
+        self._fusion.updateBatch(self, messages)
+
+    def asdict(self, now: float = None) -> dict:
+        """
+        statistics, `messagesPerSecond` is averaged over at least a second
+        """
+        now = now if now is not None else time.monotonic()
+        if now - self._lastTime >= 1:
+            self._messagesPerSecond = (self._messages - self._lastMessages) / (now - self._lastTime)
+            self._lastMessages = self._messages
+            self._lastTime = now
+        stats = {
+            "messages": self._messages,
+            "messagesPerSecond": round(self._messagesPerSecond, 1),
+            "duplicates": self._duplicates,
+            "overlap": dict(self._overlap),
+        }
+        if self._transport is not None:
+            stats["transport"] = self._transport.asdict()
+        return stats
+
+
+class SBSFusion:
+    """
+    Merges the SBS messages of the inputs created with :func:`addSource` into `trafficMonitor`, without duplicates
+    """
+
+    def __init__(self, trafficMonitor, dedupWindow: float = 1.0):
+        self._trafficMonitor = trafficMonitor
+        self._dedupWindow = dedupWindow
+        self._inputs = dict()
+        # first receipt of a message by its key, (time, input)
+        self._seen = dict()
+        # (time, key) in the order of receipt, to expire `_seen`
+        self._expiry = collections.deque()
+        self._lock = threading.Lock()
+
+    @property
+    def sources(self) -> list:
+        """
+        names of the inputs
+        """
+        return list(self._inputs.keys())
+
+    def addSource(self, name: str) -> SBSFusionInput:
+        """
+        Returns a new input for the receiver `name`
+        """
+        if name in self._inputs:
+            raise ValueError('sbs source "{}" already exists'.format(name))
+        fusionInput = SBSFusionInput(self, name)
+        self._inputs[name] = fusionInput
+        return fusionInput
+
+    def updateBatch(self, fusionInput: SBSFusionInput, messages: list, now: float = None):
+        """
+        Forward the messages of `fusionInput` which were not received by another input within the dedup window
+        """
+        now = now if now is not None else time.monotonic()
+        accepted = list()
+        with self._lock:
+            self._expire(now)
+            for msg in messages:
+                key = _messageKey(msg)
+                first = self._seen.get(key)
+                if first is not None and first[1] is not fusionInput:
+                    fusionInput._duplicates += 1
+                    name = first[1].name
+                    fusionInput._overlap[name] = fusionInput._overlap.get(name, 0) + 1
+                    continue
+                self._seen[key] = (now, fusionInput)
+                self._expiry.append((now, key))
+                accepted.append(msg)
+            fusionInput._messages += len(messages)
+        if len(accepted) == 1:
+            self._trafficMonitor.update(accepted[0], fusionInput.name)
+        elif len(accepted) > 1:
+            self._trafficMonitor.updateBatch(accepted, fusionInput.name)
+
+    def asdict(self) -> dict:
+        """
+        statistics by input, and the number of entries heard by each input, only by that input and by several inputs
+        """
+        targets = dict.fromkeys(self._inputs.keys(), 0)
+        exclusive = dict.fromkeys(self._inputs.keys(), 0)
+        shared = 0
+        for entry in self._trafficMonitor.traffic.values():
+            for name in entry.sources:
+                if name in targets:
+                    targets[name] += 1
+            if len(entry.sources) > 1:
+                shared += 1
+            elif len(entry.sources) == 1:
+                name = next(iter(entry.sources))
+                if name in exclusive:
+                    exclusive[name] += 1
+        sources = dict()
+        for name, fusionInput in self._inputs.items():
+            sources[name] = fusionInput.asdict()
+            sources[name]["targets"] = targets[name]
+            sources[name]["exclusiveTargets"] = exclusive[name]
+        return {"dedupWindow": self._dedupWindow, "sharedTargets": shared, "sources": sources}
+
+    def _expire(self, now: float):
+        deadline = now - self._dedupWindow
+        while len(self._expiry) > 0 and self._expiry[0][0] < deadline:
+            received, key = self._expiry.popleft()
+            first = self._seen.get(key)
+            # keep the key if it was received again later on
+            if first is not None and first[0] == received:
+                del self._seen[key]
@@ -8,6 +8,10 @@ import ipaddress
 import fcntl
 import struct
 import time
+import binascii
+from collections import deque
+import errno
+import json
 
 """
 GDL90 protocol implementation based on:
@@ -15,6 +19,24 @@ https://www.faa.gov/air_traffic/technology/adsb/archival/media/GDL90_Public_ICD_
 """
 
 
+# ioctl requests and interface flags, see linux/sockios.h and net/if.h
+SIOCGIFFLAGS = 0x8913
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891B
+IFF_UP = 0x1
+IFF_RUNNING = 0x40
+
+# send errors which indicate a problem with the interface and not with a single destination
+LINK_ERRNOS = (errno.ENETDOWN, errno.ENETUNREACH, errno.EADDRNOTAVAIL, errno.ENODEV, errno.EBADF)
+
+# traffic and ownship report: id, status/address type/address, latitude/longitude (2 x 24 bit), altitude/miscellaneous,
+# integrity/accuracy, horizontal/vertical velocity/track, emitter category, callsign, emergency code
+_TRAFFIC_REPORT = struct.Struct(">BIHIHBIB8sB")
+
+# a frame is enclosed in flag bytes, in the worst case every byte of the message and crc is escaped
+MAX_TRAFFIC_FRAME_SIZE = 2 + 2 * (_TRAFFIC_REPORT.size + 2)
+
+
 class GDL90Error(Exception):
     pass
 
@@ -212,20 +234,357 @@ class GDL90OwnshipGeoAltitudeMessage:
         self.isWarning = isWarning
 
 
+class GDL90TrafficEncoder:
+    """
+    Encodes traffic and ownship reports.
+    The static fields of every address (status, address, callsign, emitter category, emergency code) are kept encoded,
+    a report which did not change since the last one of its address is not encoded again
+    """
+
+    def __init__(self, cacheSize: int = 4096):
+        self._cacheSize = cacheSize
+        # address -> (static fields, encoded status/address, encoded callsign, last message, last frame)
+        self._cache = dict()
+        self._buffer = bytearray()
+
+    def encode(self, msg: GDL90TrafficMessage, msgId: GDL90MessageId = GDL90MessageId.TrafficReport) -> bytes:
+        """
+        Encode a `GDL90TrafficMessage` to a frame
+        """
+        static = (msgId, msg.status, msg.addrType, msg.emitterCat, msg.callsign, msg.emergencyCode)
+        cached = self._cache.get(msg.address)
+        if cached is None or cached[0] != static:
+            if len(self._cache) >= self._cacheSize:
+                self._cache.clear()
+            cached = [static, _encode_statusAddress(msg), _encode_callsign(msg.callsign).encode("utf-8"), None, None]
+            self._cache[msg.address] = cached
+        raw = _packTrafficMessage(msgId, msg, cached[1], cached[2])
+        if raw != cached[3]:
+            cached[3] = raw
+            cached[4] = _encode(raw)
+        return cached[4]
+
+    def encodeBatch(self, msgs: list, msgId: GDL90MessageId = GDL90MessageId.TrafficReport) -> memoryview:
+        """
+        Encode a list of `GDL90TrafficMessage` to consecutive frames in a preallocated buffer.
+        The returned view is only valid until the next call
+        """
+        size = len(msgs) * MAX_TRAFFIC_FRAME_SIZE
+        if len(self._buffer) < size:
+            self._buffer = bytearray(size)
+        buffer = self._buffer
+        offset = 0
+        for msg in msgs:
+            frame = self.encode(msg, msgId)
+            end = offset + len(frame)
+            buffer[offset:end] = frame
+            offset = end
+        return memoryview(buffer)[:offset]
+
+
+class GDL90OutputQueue:
+    """
+    Output queue with strict priority of heartbeat over ownship over traffic messages, safe to use from multiple threads.
+    A full class evicts its oldest message instead of dropping the new one, the newest heartbeat and ownship report are always sent.
+    Traffic reports which waited longer than `maxTrafficAge` seconds are discarded when they are taken from the queue
+    """
+
+    HEARTBEAT = 0
+    OWNSHIP = 1
+    TRAFFIC = 2
+    CLASS_NAMES = ("heartbeat", "ownship", "traffic")
+
+    def __init__(self, maxsize: int = 1000, priorityMaxsize: int = 10, maxTrafficAge: float = 2.0):
+        self._queues = (deque(), deque(), deque())
+        self._maxsizes = (priorityMaxsize, priorityMaxsize, maxsize)
+        self._maxTrafficAge = maxTrafficAge
+        self._condition = threading.Condition()
+        self._wakeups = 0
+        self._dequeued = [0, 0, 0]
+        self._dropped = [0, 0, 0]
+        self._expired = [0, 0, 0]
+        self._latencySum = [0.0, 0.0, 0.0]
+        self._latencyMax = [0.0, 0.0, 0.0]
+
+    @property
+    def dropped(self) -> int:
+        """
+        number of messages evicted because their class was full or discarded because they were too old
+        """
+        return sum(self._dropped) + sum(self._expired)
+
+    def qsize(self) -> int:
+        return sum(len(q) for q in self._queues)
+
+    def put(self, item, messageClass: int):
+        """
+        put an item of `messageClass` on the queue, evicts the oldest item of the class if it is full
+        """
+        with self._condition:
+            q = self._queues[messageClass]
+            if len(q) >= self._maxsizes[messageClass]:
+                q.popleft()
+                self._dropped[messageClass] += 1
+            q.append((time.monotonic(), item))
+            self._condition.notify()
+
+    def get(self, timeout: float = None):
+        """
+        Returns the item with the highest priority, waits up to `timeout` seconds and raises `queue.Empty` if there is none.
+        Returns None if :func:`wake` was called
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                if self._wakeups > 0:
+                    self._wakeups -= 1
+                    return None
+                now = time.monotonic()
+                for messageClass, q in enumerate(self._queues):
+                    while q:
+                        queued, item = q.popleft()
+                        latency = now - queued
+                        if messageClass == GDL90OutputQueue.TRAFFIC and latency > self._maxTrafficAge:
+                            self._expired[messageClass] += 1
+                            continue
+                        self._dequeued[messageClass] += 1
+                        self._latencySum[messageClass] += latency
+                        if latency > self._latencyMax[messageClass]:
+                            self._latencyMax[messageClass] = latency
+                        return item
+                if deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise queue.Empty()
+                    self._condition.wait(remaining)
+
+    def wake(self):
+        """
+        let one waiting or the next call of :func:`get` return None
+        """
+        with self._condition:
+            self._wakeups += 1
+            self._condition.notify()
+
+    def asdict(self) -> dict:
+        """
+        counters and queue latency in seconds by message class
+        """
+        with self._condition:
+            return {
+                name: {
+                    "queued": len(self._queues[i]),
+                    "sent": self._dequeued[i],
+                    "dropped": self._dropped[i],
+                    "expired": self._expired[i],
+                    "avgLatency": self._latencySum[i] / self._dequeued[i] if self._dequeued[i] > 0 else None,
+                    "maxLatency": self._latencyMax[i],
+                }
+                for i, name in enumerate(GDL90OutputQueue.CLASS_NAMES)
+            }
+
+
+class GDL90Sink:
+    """
+    Destination of GDL90 frames with its own queue and send thread, a slow or unreachable destination does not stall the others.
+    Frames are packed into datagrams of up to `maxDatagramSize` bytes, the GDL90 ICD allows multiple messages per datagram.
+    A datagram is sent as soon as the queue is empty and `flushLatency` seconds passed since its first frame
+    """
+
+    BROADCAST = "broadcast"
+    UNICAST = "unicast"
+    DISCOVERED = "discovered"
+
+    def __init__(
+        self,
+        kind: str,
+        ip: str,
+        port: int,
+        sendto,
+        queueSize: int = 1000,
+        maxDatagramSize: int = 1400,
+        flushLatency: float = 0,
+        onTrafficSent=None,
+        maxTrafficAge: float = 2.0,
+    ):
+        """
+        Constructor, `sendto` is called with a datagram and the destination address.
+        Frames are queued in a :class:`GDL90OutputQueue`
+        """
+        self._kind = kind
+        self._destination = (ip, port)
+        self._sendto = sendto
+        self._queue = GDL90OutputQueue(queueSize, maxTrafficAge=maxTrafficAge)
+        self._maxDatagramSize = maxDatagramSize
+        self._flushLatency = flushLatency
+        self._onTrafficSent = onTrafficSent
+        self._framesSent = 0
+        self._datagramsSent = 0
+        self._sendErrors = 0
+        self._sendErrorReported = False
+        self._lastSeen = time.monotonic()
+        self._stopFlag = threading.Event()
+        self._thread = None
+
+    @property
+    def kind(self) -> str:
+        """
+        broadcast, unicast or discovered
+        """
+        return self._kind
+
+    @property
+    def ip(self) -> str:
+        return self._destination[0]
+
+    @property
+    def port(self) -> int:
+        return self._destination[1]
+
+    @property
+    def framesSent(self) -> int:
+        """
+        number of GDL90 frames sent
+        """
+        return self._framesSent
+
+    @property
+    def datagramsSent(self) -> int:
+        """
+        number of UDP datagrams sent, every datagram is one send syscall
+        """
+        return self._datagramsSent
+
+    @property
+    def framesDropped(self) -> int:
+        """
+        number of GDL90 frames dropped because the queue was full or traffic was too old
+        """
+        return self._queue.dropped
+
+    @property
+    def lastSeen(self) -> float:
+        """
+        monotonic time the sink was added or last refreshed
+        """
+        return self._lastSeen
+
+    def setDestination(self, ip: str, port: int):
+        self._destination = (ip, port)
+
+    def refresh(self):
+        self._lastSeen = time.monotonic()
+
+    def asdict(self) -> dict:
+        return {
+            "kind": self._kind,
+            "ip": self.ip,
+            "port": self.port,
+            "framesSent": self._framesSent,
+            "datagramsSent": self._datagramsSent,
+            "framesDropped": self._queue.dropped,
+            "sendErrors": self._sendErrors,
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="GDL90Sink-{}:{}".format(*self._destination), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopFlag.set()
+        self._queue.wake()
+
+    def put(self, frame: bytes, messageClass: int):
+        """
+        put a frame of a :class:`GDL90OutputQueue` message class to send on the queue
+        """
+        self._queue.put((frame, messageClass == GDL90OutputQueue.TRAFFIC), messageClass)
+
+    def _run(self):
+        datagram = bytearray()
+        frameCount = 0
+        containsTraffic = False
+        deadline = None
+        while not self._stopFlag.is_set():
+            try:
+                item = self._queue.get(timeout=1 if deadline is None else deadline - time.monotonic())
+                if item is None:
+                    continue
+                frame, isTraffic = item
+            except queue.Empty:
+                if frameCount > 0:
+                    self._sendDatagram(datagram, frameCount, containsTraffic)
+                    datagram = bytearray()
+                    frameCount = 0
+                    containsTraffic = False
+                    deadline = None
+                continue
+            if frameCount > 0 and len(datagram) + len(frame) > self._maxDatagramSize:
+                self._sendDatagram(datagram, frameCount, containsTraffic)
+                datagram = bytearray()
+                frameCount = 0
+                containsTraffic = False
+            datagram += frame
+            frameCount += 1
+            containsTraffic = containsTraffic or isTraffic
+            if deadline is None:
+                deadline = time.monotonic() + self._flushLatency
+
+    def _sendDatagram(self, datagram: bytearray, frameCount: int, containsTraffic: bool):
+        try:
+            self._sendto(datagram, self._destination)
+            self._datagramsSent += 1
+            self._framesSent += frameCount
+            self._sendErrorReported = False
+            if containsTraffic and self._onTrafficSent is not None:
+                self._onTrafficSent()
+        except Exception as e:
+            self._sendErrors += 1
+            if not self._sendErrorReported:
+                log.error("error sending gdl90 message to {}:{}, {}".format(*self._destination, str(e)))
+                self._sendErrorReported = True
+
+
 class GDL90Port:
     """
-    Used to manage UDP broadcast socket for GDL90 messages.
-    Can enqueue messages for sending.
-    Performs socket health check and recreates socket automatically on network failure
+    Used to manage the UDP socket for GDL90 messages.
+    Can enqueue messages for sending, messages are encoded once and handed to every :class:`GDL90Sink`.
+    Sinks are the broadcast address of the network interface, unicast clients and clients discovered by their announcement.
+    Monitors state and address of the network interface and send errors, recreates socket automatically on network failure
     """
 
     EVENT_INIT_COMPLETE = 0
-    EVENT_RECEIVE_FAILURE = 1
+    EVENT_LINK_FAILURE = 1
 
     STATE_INACTIVE = 0
     STATE_ACTIVE = 1
 
-    def __init__(self, nic: str, port: int, queueSize: int = 1000):
+    # clients like ForeFlight announce the port they listen for GDL90 with a json broadcast to this port
+    DISCOVERY_PORT = 63093
+
+    def __init__(
+        self,
+        nic: str,
+        port: int,
+        queueSize: int = 1000,
+        startTime: float = None,
+        maxDatagramSize: int = 1400,
+        flushLatency: float = 0,
+        broadcast: bool = True,
+        discoveryTimeout: float = 30,
+        linkCheckInterval: float = 0.5,
+        initRetryInterval: float = 1,
+        maxTrafficAge: float = 2.0,
+    ):
+        """
+        Constructor, see :class:`GDL90Sink` for `maxDatagramSize` and `flushLatency`.
+        Discovered clients are removed if they did not announce themselves for `discoveryTimeout` seconds.
+        The interface is checked every `linkCheckInterval` seconds, send errors are detected immediately.
+        Messages and frames are queued in a :class:`GDL90OutputQueue`, traffic older than `maxTrafficAge` seconds is discarded
+        """
         self._socket = None
         self._nic = nic
         self._port = port
@@ -233,13 +592,37 @@ class GDL90Port:
         self._netMask = None
         self._broadcastIp = None
         self._sendThread = None
-        self._recvThread = None
+        self._linkThread = None
         self._initThread = None
-        self._msgQueue = queue.Queue(maxsize=queueSize)
+        self._discoveryThread = None
+        self._msgQueue = GDL90OutputQueue(queueSize, maxTrafficAge=maxTrafficAge)
         self._eventQueue = queue.Queue(maxsize=3)
         self._state = GDL90Port.STATE_INACTIVE
         self._stopFlag = threading.Event()
+        self._discoveryStopFlag = threading.Event()
         self._initFailureReported = False
+        self._linkCheckInterval = linkCheckInterval
+        self._initRetryInterval = initRetryInterval
+        self._sendFailure = threading.Event()
+        self._sendFailureReason = None
+        self._failureTime = None
+        self._reinitCount = 0
+        self._lastReinitLatency = None
+        self._startTime = startTime if startTime is not None else time.monotonic()
+        self._timeToFirstTraffic = None
+        self._trafficEncoder = GDL90TrafficEncoder()
+        self._queueSize = queueSize
+        self._maxTrafficAge = maxTrafficAge
+        self._maxDatagramSize = maxDatagramSize
+        self._flushLatency = flushLatency
+        self._discoveryTimeout = discoveryTimeout
+        self._sinksLock = threading.Lock()
+        # sinks by (ip, port), the broadcast sink is kept when it is disabled
+        self._sinks = dict()
+        self._broadcastSink = self._createSink(GDL90Sink.BROADCAST, None, port)
+        self._activeSinks = tuple()
+        self._broadcast = False
+        self.setBroadcast(broadcast)
 
     @property
     def isActive(self) -> bool:
@@ -258,7 +641,7 @@ class GDL90Port:
     @property
     def port(self) -> int:
         """
-        Returns the port to which gdl90 messages are sent to.
+        Returns the port to which gdl90 messages are broadcast.
         """
         return self._port
 
@@ -286,14 +669,123 @@ class GDL90Port:
         if self.isActive:
             return self._broadcastIp
 
+    @property
+    def timeToFirstTraffic(self) -> float:
+        """
+        Returns the seconds from start until the first traffic report was sent. can be none
+        """
+        return self._timeToFirstTraffic
+
+    @property
+    def reinitCount(self) -> int:
+        """
+        Returns how many times the socket was recreated after a link failure
+        """
+        return self._reinitCount
+
+    @property
+    def lastReinitLatency(self) -> float:
+        """
+        Returns the seconds from detecting the last link failure until the socket was ready again. can be none
+        """
+        return self._lastReinitLatency
+
+    @property
+    def framesSent(self) -> int:
+        """
+        Returns the number of GDL90 frames sent to all sinks
+        """
+        return sum(sink.framesSent for sink in self._allSinks())
+
+    @property
+    def datagramsSent(self) -> int:
+        """
+        Returns the number of UDP datagrams sent to all sinks, every datagram is one send syscall
+        """
+        return sum(sink.datagramsSent for sink in self._allSinks())
+
+    @property
+    def sinks(self) -> list:
+        """
+        Returns destination and counters of the active sinks
+        """
+        return [sink.asdict() for sink in self._activeSinks]
+
+    @property
+    def queueStats(self) -> dict:
+        """
+        Returns counters and latency of the send queue by message class
+        """
+        return self._msgQueue.asdict()
+
     def putMessage(self, msg):
         """
-        put a message to send on the queue. this will throw away the message if the queue is full
+        put a message to send on the queue, heartbeat and ownship messages are sent before traffic.
+        if the queue is full the oldest message of the same class is thrown away
         """
-        try:
-            self._msgQueue.put(msg, block=False)
-        except queue.Full:
-            log.error("gdl90 send queue full (maxsize={}), drop message".format(self._msgQueue.maxsize))
+        self._msgQueue.put(msg, _messageClass(msg))
+
+    def setBroadcast(self, enabled: bool):
+        """
+        enable or disable sending to the broadcast address of the network interface
+        """
+        with self._sinksLock:
+            self._broadcast = enabled
+            self._updateActiveSinks()
+        log.info("{} gdl90 broadcast".format("enabled" if enabled else "disabled"))
+
+    def addSink(self, ip: str, port: int = None, kind: str = GDL90Sink.UNICAST) -> bool:
+        """
+        add a unicast destination, refreshes the sink if it already exists. Returns True if the sink was added
+        """
+        ip = str(ipaddress.IPv4Address(ip))
+        port = port if port is not None else self._port
+        with self._sinksLock:
+            sink = self._sinks.get((ip, port))
+            if sink is not None:
+                sink.refresh()
+                return False
+            self._sinks[(ip, port)] = self._createSink(kind, ip, port)
+            self._updateActiveSinks()
+        log.info("added {} gdl90 sink {}:{}".format(kind, ip, port))
+        return True
+
+    def removeSink(self, ip: str, port: int = None) -> bool:
+        """
+        remove a unicast destination. Returns True if the sink existed
+        """
+        ip = str(ipaddress.IPv4Address(ip))
+        port = port if port is not None else self._port
+        with self._sinksLock:
+            sink = self._sinks.pop((ip, port), None)
+            if sink is None:
+                return False
+            self._updateActiveSinks()
+        sink.stop()
+        log.info("removed {} gdl90 sink {}:{}".format(sink.kind, ip, port))
+        return True
+
+    def startDiscovery(self, listenPort: int = DISCOVERY_PORT):
+        """
+        start listening for client announcements, e.g. `{"App":"ForeFlight","GDL90":{"port":4000}}`
+        """
+        if self._discoveryThread is None:
+            self._discoveryStopFlag.clear()
+            self._discoveryThread = threading.Thread(target=self._discover, args=[listenPort], name="GDL90Discovery", daemon=True)
+            self._discoveryThread.start()
+
+    def stopDiscovery(self):
+        """
+        stop listening for client announcements and remove discovered sinks
+        """
+        if self._discoveryThread is not None:
+            self._discoveryStopFlag.set()
+            self._discoveryThread.join()
+            self._discoveryThread = None
+            with self._sinksLock:
+                discovered = [key for key, sink in self._sinks.items() if sink.kind == GDL90Sink.DISCOVERED]
+            for ip, port in discovered:
+                self.removeSink(ip, port)
 
     def exec(self):
         """
@@ -306,44 +798,104 @@ class GDL90Port:
             if self._state == GDL90Port.STATE_INACTIVE:
                 if event == GDL90Port.EVENT_INIT_COMPLETE:
                     self._state = GDL90Port.STATE_ACTIVE
-                    log.info("entered active state")
+                    if self._failureTime is not None:
+                        self._reinitCount += 1
+                        self._lastReinitLatency = time.monotonic() - self._failureTime
+                        self._failureTime = None
+                        log.info("entered active state, {:.3f} seconds after link failure".format(self._lastReinitLatency))
+                    else:
+                        log.info("entered active state")
                     self._stopFlag.clear()
+                    self._sendFailure.clear()
                     self._initThread.join()
                     self._sendThread = threading.Thread(target=self._send, name="GDL90Sender")
-                    self._recvThread = threading.Thread(target=self._recv, name="GDL90Receiver")
+                    self._linkThread = threading.Thread(target=self._monitorLink, name="GDL90LinkMonitor")
                     self._sendThread.start()
-                    self._recvThread.start()
+                    self._linkThread.start()
             elif self._state == GDL90Port.STATE_ACTIVE:
-                if event == GDL90Port.EVENT_RECEIVE_FAILURE:
+                if event == GDL90Port.EVENT_LINK_FAILURE:
                     self._state = GDL90Port.STATE_INACTIVE
                     log.info("entered inactive state")
                     self._stopFlag.set()
+                    self._wakeSender()
                     self._sendThread.join()
-                    self._recvThread.join()
+                    self._linkThread.join()
                     self._initThread = threading.Thread(target=self._initSocket, name="GDL90SocketInitializer")
                     self._initThread.start()
             self._eventQueue.task_done()
 
+    def _createSink(self, kind: str, ip: str, port: int) -> GDL90Sink:
+        sink = GDL90Sink(
+            kind, ip, port, self._sendto, self._queueSize, self._maxDatagramSize, self._flushLatency, self._onTrafficSent, self._maxTrafficAge
+        )
+        sink.start()
+        return sink
+
+    def _allSinks(self) -> list:
+        return [self._broadcastSink] + list(self._sinks.values())
+
+    def _updateActiveSinks(self):
+        # replaced as a whole, the send thread iterates it without lock
+        sinks = list(self._sinks.values())
+        if self._broadcast:
+            sinks.insert(0, self._broadcastSink)
+        self._activeSinks = tuple(sinks)
+
+    def _wakeSender(self):
+        self._msgQueue.wake()
+
+    def _sendto(self, datagram: bytearray, destination: tuple):
+        try:
+            self._socket.sendto(datagram, destination)
+        except OSError as ex:
+            # a network can be unreachable for a single unicast destination without a problem of the interface
+            if ex.errno in LINK_ERRNOS and (ex.errno != errno.ENETUNREACH or destination[0] == self._broadcastIp):
+                self._sendFailureReason = str(ex)
+                self._sendFailure.set()
+            raise
+
+    def _onTrafficSent(self):
+        if self._timeToFirstTraffic is None:
+            self._timeToFirstTraffic = time.monotonic() - self._startTime
+            log.info("sent first gdl90 traffic report {:.3f} seconds after start".format(self._timeToFirstTraffic))
+
     def _getIpAddress(self, ifname):
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        ifAddr = 0x8915  # SIOCGIFADDR
-        ifNetask = 0x891B  # SIOCGIFNETMASK
-        ip = socket.inet_ntoa(fcntl.ioctl(s.fileno(), ifAddr, struct.pack("256s", ifname.encode("UTF-8")))[20:24])
-        mask = socket.inet_ntoa(fcntl.ioctl(s.fileno(), ifNetask, struct.pack("256s", ifname.encode("UTF-8")))[20:24])
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            ip = socket.inet_ntoa(_ifreq(s, SIOCGIFADDR, ifname)[20:24])
+            mask = socket.inet_ntoa(_ifreq(s, SIOCGIFNETMASK, ifname)[20:24])
         return (ip, mask)
 
+    def _linkProblem(self, s: socket.socket) -> str:
+        """
+        Returns why the interface can not be used anymore, None if it is up and its address did not change
+        """
+        flags = struct.unpack("H", _ifreq(s, SIOCGIFFLAGS, self._nic)[16:18])[0]
+        if not flags & IFF_UP:
+            return "interface {} is down".format(self._nic)
+        if not flags & IFF_RUNNING:
+            return "interface {} has no carrier".format(self._nic)
+        ip = socket.inet_ntoa(_ifreq(s, SIOCGIFADDR, self._nic)[20:24])
+        mask = socket.inet_ntoa(_ifreq(s, SIOCGIFNETMASK, self._nic)[20:24])
+        if ip != self._ip or mask != self._netMask:
+            return "address of interface {} changed to {}/{}".format(self._nic, ip, mask)
+        return None
+
     def _initSocket(self):
         while True:
             try:
                 self._ip, self._netMask = self._getIpAddress(self._nic)
                 addrObj = self._ip + "/" + self._netMask
-                net = ipaddress.IPv4Network(self._ip + "/" + self._netMask, False)
+                with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                    problem = self._linkProblem(s)
+                if problem is not None:
+                    raise OSError(problem)
+                net = ipaddress.IPv4Network(addrObj, False)
                 self._broadcastIp = str(net.broadcast_address)
+                if self._socket is not None:
+                    self._socket.close()
                 self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
                 self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-                self._socket.settimeout(2)
-                # bind the socket to readback broadcast packages for health check purposes
-                self._socket.bind((self._broadcastIp, self._port))
+                self._broadcastSink.setDestination(self._broadcastIp, self._port)
                 self._eventQueue.put(GDL90Port.EVENT_INIT_COMPLETE)
                 log.info("send gdl90 messages to {} (iface: {}, ip: {})".format(self._broadcastIp, self._nic, addrObj))
                 self._initFailureReported = False
@@ -352,52 +904,100 @@ class GDL90Port:
                 if not self._initFailureReported:
                     log.error("gdl90 udp socket init failure, {}".format(str(ex)))
                     self._initFailureReported = True
-                time.sleep(5)
+                time.sleep(self._initRetryInterval)
 
     def _send(self):
         """
-        Get messages from queue and send them to udp address.
-        Uses a lock to make sure socket is not modified while sending.
+        Get messages from queue, encode them and hand the frames to all sinks.
         """
-        while True:
+        while not self._stopFlag.is_set():
             try:
                 msg = self._msgQueue.get(timeout=3)
-                if type(msg) == GDL90HeartBeatMessage:
-                    bytes = encodeHeartbeatMessage(msg)
-                elif type(msg) == GDL90TrafficMessage:
-                    bytes = encodeTrafficMessage(msg)
-                elif type(msg) == GDL90OwnshipMessage:
-                    bytes = encodeOwnshipMessage(msg)
-                elif type(msg) == GDL90OwnshipGeoAltitudeMessage:
-                    bytes = encodeOwnshipAltitudeMessage(msg)
-                else:
-                    raise TypeError("msg has unexpected type {}".format(type(msg)))
-                self._socket.sendto(bytes, self._socket.getsockname())
-                self._msgQueue.task_done()
             except queue.Empty:
-                pass
+                continue
+            if msg is None:
+                continue
+            try:
+                frame = self._encodeMessage(msg)
+                messageClass = _messageClass(msg)
+                for sink in self._activeSinks:
+                    sink.put(frame, messageClass)
             except Exception as e:
-                log.error("error sending gdl90 message, {}".format(str(e)))
-            finally:
-                if self._stopFlag.isSet():
-                    break
+                log.error("error encoding gdl90 message, {}".format(str(e)))
+
+    def _encodeMessage(self, msg) -> bytes:
+        if type(msg) == GDL90HeartBeatMessage:
+            return encodeHeartbeatMessage(msg)
+        elif type(msg) == GDL90TrafficMessage:
+            return self._trafficEncoder.encode(msg)
+        elif type(msg) == GDL90OwnshipMessage:
+            return encodeOwnshipMessage(msg)
+        elif type(msg) == GDL90OwnshipGeoAltitudeMessage:
+            return encodeOwnshipAltitudeMessage(msg)
+        else:
+            raise TypeError("msg has unexpected type {}".format(type(msg)))
 
-    def _recv(self):
+    def _monitorLink(self):
         """
-        Continously read back broadcast data and check for socket timeout.
-        Timeout indicates that socket does not work anymore and has to be recreated.
+        Check the interface periodically and wait for send errors in between.
+        A failure indicates that socket does not work anymore and has to be recreated.
         """
-        while True:
-            try:
-                # returns up to N bytes, can return less, is blocking if there is no data to read from the socket,
-                # could be made non-blocking (beware of exceptions in this case)
-                data = self._socket.recv(1000)
-                if len(data) <= 0:
-                    raise ValueError('received unexpected "{}" number of bytes'.format(len(data)))
-            except (TimeoutError, ValueError, AttributeError) as e:
-                log.error('detected problem with socket "{}", recreate socket...'.format(str(e)))
-                self._eventQueue.put(GDL90Port.EVENT_RECEIVE_FAILURE)
-                break
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            while not self._stopFlag.is_set():
+                if self._sendFailure.wait(self._linkCheckInterval):
+                    problem = "send error, {}".format(self._sendFailureReason)
+                else:
+                    try:
+                        problem = self._linkProblem(s)
+                    except OSError as ex:
+                        problem = str(ex)
+                if problem is not None:
+                    log.error('detected problem with link "{}", recreate socket...'.format(problem))
+                    self._failureTime = time.monotonic()
+                    self._eventQueue.put(GDL90Port.EVENT_LINK_FAILURE)
+                    break
+
+    def _discover(self, listenPort: int):
+        try:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.settimeout(1)
+            listener.bind(("", listenPort))
+        except OSError as ex:
+            log.error("could not listen for gdl90 client announcements on port {}, {}".format(listenPort, str(ex)))
+            return
+        log.info("listen for gdl90 client announcements on port {}".format(listenPort))
+        with listener:
+            while not self._discoveryStopFlag.is_set():
+                try:
+                    data, (ip, _) = listener.recvfrom(1000)
+                    announcement = json.loads(data)
+                    self.addSink(ip, int(announcement["GDL90"]["port"]), GDL90Sink.DISCOVERED)
+                except socket.timeout:
+                    pass
+                except (ValueError, KeyError, TypeError) as ex:
+                    log.warning("invalid gdl90 client announcement, {}".format(str(ex)))
+                self._expireDiscoveredSinks()
+
+    def _expireDiscoveredSinks(self):
+        deadline = time.monotonic() - self._discoveryTimeout
+        with self._sinksLock:
+            expired = [key for key, sink in self._sinks.items() if sink.kind == GDL90Sink.DISCOVERED and sink.lastSeen < deadline]
+        for ip, port in expired:
+            self.removeSink(ip, port)
+
+
+def _messageClass(msg) -> int:
+    if type(msg) is GDL90TrafficMessage:
+        return GDL90OutputQueue.TRAFFIC
+    elif type(msg) is GDL90HeartBeatMessage:
+        return GDL90OutputQueue.HEARTBEAT
+    else:
+        return GDL90OutputQueue.OWNSHIP
+
+
+def _ifreq(s: socket.socket, request: int, ifname: str) -> bytes:
+    return fcntl.ioctl(s.fileno(), request, struct.pack("256s", ifname.encode("UTF-8")))
 
 
 def encodeHeartbeatMessage(msg: GDL90HeartBeatMessage) -> bytes:
@@ -460,56 +1060,23 @@ def encodeOwnshipAltitudeMessage(msg: GDL90OwnshipGeoAltitudeMessage) -> bytes:
 
 def _crc16(data: bytes):
     """
-    CRC-16 (CCITT) implemented with a precomputed lookup table
+    GDL90 CRC-16 (CCITT). The GDL90 variant does not augment the message with 16 zero bits, which equals the
+    standard CRC of all but the last two bytes combined with the last two bytes. The standard CRC is computed by `binascii`
     """
-    # fmt: off
-    table = [
-        0x0000, 0x1021, 0x2042, 0x3063, 0x4084, 0x50A5, 0x60C6, 0x70E7, 0x8108, 0x9129, 0xA14A, 0xB16B, 0xC18C, 0xD1AD, 0xE1CE, 0xF1EF,
-        0x1231, 0x0210, 0x3273, 0x2252, 0x52B5, 0x4294, 0x72F7, 0x62D6, 0x9339, 0x8318, 0xB37B, 0xA35A, 0xD3BD, 0xC39C, 0xF3FF, 0xE3DE,
-        0x2462, 0x3443, 0x0420, 0x1401, 0x64E6, 0x74C7, 0x44A4, 0x5485, 0xA56A, 0xB54B, 0x8528, 0x9509, 0xE5EE, 0xF5CF, 0xC5AC, 0xD58D,
-        0x3653, 0x2672, 0x1611, 0x0630, 0x76D7, 0x66F6, 0x5695, 0x46B4, 0xB75B, 0xA77A, 0x9719, 0x8738, 0xF7DF, 0xE7FE, 0xD79D, 0xC7BC,
-        0x48C4, 0x58E5, 0x6886, 0x78A7, 0x0840, 0x1861, 0x2802, 0x3823, 0xC9CC, 0xD9ED, 0xE98E, 0xF9AF, 0x8948, 0x9969, 0xA90A, 0xB92B,
-        0x5AF5, 0x4AD4, 0x7AB7, 0x6A96, 0x1A71, 0x0A50, 0x3A33, 0x2A12, 0xDBFD, 0xCBDC, 0xFBBF, 0xEB9E, 0x9B79, 0x8B58, 0xBB3B, 0xAB1A,
-        0x6CA6, 0x7C87, 0x4CE4, 0x5CC5, 0x2C22, 0x3C03, 0x0C60, 0x1C41, 0xEDAE, 0xFD8F, 0xCDEC, 0xDDCD, 0xAD2A, 0xBD0B, 0x8D68, 0x9D49,
-        0x7E97, 0x6EB6, 0x5ED5, 0x4EF4, 0x3E13, 0x2E32, 0x1E51, 0x0E70, 0xFF9F, 0xEFBE, 0xDFDD, 0xCFFC, 0xBF1B, 0xAF3A, 0x9F59, 0x8F78,
-        0x9188, 0x81A9, 0xB1CA, 0xA1EB, 0xD10C, 0xC12D, 0xF14E, 0xE16F, 0x1080, 0x00A1, 0x30C2, 0x20E3, 0x5004, 0x4025, 0x7046, 0x6067,
-        0x83B9, 0x9398, 0xA3FB, 0xB3DA, 0xC33D, 0xD31C, 0xE37F, 0xF35E, 0x02B1, 0x1290, 0x22F3, 0x32D2, 0x4235, 0x5214, 0x6277, 0x7256,
-        0xB5EA, 0xA5CB, 0x95A8, 0x8589, 0xF56E, 0xE54F, 0xD52C, 0xC50D, 0x34E2, 0x24C3, 0x14A0, 0x0481, 0x7466, 0x6447, 0x5424, 0x4405,
-        0xA7DB, 0xB7FA, 0x8799, 0x97B8, 0xE75F, 0xF77E, 0xC71D, 0xD73C, 0x26D3, 0x36F2, 0x0691, 0x16B0, 0x6657, 0x7676, 0x4615, 0x5634,
-        0xD94C, 0xC96D, 0xF90E, 0xE92F, 0x99C8, 0x89E9, 0xB98A, 0xA9AB, 0x5844, 0x4865, 0x7806, 0x6827, 0x18C0, 0x08E1, 0x3882, 0x28A3,
-        0xCB7D, 0xDB5C, 0xEB3F, 0xFB1E, 0x8BF9, 0x9BD8, 0xABBB, 0xBB9A, 0x4A75, 0x5A54, 0x6A37, 0x7A16, 0x0AF1, 0x1AD0, 0x2AB3, 0x3A92,
-        0xFD2E, 0xED0F, 0xDD6C, 0xCD4D, 0xBDAA, 0xAD8B, 0x9DE8, 0x8DC9, 0x7C26, 0x6C07, 0x5C64, 0x4C45, 0x3CA2, 0x2C83, 0x1CE0, 0x0CC1,
-        0xEF1F, 0xFF3E, 0xCF5D, 0xDF7C, 0xAF9B, 0xBFBA, 0x8FD9, 0x9FF8, 0x6E17, 0x7E36, 0x4E55, 0x5E74, 0x2E93, 0x3EB2, 0x0ED1, 0x1EF0
-    ]
-    # fmt: on
-
-    crc = 0
-    for byte in data:
-        crc = (crc << 8) ^ table[(crc >> 8)] ^ byte
-        crc &= 0xFFFF  # important, crc must stay 16bits all the way through
-    result = (crc & 0xFF) << 8 | (crc & 0xFF00) >> 8
-    return result
+    crc = binascii.crc_hqx(data[:-2], 0) ^ int.from_bytes(data[-2:], "big")
+    return ((crc & 0xFF) << 8) | (crc >> 8)
 
 
 def _addCrc(msg: bytes) -> bytes:
-    return b"".join([msg, _crc16(msg).to_bytes(2, "big")])
+    return msg + _crc16(msg).to_bytes(2, "big")
 
 
 def _escape(msg: bytes) -> bytes:
-    escaped = bytes()
-    for b in msg:
-        if b == 0x7D or b == 0x7E:
-            escaped += b"\x7d"
-            escaped += (b ^ 0x20).to_bytes(1, "big")
-        else:
-            escaped += b.to_bytes(1, "big")
-    return escaped
+    return msg.replace(b"\x7d", b"\x7d\x5d").replace(b"\x7e", b"\x7d\x5e")
 
 
 def _encode(msg: bytes) -> bytes:
-    msg = _addCrc(msg)
-    msg = _escape(msg)
-    return b"".join([b"\x7e", msg, b"\x7e"])
+    return b"\x7e" + _escape(_addCrc(msg)) + b"\x7e"
 
 
 def _encode_latlon(latlon: float) -> int:
@@ -526,7 +1093,8 @@ def _encode_altitude(alt: int) -> int:
 def _encode_miscellaneous(
     trackIndicator: GDL90MiscellaneousIndicatorTrack, reportIndicator: GDL90MiscellaneousIndicatorReport, airborneIndicator: GDL90MiscellaneousIndicatorAirborne
 ) -> int:
-    return trackIndicator | reportIndicator | airborneIndicator
+    # int operands, IntFlag.__or__ is implemented in python and dominates the encoding time
+    return int(trackIndicator) | int(reportIndicator) | int(airborneIndicator)
 
 
 def _encode_hVelocity(velocity: int) -> int:
@@ -572,30 +1140,24 @@ def _encode_merit(merit: int) -> int:
 
 def _encodeTrafficMessage(msgId: GDL90MessageId, msg: GDL90TrafficMessage) -> bytes:
     # st aa aa aa ll ll ll nn nn nn dd dm ia hh hv vv tt ee cc cc cc cc cc cc cc cc px
-    enc_alt = _encode_altitude(msg.altitude)
-    enc_misc = _encode_miscellaneous(msg.trackIndicator, msg.reportIndicator, msg.airborneIndicator)
-    enc_hVel = _encode_hVelocity(msg.hVelocity)
-    enc_vVel = _encode_vVelocity(msg.vVelocity)
-    enc_trk = _encode_track(msg.trackHeading)
-    enc_callsign = _encode_callsign(msg.callsign)
-
-    raw = b"".join(
-        [
-            msgId.to_bytes(1, "big"),
-            ((msg.status << 4) | msg.addrType).to_bytes(1, "big"),
-            msg.address.to_bytes(3, "big"),
-            _encode_latlon(msg.latitude).to_bytes(3, "big"),
-            _encode_latlon(msg.longitude).to_bytes(3, "big"),
-            ((enc_alt & 0xFF0) >> 4).to_bytes(1, "big"),
-            (((enc_alt & 0x00F) << 4) | enc_misc).to_bytes(1, "big"),
-            (((msg.navIntegrityCat & 0xF) << 4) | (msg.navAccuracyCat & 0xF)).to_bytes(1, "big"),
-            ((enc_hVel & 0xFF0) >> 4).to_bytes(1, "big"),
-            (((enc_hVel & 0x00F) << 4) | ((enc_vVel & 0xF00) >> 8)).to_bytes(1, "big"),
-            (enc_vVel & 0x0FF).to_bytes(1, "big"),
-            enc_trk.to_bytes(1, "big"),
-            msg.emitterCat.to_bytes(1, "big"),
-            enc_callsign.encode("utf-8"),
-            (msg.emergencyCode << 4).to_bytes(1, "big"),
-        ]
+    return _encode(_packTrafficMessage(msgId, msg, _encode_statusAddress(msg), _encode_callsign(msg.callsign).encode("utf-8")))
+
+
+def _encode_statusAddress(msg: GDL90TrafficMessage) -> int:
+    return (((int(msg.status) << 4) | int(msg.addrType)) << 24) | (msg.address & 0xFFFFFF)
+
+
+def _packTrafficMessage(msgId: GDL90MessageId, msg: GDL90TrafficMessage, statusAddress: int, callsign: bytes) -> bytes:
+    enc_lat = _encode_latlon(msg.latitude)
+    return _TRAFFIC_REPORT.pack(
+        msgId,
+        statusAddress,
+        enc_lat >> 8,
+        ((enc_lat & 0xFF) << 24) | _encode_latlon(msg.longitude),
+        (_encode_altitude(msg.altitude) << 4) | _encode_miscellaneous(msg.trackIndicator, msg.reportIndicator, msg.airborneIndicator),
+        ((msg.navIntegrityCat & 0xF) << 4) | (msg.navAccuracyCat & 0xF),
+        (_encode_hVelocity(msg.hVelocity) << 20) | ((_encode_vVelocity(msg.vVelocity) & 0xFFF) << 8) | _encode_track(msg.trackHeading),
+        msg.emitterCat,
+        callsign,
+        msg.emergencyCode << 4,
     )
-    return _encode(raw)
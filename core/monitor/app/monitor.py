@@ -6,7 +6,14 @@ from pyubx2 import UBXReader
 from pynmeagps import NMEAReader
 from sbs import SBSReader
 from positioning import NavMonitor, PosInfo, NavMode
-from traffic import TrafficMonitor, TrafficEntry
+from traffic import TrafficMonitor, TrafficEntry, TrafficBatcher
+from aircraftdb import AircraftDb
+from ratelimit import TrafficRateLimiter
+from runtime import MonitorRuntime
+from delta import CollectionDeltaEncoder, ObjectDeltaEncoder
+from sbssource import SBSTcpSource
+from fusion import SBSFusion
+from trafficfilter import TrafficFilterPipeline, Ownship, CallsignFilter, NoPositionFilter, AltitudeFilter, RangeFilter
 from gdl90 import (
     GDL90Port,
     GDL90EmitterCategory,
@@ -18,15 +25,24 @@ from gdl90 import (
     GDL90TrafficMessage
 )
 from datetime import datetime
+import functools
 import threading
 import json
+import time
 
 try:
     import common.mqtt as mqtt
     import common.util as util
+    from common.scheduler import defaultScheduler
 except ImportError:
     import mqtt
     import util
+    from scheduler import defaultScheduler
+
+SATELLITES_TOPIC = "/easyadsb/monitor/satellites"
+TRAFFIC_TOPIC = "/easyadsb/monitor/traffic"
+POSITION_TOPIC = "/easyadsb/monitor/position"
+STATUS_TOPIC = "/easyadsb/monitor/status"
 
 
 def onExit():
@@ -38,10 +54,19 @@ class MessageDispatcher:
     used to parse incoming mqtt messages and dispatch them to the correct receiver
     """
 
-    def __init__(self, navMonitor, trafficMonitor, gdl90Sender):
+    def __init__(self, navMonitor, trafficMonitor, gdl90Sender, trafficBatcher=None, gdl90Port=None):
         self._navMonitor = navMonitor
         self._trafficMonitor = trafficMonitor
         self._gdl90Sender = gdl90Sender
+        self._trafficBatcher = trafficBatcher
+        self._gdl90Port = gdl90Port
+        self._jsonSender = None
+
+    def setJsonSender(self, jsonSender):
+        """
+        `JsonSender` publishing snapshots on request, created after the mqtt messenger
+        """
+        self._jsonSender = jsonSender
 
     def onNmeaMessage(self, msg):
         try:
@@ -60,26 +85,40 @@ class MessageDispatcher:
             log.error('on ubx message error, {}, "{}"'.format(str(ex), msg))
             return
 
-    def onSbsMessage(self, msg):
+    def onSbsMessage(self, msg, trafficMonitor=None, trafficBatcher=None, parseDates: bool = False):
+        """
+        handle a SBS line or a batch of lines separated by "\n".
+        The messages are fed to `trafficMonitor` and `trafficBatcher` if given, e.g. the input of a receiver to a `SBSFusion`,
+        otherwise to the ones of the dispatcher. With `parseDates` the time the messages were generated is parsed
+        """
+        if trafficMonitor is None:
+            trafficMonitor = self._trafficMonitor
+            trafficBatcher = self._trafficBatcher
+        messages = list()
+        for line in msg.split("\n"):
+            try:
+                sbs = SBSReader.parseTraffic(line.strip(), parseDates)
+                log.debug(sbs)
+                messages.append(sbs)
+            except Exception as ex:
+                log.error('on sbs message error, {}, "{}"'.format(str(ex), line))
         try:
-            dec = msg.strip()
-            sbs = SBSReader.parse(dec)
-            log.debug(sbs)
-            self._trafficMonitor.update(sbs)
-        except UnicodeDecodeError:
-            log.error('on sbs message decode error, "{}"'.format(msg))
-            return
+            if trafficBatcher is not None:
+                for sbs in messages:
+                    trafficBatcher.put(sbs)
+            elif len(messages) == 1:
+                trafficMonitor.update(messages[0])
+            elif len(messages) > 1:
+                trafficMonitor.updateBatch(messages)
         except Exception as ex:
-            log.error('on sbs message error, {}, "{}"'.format(str(ex), msg))
-            return
+            log.error("on sbs message error, {}".format(str(ex)))
 
-    def onBmeMessage(self, msg):
+    def onBmeMessage(self, bme):
         try:
-            bme = json.loads(msg.strip())
             log.debug(bme)
             self._navMonitor.updateBme(bme)
         except Exception as ex:
-            log.error('on bme message error, {}, "{}"'.format(str(ex), msg.payload))
+            log.error('on bme message error, {}, "{}"'.format(str(ex), bme))
             return
 
     def onTrafficRequest(self, msg):
@@ -95,6 +134,45 @@ class MessageDispatcher:
             elif msg["command"] == "setCallsignFilter":
                 log.info("set callsign filter to {}".format(msg["data"]["callsign"]))
                 self._gdl90Sender.setCallsignFilter(msg["data"]["callsign"])
+            elif msg["command"] == "setRangeFilter":
+                if msg["data"]["enabled"]:
+                    self._gdl90Sender.trafficFilter.setFilter(RangeFilter(float(msg["data"]["radius"])))
+                else:
+                    self._gdl90Sender.trafficFilter.removeFilter(RangeFilter.name)
+            elif msg["command"] == "setAltitudeFilter":
+                if msg["data"]["enabled"]:
+                    self._gdl90Sender.trafficFilter.setFilter(AltitudeFilter(float(msg["data"]["band"])))
+                else:
+                    self._gdl90Sender.trafficFilter.removeFilter(AltitudeFilter.name)
+            elif msg["command"] == "setNoPositionFilter":
+                if msg["data"]["enabled"]:
+                    self._gdl90Sender.trafficFilter.setFilter(NoPositionFilter())
+                else:
+                    self._gdl90Sender.trafficFilter.removeFilter(NoPositionFilter.name)
+            elif msg["command"] == "getTrafficFilters":
+                return self._gdl90Sender.trafficFilter.asdict()
+            elif msg["command"] == "requestSnapshot":
+                self._jsonSender.requestSnapshot()
+            else:
+                raise KeyError("command {} unknown".format(msg["command"]))
+        else:
+            raise KeyError("missing key \"command\" in message")
+
+    def onGdl90Request(self, msg):
+        if "command" in msg.keys():
+            if msg["command"] == "addSink":
+                self._gdl90Port.addSink(msg["data"]["ip"], msg["data"].get("port"))
+            elif msg["command"] == "removeSink":
+                self._gdl90Port.removeSink(msg["data"]["ip"], msg["data"].get("port"))
+            elif msg["command"] == "setBroadcast":
+                self._gdl90Port.setBroadcast(msg["data"]["enabled"])
+            elif msg["command"] == "setDiscovery":
+                if msg["data"]["enabled"]:
+                    self._gdl90Port.startDiscovery()
+                else:
+                    self._gdl90Port.stopDiscovery()
+            elif msg["command"] == "getSinks":
+                return self._gdl90Port.sinks
             else:
                 raise KeyError("command {} unknown".format(msg["command"]))
         else:
@@ -105,23 +183,45 @@ class GDL90Sender:
     """
     used to send various GDL90 messages to a `GDL90Port`.
     Manages periodic GDL90 Heartbeat.
+    Traffic reports are rate limited per aircraft if `trafficInterval` is greater than 0.
+    Heartbeat and rate limiter are jobs of `scheduler` (e.g. `MonitorRuntime`), default is the shared `Scheduler` of the process.
+    Heartbeats are sent on full UTC seconds.
     """
 
-    def __init__(self, gdl90Port: GDL90Port, navMonitor):
+    def __init__(self, gdl90Port: GDL90Port, navMonitor, trafficInterval: float = 0, trafficPriorityInterval: float = 0.25, scheduler=None):
         self._gdl90Port = gdl90Port
         self._heartbeatIntervalSeconds = 1
         self._navMonitor = navMonitor
-        self._sendHeartbeatMsg()
-        self._filteredCallsign = None
+        self._trafficFilter = TrafficFilterPipeline()
+        self._trafficFilter.setFilter(CallsignFilter(None))
+        self._rateLimiter = None
+        if trafficInterval > 0:
+            self._rateLimiter = TrafficRateLimiter(
+                self._sendTraffic, trafficInterval, trafficPriorityInterval, ownship=lambda: self._trafficFilter.ownship
+            )
+            self._rateLimiter.start(scheduler)
+        scheduler = scheduler if scheduler is not None else defaultScheduler()
+        scheduler.callEvery(self._heartbeatIntervalSeconds, self._sendHeartbeat, "GDL90Heartbeat", align=True)
+
+    @property
+    def trafficFilter(self) -> TrafficFilterPipeline:
+        """
+        filters applied to traffic before it is converted to GDL90
+        """
+        return self._trafficFilter
 
     def setCallsignFilter(self, callsign):
-        self._filteredCallsign = callsign
+        self._trafficFilter.setFilter(CallsignFilter(callsign))
 
     def notify(self, obj):
-        if type(obj) == TrafficEntry and obj["callsign"] != self._filteredCallsign:
-            trafficMsg = MessageConverter.toGDL90TrafficMsg(obj)
-            self._send(trafficMsg)
+        if type(obj) == TrafficEntry:
+            if self._trafficFilter.accept(obj):
+                if self._rateLimiter is not None:
+                    self._rateLimiter.notify(obj)
+                else:
+                    self._sendTraffic(obj)
         elif type(obj) == PosInfo:
+            self._trafficFilter.updateOwnship(Ownship.fromPosInfo(obj))
             ownshipMsg = MessageConverter.toGDL90OwnshipMsg(obj)
             ownshipAltMsg = MessageConverter.toGDL90OwnshipGeoAltMsg(obj)
             self._send(ownshipMsg)
@@ -129,14 +229,20 @@ class GDL90Sender:
         else:
             log.error("notified with unexpected object of type {}".format(type(obj)))
 
+    def notifyExpired(self, entry: TrafficEntry):
+        if self._rateLimiter is not None:
+            self._rateLimiter.notifyExpired(entry)
+
+    def _sendTraffic(self, entry: TrafficEntry):
+        trafficMsg = MessageConverter.toGDL90TrafficMsg(entry)
+        self._send(trafficMsg)
+
     def _send(self, msg):
         if self._gdl90Port.isActive:
             self._gdl90Port.putMessage(msg)
 
-    def _sendHeartbeatMsg(self):
+    def _sendHeartbeat(self):
         try:
-            self._timer = threading.Timer(self._heartbeatIntervalSeconds, self._sendHeartbeatMsg)
-            self._timer.start()
             heartbeat = MessageConverter.toGDL90HeartbeatMsg(self._navMonitor.posInfo)
             self._send(heartbeat)
         except Exception as ex:
@@ -233,23 +339,50 @@ class MessageConverter:
 
 class JsonSender:
     """
-    used to periodically publish mqtt messages with monitored information
+    used to periodically publish mqtt messages with monitored information.
+    With `delta` set, traffic, satellites and position are published as snapshot followed by deltas (see `delta`),
+    a snapshot is published every `snapshotInterval` seconds and on request.
     """
 
-    def __init__(self, navMonitor: NavMonitor, trafficMonitor: TrafficMonitor, gdl90Port: GDL90Port, messenger, sendIntervalSeconds):
+    def __init__(
+        self,
+        navMonitor: NavMonitor,
+        trafficMonitor: TrafficMonitor,
+        gdl90Port: GDL90Port,
+        messenger,
+        sendIntervalSeconds,
+        scheduler=None,
+        delta: bool = False,
+        snapshotInterval: float = 30,
+        sbsSource: SBSTcpSource = None,
+        sbsFusion: SBSFusion = None,
+    ):
+        self._scheduler = scheduler if scheduler is not None else defaultScheduler()
         self._navMonitor = navMonitor
         self._trafficMonitor = trafficMonitor
         self._gdl90Port = gdl90Port
         self._messenger = messenger
         self._intervalSeconds = sendIntervalSeconds
+        self._delta = delta
+        self._sbsSource = sbsSource
+        self._sbsFusion = sbsFusion
+        self._trafficEncoder = CollectionDeltaEncoder("id", snapshotInterval)
+        self._satellitesEncoder = CollectionDeltaEncoder("svid", snapshotInterval)
+        self._positionEncoder = ObjectDeltaEncoder(snapshotInterval)
 
     def start(self):
-        self._sendMessages()
+        self._scheduler.callEvery(self._intervalSeconds, self._publish, "JsonSender", delay=0)
 
-    def _sendMessages(self):
+    def requestSnapshot(self):
+        """
+        publish traffic, satellites and position as snapshot with the next interval
+        """
+        self._trafficEncoder.requestSnapshot()
+        self._satellitesEncoder.requestSnapshot()
+        self._positionEncoder.requestSnapshot()
+
+    def _publish(self):
         try:
-            self._timer = threading.Timer(self._intervalSeconds, self._sendMessages)
-            self._timer.start()
             status = dict()
             status["gdl90"] = {
                 "isActive": self._gdl90Port.isActive,
@@ -258,21 +391,73 @@ class JsonSender:
                 "broadcastIp": self._gdl90Port.broadcastIp,
                 "nic": self._gdl90Port.nic,
                 "port": self._gdl90Port.port,
+                "timeToFirstTraffic": self._gdl90Port.timeToFirstTraffic,
+                "framesSent": self._gdl90Port.framesSent,
+                "datagramsSent": self._gdl90Port.datagramsSent,
+                "reinitCount": self._gdl90Port.reinitCount,
+                "lastReinitLatency": self._gdl90Port.lastReinitLatency,
+                "sinks": self._gdl90Port.sinks,
+                "queue": self._gdl90Port.queueStats,
             }
-            status = json.dumps(status)
-            satellites = json.dumps(list(self._navMonitor.satellites.values()))
-            traffic = json.dumps(list(self._trafficMonitor.traffic.values()))
-            position = json.dumps(self._navMonitor.posInfo)
-            self._messenger.sendNotification("/easyadsb/monitor/satellites", satellites)
-            self._messenger.sendNotification("/easyadsb/monitor/traffic", traffic)
-            self._messenger.sendNotification("/easyadsb/monitor/position", position)
-            self._messenger.sendNotification("/easyadsb/monitor/status", status)
+            if self._sbsSource is not None:
+                status["sbs"] = self._sbsSource.asdict()
+            if self._sbsFusion is not None:
+                status["fusion"] = self._sbsFusion.asdict()
+            status["jobs"] = {job.name: job.asdict() for job in self._scheduler.jobs}
+            satellites = list(self._navMonitor.satellites.values())
+            traffic = [entry.asdict() for entry in self._trafficMonitor.traffic.values()]
+            position = self._navMonitor.posInfo
+            if self._delta:
+                satellites = self._satellitesEncoder.encode(satellites)
+                traffic = self._trafficEncoder.encode(traffic)
+                position = self._positionEncoder.encode(position)
+                status["delta"] = {
+                    "traffic": self._trafficEncoder.asdict(),
+                    "satellites": self._satellitesEncoder.asdict(),
+                    "position": self._positionEncoder.asdict(),
+                }
+            if satellites is not None:
+                self._messenger.sendNotification(SATELLITES_TOPIC, satellites)
+            if traffic is not None:
+                self._messenger.sendNotification(TRAFFIC_TOPIC, traffic)
+            if position is not None:
+                self._messenger.sendNotification(POSITION_TOPIC, position)
+            self._messenger.sendNotification(STATUS_TOPIC, status)
 
         except Exception as ex:
             log.error("error sending json messages, {}".format(str(ex)))
 
 
+def loadAircraftDb(trafficMonitor: TrafficMonitor, aircraftDbPath: str):
+    """
+    load the aircraft database and hand it over to the `TrafficMonitor`
+    """
+    try:
+        start = time.monotonic()
+        if os.path.isfile(aircraftDbPath):
+            aircraftDb = AircraftDb(aircraftDbPath)
+            aircrafts, types, dbversion, typesExtension = aircraftDb.aircrafts, aircraftDb.types, aircraftDb.version, aircraftDb.typesExtension
+        elif not os.path.isfile("/home/data/mictronics/aircrafts.json"):
+            log.info("no aircraft database found, run without database enrichment")
+            return
+        else:
+            log.warning("aircraft database {} not found, load json files".format(aircraftDbPath))
+            with open("/home/data/mictronics/aircrafts.json") as f:
+                aircrafts = json.load(f)
+            with open("/home/data/mictronics/types.json") as f:
+                types = json.load(f)
+            with open("/home/data/mictronics/dbversion.json") as f:
+                dbversion = json.load(f)["version"]
+            with open("/home/data/typesExtension.json") as f:
+                typesExtension = json.load(f)
+        trafficMonitor.setDatabase(aircrafts, types, dbversion, typesExtension)
+        log.info("loaded aircraft database version {} in {:.3f} seconds".format(dbversion, time.monotonic() - start))
+    except Exception as ex:
+        log.error("could not load aircraft database, {}".format(str(ex)))
+
+
 def main():
+    startTime = time.monotonic()
     logLevel = str(os.getenv("MO_LOG_LEVEL"))
     broker = str(os.getenv("MO_MQTT_HOST"))
     port = int(os.getenv("MO_MQTT_PORT"))
@@ -283,28 +468,59 @@ def main():
     bmeTopic = str(os.getenv("MO_MQTT_BME280_TOPIC"))
     gdl90NetworkInterface = str(os.getenv("MO_GDL90_NETWORK_INTERFACE"))
     gdl90NetworkPort = int(os.getenv("MO_GDL90_PORT"))
+    sbsBatchLatencyMs = int(os.getenv("MO_SBS_BATCH_LATENCY_MS", "0"))
+    aircraftDbPath = str(os.getenv("MO_AIRCRAFT_DB", "/home/data/aircraftdb.bin"))
+    trafficTimeout = float(os.getenv("MO_TRAFFIC_TIMEOUT", "300"))
+    trafficCleanupInterval = float(os.getenv("MO_TRAFFIC_CLEANUP_INTERVAL", "10"))
+    gdl90TrafficIntervalMs = int(os.getenv("MO_GDL90_TRAFFIC_INTERVAL_MS", "1000"))
+    gdl90TrafficPriorityIntervalMs = int(os.getenv("MO_GDL90_TRAFFIC_PRIORITY_INTERVAL_MS", "250"))
+    gdl90MaxDatagramSize = int(os.getenv("MO_GDL90_MAX_DATAGRAM_SIZE", "1400"))
+    gdl90FlushLatencyMs = int(os.getenv("MO_GDL90_FLUSH_LATENCY_MS", "0"))
+    gdl90Broadcast = os.getenv("MO_GDL90_BROADCAST", "1") == "1"
+    gdl90Unicast = str(os.getenv("MO_GDL90_UNICAST", ""))
+    gdl90Discovery = os.getenv("MO_GDL90_DISCOVERY", "0") == "1"
+    gdl90MaxTrafficAgeMs = int(os.getenv("MO_GDL90_MAX_TRAFFIC_AGE_MS", "2000"))
+    mqttDelta = os.getenv("MO_MQTT_DELTA", "0") == "1"
+    mqttSnapshotInterval = float(os.getenv("MO_MQTT_SNAPSHOT_INTERVAL", "30"))
+    topicsConfPath = str(os.getenv("MO_MQTT_TOPICS_CONF", "/home/conf/topics.json"))
+    sbsTcpHost = str(os.getenv("MO_SBS_TCP_HOST", ""))
+    sbsTcpPort = int(os.getenv("MO_SBS_TCP_PORT", "30003"))
+    sbsSources = str(os.getenv("MO_SBS_SOURCES", ""))
+    sbsDedupWindowMs = int(os.getenv("MO_SBS_DEDUP_WINDOW_MS", "1000"))
 
     util.setupLogging(logLevel)
     atexit.register(onExit)
 
-    with open("/home/data/mictronics/aircrafts.json") as f:
-        aircrafts = json.load(f)
-    with open("/home/data/mictronics/types.json") as f:
-        types = json.load(f)
-    with open("/home/data/mictronics/dbversion.json") as f:
-        dbversion = json.load(f)
-    with open("/home/data/typesExtension.json") as f:
-        typesExtension = json.load(f)
-
     if clientName == "":
         log.info("mqtt client name is empty, assign uuid")
         clientName = str(uuid.uuid1())
 
-    trafficMonitor = TrafficMonitor(aircrafts, types, dbversion["version"], typesExtension)
+    runtime = MonitorRuntime()
+    runtime.start()
+    trafficMonitor = TrafficMonitor(timeout=trafficTimeout, cleanupInterval=trafficCleanupInterval, scheduler=runtime)
+    dbLoader = threading.Thread(target=loadAircraftDb, args=[trafficMonitor, aircraftDbPath], name="AircraftDbLoader", daemon=True)
+    dbLoader.start()
     navMonitor = NavMonitor()
-    gdl90Port = GDL90Port(gdl90NetworkInterface, gdl90NetworkPort)
-    gdl90Sender = GDL90Sender(gdl90Port, navMonitor)
-    msgDispatcher = MessageDispatcher(navMonitor, trafficMonitor, gdl90Sender)
+    gdl90Port = GDL90Port(
+        gdl90NetworkInterface,
+        gdl90NetworkPort,
+        startTime=startTime,
+        maxDatagramSize=gdl90MaxDatagramSize,
+        flushLatency=gdl90FlushLatencyMs / 1000,
+        broadcast=gdl90Broadcast,
+        maxTrafficAge=gdl90MaxTrafficAgeMs / 1000,
+    )
+    for destination in filter(None, gdl90Unicast.split(",")):
+        ip, _, sinkPort = destination.strip().partition(":")
+        gdl90Port.addSink(ip, int(sinkPort) if sinkPort else None)
+    if gdl90Discovery:
+        gdl90Port.startDiscovery()
+    gdl90Sender = GDL90Sender(gdl90Port, navMonitor, gdl90TrafficIntervalMs / 1000, gdl90TrafficPriorityIntervalMs / 1000, scheduler=runtime)
+    trafficBatcher = None
+    if sbsBatchLatencyMs > 0 and sbsSources == "":
+        log.info("batch sbs messages with max latency of {} ms".format(sbsBatchLatencyMs))
+        trafficBatcher = TrafficBatcher(trafficMonitor, sbsBatchLatencyMs / 1000)
+    msgDispatcher = MessageDispatcher(navMonitor, trafficMonitor, gdl90Sender, trafficBatcher, gdl90Port)
     log.debug("{name}, {broker}, {port}".format(name=clientName, broker=broker, port=port))
     mqttClient = mqtt.launch(clientName, broker, port)
     subscriptions = {
@@ -316,24 +532,82 @@ def main():
             "type": mqtt.MqttMessenger.NOTIFICATION,
             "func": msgDispatcher.onUbxMessage
         },
-        sbsTopic: {
-            "type": mqtt.MqttMessenger.NOTIFICATION,
-            "func": msgDispatcher.onSbsMessage
-        },
         bmeTopic: {
             "type": mqtt.MqttMessenger.NOTIFICATION,
             "func": msgDispatcher.onBmeMessage
         },
         "/easyadsb/monitor/traffic/ctrl": {
             "type": mqtt.MqttMessenger.REQUEST,
-            "func": msgDispatcher.onTrafficRequest
+            "func": msgDispatcher.onTrafficRequest,
+            "executor": runtime.workerExecutor
+        },
+        "/easyadsb/monitor/gdl90/ctrl": {
+            "type": mqtt.MqttMessenger.REQUEST,
+            "func": msgDispatcher.onGdl90Request,
+            "executor": runtime.workerExecutor
         }
     }
-    messenger = mqtt.MqttMessenger(mqttClient, subscriptions)
-    jsonSender = JsonSender(navMonitor, trafficMonitor, gdl90Port, messenger, 1)
+    sbsSource = None
+    sbsFusion = None
+    tcpSources = list()
+    if sbsSources != "":
+        sbsFusion = SBSFusion(trafficMonitor, sbsDedupWindowMs / 1000)
+        for source in filter(None, sbsSources.split(",")):
+            name, _, address = source.strip().partition("=")
+            kind, _, address = address.partition(":")
+            try:
+                if kind == "tcp":
+                    host, _, tcpPort = address.partition(":")
+                    tcpPort = int(tcpPort) if tcpPort else 30003
+                    fusionInput = sbsFusion.addSource(name)
+                    tcpSource = SBSTcpSource(host, tcpPort, fusionInput, parseDates=True)
+                    fusionInput.setTransport(tcpSource)
+                    tcpSources.append(tcpSource)
+                elif kind == "mqtt":
+                    fusionInput = sbsFusion.addSource(name)
+                    batcher = TrafficBatcher(fusionInput, sbsBatchLatencyMs / 1000) if sbsBatchLatencyMs > 0 else None
+                    subscriptions[address] = {
+                        "type": mqtt.MqttMessenger.NOTIFICATION,
+                        "func": functools.partial(msgDispatcher.onSbsMessage, trafficMonitor=fusionInput, trafficBatcher=batcher, parseDates=True),
+                        "executor": runtime.workerExecutor
+                    }
+                else:
+                    raise ValueError('unknown kind "{}"'.format(kind))
+            except ValueError as ex:
+                log.error('invalid sbs source "{}", expected "name=tcp:host:port" or "name=mqtt:topic", {}'.format(source, str(ex)))
+                continue
+            log.info('merge sbs source "{}" from {}:{}'.format(name, kind, address))
+    elif sbsTcpHost != "":
+        log.info('read sbs from "{}:{}" instead of mqtt topic {}'.format(sbsTcpHost, sbsTcpPort, sbsTopic))
+        sbsSource = SBSTcpSource(sbsTcpHost, sbsTcpPort, trafficMonitor)
+        tcpSources.append(sbsSource)
+    else:
+        subscriptions[sbsTopic] = {
+            "type": mqtt.MqttMessenger.NOTIFICATION,
+            "func": msgDispatcher.onSbsMessage,
+            "executor": runtime.workerExecutor
+        }
+    codecs = mqtt.loadTopicCodecs(topicsConfPath, [SATELLITES_TOPIC, TRAFFIC_TOPIC, POSITION_TOPIC, STATUS_TOPIC])
+    codecs.update(mqtt.loadTopicCodecs(topicsConfPath, [bmeTopic], receive=True))
+    messenger = mqtt.MqttMessenger(mqttClient, subscriptions, executor=runtime.executor, codecs=codecs)
+    jsonSender = JsonSender(
+        navMonitor,
+        trafficMonitor,
+        gdl90Port,
+        messenger,
+        1,
+        scheduler=runtime,
+        delta=mqttDelta,
+        snapshotInterval=mqttSnapshotInterval,
+        sbsSource=sbsSource,
+        sbsFusion=sbsFusion,
+    )
+    msgDispatcher.setJsonSender(jsonSender)
     jsonSender.start()
     trafficMonitor.register(gdl90Sender)
     navMonitor.register(gdl90Sender)
+    for tcpSource in tcpSources:
+        tcpSource.start()
     gdl90Port.exec()
 
 
@@ -0,0 +1,129 @@
+import time
+import threading
+
+try:
+    from monitor.app.traffic import TrafficEntry
+    from monitor.app.spatial import distanceNm
+    from common.scheduler import defaultScheduler
+except ImportError:
+    from traffic import TrafficEntry
+    from spatial import distanceNm
+    from scheduler import defaultScheduler
+
+"""
+Rate limiting of traffic reports.
+
+Only the latest state of every aircraft is kept, it is emitted at most once per interval.
+New aircrafts are emitted with the next tick, emergencies and close aircrafts with a shorter interval.
+"""
+
+EMERGENCY_SQUAWKS = (7500, 7600, 7700)
+
+
+class TrafficRateLimiter:
+    """
+    Coalesces :class:`TrafficEntry` updates and hands them to `emit` at a limited rate per aircraft.
+    Implements the observer interface of `TrafficMonitor`
+    """
+
+    def __init__(
+        self,
+        emit,
+        interval: float = 1.0,
+        priorityInterval: float = 0.25,
+        tickInterval: float = 0.05,
+        closeRange: float = 5.0,
+        ownship=None,
+    ):
+        """
+        Constructor, `emit` is called with every due :class:`TrafficEntry`.
+        `ownship` is a callable returning an object with `latitude` and `longitude`, used to prioritize
+        aircrafts within `closeRange` nm
+        """
+        self._emit = emit
+        self._interval = interval
+        self._priorityInterval = priorityInterval
+        self._tickInterval = tickInterval
+        self._closeRange = closeRange
+        self._ownship = ownship
+        # latest state of aircrafts with updates which are not yet emitted, by id
+        self._pending = dict()
+        # time of the last emission by id
+        self._lastEmit = dict()
+        self._received = 0
+        self._emitted = 0
+        self._lock = threading.Lock()
+        self._job = None
+
+    @property
+    def received(self) -> int:
+        """
+        number of updates received
+        """
+        return self._received
+
+    @property
+    def emitted(self) -> int:
+        """
+        number of updates emitted, the difference to `received` has been coalesced
+        """
+        return self._emitted
+
+    def start(self, scheduler=None):
+        """
+        start emitting every tick, as job of `scheduler` (e.g. `MonitorRuntime`), default is the shared `Scheduler` of the process
+        """
+        if self._job is None:
+            scheduler = scheduler if scheduler is not None else defaultScheduler()
+            self._job = scheduler.callEvery(self._tickInterval, self.emitDue, "TrafficRateLimiter")
+
+    def notify(self, entry: TrafficEntry):
+        """
+        keep `entry` as latest state of its aircraft
+        """
+        entry = entry.copy()
+        with self._lock:
+            self._pending[entry.id] = entry
+            self._received += 1
+
+    def notifyExpired(self, entry: TrafficEntry):
+        """
+        forget an aircraft removed from the `TrafficMonitor`
+        """
+        with self._lock:
+            self._pending.pop(entry.id, None)
+            self._lastEmit.pop(entry.id, None)
+
+    def emitDue(self, now: float = None):
+        """
+        emit all due aircrafts, new aircrafts first, then emergencies and close aircrafts, then the longest waiting
+        """
+        if now is None:
+            now = time.monotonic()
+        due = list()
+        with self._lock:
+            ownship = self._ownship() if self._ownship is not None else None
+            for id, entry in self._pending.items():
+                lastEmit = self._lastEmit.get(id)
+                if lastEmit is None:
+                    due.append((0, 0, entry))
+                    continue
+                if self._isPriority(entry, ownship):
+                    if now - lastEmit >= self._priorityInterval:
+                        due.append((1, lastEmit, entry))
+                elif now - lastEmit >= self._interval:
+                    due.append((2, lastEmit, entry))
+            for _, _, entry in due:
+                del self._pending[entry.id]
+                self._lastEmit[entry.id] = now
+            self._emitted += len(due)
+        due.sort(key=lambda item: (item[0], item[1]))
+        for _, _, entry in due:
+            self._emit(entry)
+
+    def _isPriority(self, entry: TrafficEntry, ownship) -> bool:
+        if entry.emergency or entry.squawk in EMERGENCY_SQUAWKS:
+            return True
+        if ownship is None or ownship.latitude is None or ownship.longitude is None or entry.latitude is None or entry.longitude is None:
+            return False
+        return distanceNm(ownship.latitude, ownship.longitude, entry.latitude, entry.longitude) <= self._closeRange
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+try:
+    from common.scheduler import PeriodicJob
+except ImportError:
+    from scheduler import PeriodicJob
+
+"""
+Event loop runtime of the monitor.
+
+Periodic jobs (see `scheduler`) and light mqtt message handlers run on one asyncio event loop thread,
+instead of a new timer thread for every tick. Jobs and handlers on the loop must not block.
+SBS ingestion, which takes most of the cpu time, and handlers which block run on a pool of worker threads,
+so they neither delay the jobs (e.g. the GDL90 heartbeat) nor serialize the updates of the sharded `TrafficMonitor`.
+"""
+
+
+class LoopExecutor(Executor):
+    """
+    `concurrent.futures.Executor` running submitted functions on the event loop thread, one after another.
+    Can be passed to `MqttMessenger` to handle mqtt messages on the event loop
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        self._loop.call_soon_threadsafe(self._execute, future, fn, args, kwargs)
+        return future
+
+    def _execute(self, future: Future, fn, args, kwargs):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as ex:
+            future.set_exception(ex)
+
+
+class MonitorRuntime:
+    """
+    Runs an asyncio event loop in a background thread.
+    Provides periodic jobs with :func:`callEvery`, an :class:`LoopExecutor` for mqtt messages
+    and a pool of `workers` threads for work which is heavy or blocks
+    """
+
+    def __init__(self, workers: int = 3):
+        self._loop = asyncio.new_event_loop()
+        self._executor = LoopExecutor(self._loop)
+        self._workerExecutor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="MonitorWorker")
+        self._jobs = list()
+        self._jobsLock = threading.Lock()
+        self._thread = None
+
+    @property
+    def executor(self) -> LoopExecutor:
+        """
+        executor running functions on the event loop
+        """
+        return self._executor
+
+    @property
+    def workerExecutor(self) -> ThreadPoolExecutor:
+        """
+        executor running functions on the worker threads, e.g. SBS ingestion and blocking mqtt requests
+        """
+        return self._workerExecutor
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    @property
+    def jobs(self) -> list:
+        """
+        scheduled jobs which are not cancelled
+        """
+        with self._jobsLock:
+            self._jobs = [job for job in self._jobs if not job.cancelled]
+            return list(self._jobs)
+
+    def start(self):
+        """
+        start the event loop thread
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="MonitorRuntime", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        stop the event loop thread and the worker threads, pending jobs are not called anymore
+        """
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+        self._workerExecutor.shutdown()
+
+    def callSoon(self, func, *args):
+        """
+        call `func` on the event loop, can be called from any thread
+        """
+        self._loop.call_soon_threadsafe(func, *args)
+
+    def callEvery(self, interval: float, func, name: str = None, delay: float = None, align: bool = False) -> PeriodicJob:
+        """
+        call `func` every `interval` seconds on the event loop, the first time after `delay` seconds (default `interval`)
+        or on the next multiple of `interval` in UTC if `align` is set. Can be called from any thread
+        """
+        job = PeriodicJob(interval, func, name, align)
+        with self._jobsLock:
+            self._jobs.append(job)
+        self._loop.call_soon_threadsafe(self._startJob, job, delay)
+        return job
+
+    def _startJob(self, job: PeriodicJob, delay: float):
+        # the loop clock is the monotonic clock
+        if not job.cancelled:
+            self._loop.call_at(job.start(self._loop.time(), delay), self._runJob, job)
+
+    def _runJob(self, job: PeriodicJob):
+        if not job.cancelled:
+            self._loop.call_at(job.run(self._loop.time()), self._runJob, job)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
@@ -175,6 +175,94 @@ class SBSMessage:
         )
 
 
+class SBSTrafficMessage:
+    """
+    Compact SBS message which holds only the fields consumed by a `TrafficMonitor`.
+    Created by :func:`SBSReader.parseTraffic`, attribute names are the same as in :class:`SBSMessage`
+    """
+
+    __slots__ = (
+        "type",
+        "transmissionType",
+        "hexIdent",
+        "messageGeneratedDateTime",
+        "callsign",
+        "altitude",
+        "groundSpeed",
+        "track",
+        "latitude",
+        "longitude",
+        "verticalRate",
+        "squawk",
+        "alert",
+        "emergency",
+        "spi",
+        "isOnGround",
+    )
+
+    def __init__(
+        self,
+        msgType: SBSMessageType = None,
+        transmissionType: SBSTransmissionType = None,
+        hexIdent: str = None,
+        messageGeneratedDateTime: datetime = None,
+        callsign: str = None,
+        altitude: int = None,
+        groundSpeed: int = None,
+        track: int = None,
+        latitude: float = None,
+        longitude: float = None,
+        verticalRate: int = None,
+        squawk: int = None,
+        alert: bool = None,
+        emergency: bool = None,
+        spi: bool = None,
+        isOnGround: bool = None,
+    ):
+        self.type = msgType
+        self.transmissionType = transmissionType
+        self.hexIdent = hexIdent
+        self.messageGeneratedDateTime = messageGeneratedDateTime
+        self.callsign = callsign
+        self.altitude = altitude
+        self.groundSpeed = groundSpeed
+        self.track = track
+        self.latitude = latitude
+        self.longitude = longitude
+        self.verticalRate = verticalRate
+        self.squawk = squawk
+        self.alert = alert
+        self.emergency = emergency
+        self.spi = spi
+        self.isOnGround = isOnGround
+
+    def __str__(self):
+        return (
+            "<SBSTraffic({}, {}, hexIdent={}, callsign={}, altitude={}, groundSpeed={}, track={}, "
+            "latitude={}, longitude={}, verticalRate={}, squawk={}, alert={}, emergency={}, spi={}, isOnGround={})>"
+        ).format(
+            self.type,
+            self.transmissionType,
+            self.hexIdent,
+            self.callsign,
+            self.altitude,
+            self.groundSpeed,
+            self.track,
+            self.latitude,
+            self.longitude,
+            self.verticalRate,
+            self.squawk,
+            self.alert,
+            self.emergency,
+            self.spi,
+            self.isOnGround,
+        )
+
+
+_MSG_TYPES = {t.name: t for t in SBSMessageType}
+_TRANSMISSION_TYPES = {str(t.value): t for t in SBSTransmissionType}
+
+
 class SBSReader:
     """SBSReader"""
 
@@ -210,20 +298,50 @@ class SBSReader:
         )
         return msg
 
+    def parseTraffic(msg: str, parseDates: bool = False) -> SBSTrafficMessage:
+        """
+        parses a string to a :class:`SBSTrafficMessage`, much cheaper than :func:`parse`.
+        Only the fields used by a `TrafficMonitor` are decoded, date & time are only parsed if `parseDates` is set.
+        raises a :class:`SBSParseError` if string has not the expected format
+        """
+        tokens = msg.split(",")
+        if len(tokens) != 22:
+            raise SBSParseError("invalid token count")
+        msgType = _MSG_TYPES.get(tokens[0])
+        if msgType is None:
+            raise SBSParseError('unknown msg type "{}"'.format(tokens[0]))
+        txType = tokens[1]
+        if txType:
+            transmissionType = _TRANSMISSION_TYPES.get(txType)
+            if transmissionType is None:
+                raise SBSParseError('unknown transmission type "{}"'.format(txType))
+        else:
+            transmissionType = None
+        callsign, altitude, groundSpeed, track, latitude, longitude, verticalRate, squawk, alert, emergency, spi, isOnGround = tokens[10:22]
+        return SBSTrafficMessage(
+            msgType,
+            transmissionType,
+            tokens[4] or None,
+            SBSReader._dateTimeFromTokens(tokens[6], tokens[7]) if parseDates else None,
+            callsign or None,
+            int(altitude) if altitude else None,
+            int(groundSpeed) if groundSpeed else None,
+            int(track) if track else None,
+            float(latitude) if latitude else None,
+            float(longitude) if longitude else None,
+            int(verticalRate) if verticalRate else None,
+            int(squawk) if squawk else None,
+            alert != "0" if alert else None,
+            emergency != "0" if emergency else None,
+            spi != "0" if spi else None,
+            isOnGround != "0" if isOnGround else None,
+        )
+
     def _msgTypeFromToken(msgType: str) -> SBSMessageType:
-        if msgType == "MSG":
-            return SBSMessageType.MSG
-        if msgType == "STA":
-            return SBSMessageType.STA
-        if msgType == "ID":
-            return SBSMessageType.ID
-        if msgType == "AIR":
-            return SBSMessageType.AIR
-        if msgType == "SEL":
-            return SBSMessageType.SEL
-        if msgType == "CLK":
-            return SBSMessageType.CLK
-        raise SBSParseError('unknown msg type "{}"'.format(msgType))
+        try:
+            return _MSG_TYPES[msgType]
+        except KeyError:
+            raise SBSParseError('unknown msg type "{}"'.format(msgType))
 
     def _transmissionTypeFromToken(txType: str) -> SBSTransmissionType:
         return SBSTransmissionType(int(txType)) if txType else None
@@ -241,4 +359,9 @@ class SBSReader:
         return val if val else None
 
     def _dateTimeFromTokens(dateVal: str, timeVal: str) -> datetime:
+        if len(dateVal) == 10 and len(timeVal) == 12 and dateVal[4] == "/" and dateVal[7] == "/" and timeVal[8] == ".":
+            # format of dump1090, e.g. "2023/10/26" "07:20:11.481", much faster than strptime
+            return datetime(
+                int(dateVal[0:4]), int(dateVal[5:7]), int(dateVal[8:10]), int(timeVal[0:2]), int(timeVal[3:5]), int(timeVal[6:8]), int(timeVal[9:12]) * 1000
+            )
         return datetime.strptime(dateVal + " " + timeVal, "%Y/%m/%d %H:%M:%S.%f")
@@ -0,0 +1,134 @@
+import logging as log
+import socket
+import threading
+
+try:
+    from monitor.app.sbs import SBSReader, SBSParseError
+    from common.framing import LineFramer
+except ImportError:
+    from sbs import SBSReader, SBSParseError
+    from framing import LineFramer
+
+"""
+SBS source reading straight from the TCP port of dump1090 (30003), instead of the mqtt topic of dump1090mqtt.
+
+All lines of one receive are parsed and fed to `TrafficMonitor.updateBatch` at once.
+"""
+
+
+class SBSTcpSource:
+    """
+    Connects to a SBS TCP server and feeds the received messages in batches to `trafficMonitor`.
+    Reconnects every `reconnectInterval` seconds while the server is not reachable.
+    With `parseDates` the time the messages were generated is parsed, e.g. to merge several receivers
+    """
+
+    def __init__(self, host: str, port: int, trafficMonitor, reconnectInterval: float = 5, bufferSize: int = 65536, parseDates: bool = False):
+        self._host = host
+        self._port = port
+        self._trafficMonitor = trafficMonitor
+        self._reconnectInterval = reconnectInterval
+        self._parseDates = parseDates
+        self._framer = LineFramer(bufferSize)
+        self._socket = None
+        self._stopped = threading.Event()
+        self._thread = None
+        self._connected = False
+        self._connects = 0
+        self._messages = 0
+        self._batches = 0
+        self._parseErrors = 0
+
+    @property
+    def isConnected(self) -> bool:
+        return self._connected
+
+    @property
+    def messages(self) -> int:
+        """
+        number of SBS messages fed to the `TrafficMonitor`
+        """
+        return self._messages
+
+    def asdict(self) -> dict:
+        return {
+            "host": self._host,
+            "port": self._port,
+            "isConnected": self._connected,
+            "connects": self._connects,
+            "messages": self._messages,
+            "batches": self._batches,
+            "parseErrors": self._parseErrors,
+            "bytesReceived": self._framer.bytesReceived,
+        }
+
+    def start(self):
+        """
+        start reading in a background thread
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="SBSTcpSource", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        close the connection and wait for the reader thread to end
+        """
+        self._stopped.set()
+        sock = self._socket
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def process(self, lines: list):
+        """
+        parse received lines and feed them as one batch to the `TrafficMonitor`
+        """
+        messages = list()
+        for line in lines:
+            try:
+                messages.append(SBSReader.parseTraffic(line.decode("ascii"), self._parseDates))
+            except (UnicodeDecodeError, SBSParseError, ValueError) as ex:
+                self._parseErrors += 1
+                log.debug('sbs parse error, {}, "{}"'.format(str(ex), line))
+        if len(messages) > 0:
+            try:
+                self._trafficMonitor.updateBatch(messages)
+            except Exception as ex:
+                log.error("error updating traffic batch, {}".format(str(ex)))
+            self._messages += len(messages)
+            self._batches += 1
+
+    def _run(self):
+        failureReported = False
+        while not self._stopped.is_set():
+            try:
+                self._socket = socket.create_connection((self._host, self._port), timeout=self._reconnectInterval)
+                self._socket.settimeout(None)
+            except OSError as ex:
+                if not failureReported:
+                    log.error('could not connect to sbs source "{}:{}", {}'.format(self._host, self._port, str(ex)))
+                    failureReported = True
+                self._stopped.wait(self._reconnectInterval)
+                continue
+            failureReported = False
+            self._connected = True
+            self._connects += 1
+            self._framer.reset()
+            log.info('connected to sbs source "{}:{}"'.format(self._host, self._port))
+            try:
+                while not self._stopped.is_set():
+                    self.process(self._framer.recvLines(self._socket))
+            except OSError as ex:
+                if not self._stopped.is_set():
+                    log.error('sbs source "{}:{}" disconnected, {}'.format(self._host, self._port, str(ex)))
+            finally:
+                self._connected = False
+                self._socket.close()
+                self._socket = None
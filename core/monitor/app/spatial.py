@@ -0,0 +1,132 @@
+import math
+
+"""
+Spatial indexing of traffic positions.
+
+Positions are sorted into a grid of `cellSize` degrees, a query only visits the cells overlapping its bounding box.
+Distances are great circle distances in nautical miles.
+"""
+
+EARTH_RADIUS_NM = 3440.065
+NM_PER_DEGREE_LATITUDE = 60.0
+
+
+def distanceNm(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """
+    great circle distance between two positions in nautical miles (haversine)
+    """
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    dPhi = phi2 - phi1
+    dLambda = math.radians(longitude2 - longitude1)
+    a = math.sin(dPhi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dLambda / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def boundingBox(latitude: float, longitude: float, radiusNm: float) -> tuple[float, float, float, float]:
+    """
+    (south, west, north, east) box which contains all positions within `radiusNm` around a position.
+    west is greater than east if the box crosses the antimeridian
+    """
+    dLat = radiusNm / NM_PER_DEGREE_LATITUDE
+    south = latitude - dLat
+    north = latitude + dLat
+    if south <= -90 or north >= 90:
+        return (max(south, -90.0), -180.0, min(north, 90.0), 180.0)
+    # the box is widest at the latitude closest to the pole
+    cosLat = math.cos(math.radians(max(abs(south), abs(north))))
+    dLon = radiusNm / (NM_PER_DEGREE_LATITUDE * cosLat)
+    if dLon >= 180:
+        return (south, -180.0, north, 180.0)
+    west = longitude - dLon
+    east = longitude + dLon
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return (south, west, north, east)
+
+
+class GridIndex:
+    """
+    Grid of keys by position, updated incrementally.
+    Keys are only moved if their position leaves the current cell
+    """
+
+    def __init__(self, cellSize: float = 0.25):
+        self._cellSize = cellSize
+        self._cellCount = int(math.ceil(360 / cellSize))
+        self._cells = dict()
+        self._cellByKey = dict()
+
+    def __len__(self) -> int:
+        return len(self._cellByKey)
+
+    def __contains__(self, key) -> bool:
+        return key in self._cellByKey
+
+    def update(self, key, latitude: float, longitude: float):
+        """
+        insert or move `key`, a position of None removes it
+        """
+        if latitude is None or longitude is None:
+            self.remove(key)
+            return
+        cell = self._cell(latitude, longitude)
+        current = self._cellByKey.get(key)
+        if current == cell:
+            return
+        if current is not None:
+            self._removeFromCell(key, current)
+        self._cellByKey[key] = cell
+        keys = self._cells.get(cell)
+        if keys is None:
+            self._cells[cell] = keys = set()
+        keys.add(key)
+
+    def remove(self, key):
+        """
+        remove `key` if it is indexed
+        """
+        cell = self._cellByKey.pop(key, None)
+        if cell is not None:
+            self._removeFromCell(key, cell)
+
+    def candidates(self, south: float, west: float, north: float, east: float):
+        """
+        keys in all cells overlapping the box, west is greater than east if the box crosses the antimeridian.
+        Keys near the border of the box can be outside of it and have to be checked by the caller
+        """
+        latRange = range(self._latIndex(south), self._latIndex(north) + 1)
+        if west <= east:
+            lonRanges = (range(self._lonIndex(west), self._lonIndex(east) + 1),)
+        else:
+            lonRanges = (range(self._lonIndex(west), self._cellCount), range(0, self._lonIndex(east) + 1))
+        cellCount = len(latRange) * sum(len(r) for r in lonRanges)
+        if cellCount > len(self._cells):
+            # fewer occupied cells than cells in the box
+            for (lat, lon), keys in self._cells.items():
+                if lat in latRange and any(lon in r for r in lonRanges):
+                    yield from keys
+        else:
+            for lat in latRange:
+                for lonRange in lonRanges:
+                    for lon in lonRange:
+                        keys = self._cells.get((lat, lon))
+                        if keys is not None:
+                            yield from keys
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return (self._latIndex(latitude), self._lonIndex(longitude))
+
+    def _latIndex(self, latitude: float) -> int:
+        return int((latitude + 90) // self._cellSize)
+
+    def _lonIndex(self, longitude: float) -> int:
+        return min(int((longitude + 180) // self._cellSize), self._cellCount - 1)
+
+    def _removeFromCell(self, key, cell):
+        keys = self._cells[cell]
+        keys.discard(key)
+        if len(keys) == 0:
+            del self._cells[cell]
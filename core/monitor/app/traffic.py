@@ -1,13 +1,19 @@
 from enum import IntEnum
 from datetime import datetime
+import time
 import threading
+import heapq
 import logging as log
-from copy import deepcopy
+from types import MappingProxyType
 
 try:
     from monitor.app.sbs import SBSMessage
+    from monitor.app.spatial import GridIndex, NM_PER_DEGREE_LATITUDE, boundingBox, distanceNm
+    from common.scheduler import defaultScheduler
 except ImportError:
     from sbs import SBSMessage
+    from spatial import GridIndex, NM_PER_DEGREE_LATITUDE, boundingBox, distanceNm
+    from scheduler import defaultScheduler
 
 
 class TrafficError(Exception):
@@ -64,8 +70,37 @@ class TrafficCategory(IntEnum):
     # reserved 22 to 39
 
 
-class TrafficEntry(dict):
-    """TrafficEntry"""
+class TrafficEntry:
+    """
+    TrafficEntry, holds the state of a single aircraft. Use :func:`asdict` to serialize it
+    """
+
+    __slots__ = (
+        "_id",
+        "_callsign",
+        "_type",
+        "_name",
+        "_descr",
+        "_wtc",
+        "_category",
+        "_latitude",
+        "_longitude",
+        "_altitude",
+        "_track",
+        "_groundSpeed",
+        "_verticalSpeed",
+        "_squawk",
+        "_alert",
+        "_emergency",
+        "_spi",
+        "_isOnGround",
+        "_lastSeen",
+        "_msgCount",
+        "_source",
+        "_sources",
+        "_positionTime",
+        "_generation",
+    )
 
     def __init__(
         self,
@@ -87,80 +122,85 @@ class TrafficEntry(dict):
         emergency: bool,
         spi: bool,
         isOnGround: bool,
+        source: str = None,
+        positionTime: datetime = None,
     ):
         """
-        Constructor
-        """
-        self["id"] = int(id, 16)
-        self["callsign"] = callsign
-        self["type"] = type
-        self["name"] = name
-        self["descr"] = descr
-        self["wtc"] = wtc
-        self["category"] = category
-        self["latitude"] = latitude
-        self["longitude"] = longitude
-        self["altitude"] = altitude
-        self["track"] = track
-        self["groundSpeed"] = groundSpeed
-        self["verticalSpeed"] = verticalSpeed
-        self["squawk"] = squawk
-        self["alert"] = alert
-        self["emergency"] = emergency
-        self["spi"] = spi
-        self["isOnGround"] = isOnGround
-        self._lastSeen = datetime.now()
-        self["lastSeen"] = self._lastSeen.strftime("%H:%M:%S")
-        self["msgCount"] = 1
+        Constructor, `source` is the name of the receiver of the message, `positionTime` the time the position was generated
+        """
+        self._id = int(id, 16)
+        self._callsign = callsign
+        self._type = type
+        self._name = name
+        self._descr = descr
+        self._wtc = wtc
+        self._category = category
+        self._latitude = latitude
+        self._longitude = longitude
+        self._altitude = altitude
+        self._track = track
+        self._groundSpeed = groundSpeed
+        self._verticalSpeed = verticalSpeed
+        self._squawk = squawk
+        self._alert = alert
+        self._emergency = emergency
+        self._spi = spi
+        self._isOnGround = isOnGround
+        self._lastSeen = time.monotonic()
+        self._msgCount = 1
+        self._source = source
+        self._sources = frozenset() if source is None else frozenset((source,))
+        self._positionTime = positionTime if latitude is not None else None
+        self._generation = 0
 
     @property
     def id(self) -> int:
         """
         Transponder ID
         """
-        return self["id"]
+        return self._id
 
     @property
     def callsign(self) -> str:
         """
         Callsign, can be None
         """
-        return self["callsign"]
+        return self._callsign
 
     @property
     def type(self) -> str:
         """
         ICAO Type designator, can be None
         """
-        return self["type"]
+        return self._type
 
     @property
     def name(self) -> str:
         """
         Aircraft Name
         """
-        return self["name"]
+        return self._name
 
     @property
     def descr(self) -> str:
         """
         ICAO Aircraft Description
         """
-        return self["descr"]
+        return self._descr
 
     @property
     def wtc(self) -> str:
         """
         ICAO Wake Turbulence Category
         """
-        return self["wtc"]
+        return self._wtc
 
     @property
     def category(self) -> TrafficCategory:
         """
         See :class:`TrafficCategory`, can be None
         """
-        return self["category"]
+        return self._category
 
     @property
     def latitude(self) -> float:
@@ -169,7 +209,7 @@ class TrafficEntry(dict):
         Positive value is considered North, negative South
         can be None
         """
-        return self["latitude"]
+        return self._latitude
 
     @property
     def longitude(self) -> float:
@@ -178,118 +218,192 @@ class TrafficEntry(dict):
         Positive value is considered East, negative West
         can be None
         """
-        return self["longitude"]
+        return self._longitude
 
     @property
     def altitude(self) -> int:
         """
         Altitude above mean sea level in ft (referenced to 29.92 inches Hg)
         """
-        return self["altitude"]
+        return self._altitude
 
     @property
     def track(self) -> int:
         """
         Track in degrees from 0 to 360
         """
-        return self["track"]
+        return self._track
 
     @property
     def groundSpeed(self):
         """
         Ground Speed in knots
         """
-        return self["groundSpeed"]
+        return self._groundSpeed
 
     @property
     def verticalSpeed(self):
         """
         Vertical Speed in ft/min
         """
-        return self["verticalSpeed"]
+        return self._verticalSpeed
 
     @property
     def squawk(self):
         """
         squawk code
         """
-        return self["squawk"]
+        return self._squawk
 
     @property
     def alert(self):
         """
         indicates that squawk code has changed
         """
-        return self["alert"]
+        return self._alert
 
     @property
     def emergency(self):
         """
         indicates that emergency squawk code has been set
         """
-        return self["emergency"]
+        return self._emergency
 
     @property
     def spi(self):
         """
         indicates that transponder ident has been activated
         """
-        return self["spi"]
+        return self._spi
 
     @property
     def isOnGround(self):
         """
         indicates that ground squat switch is active
         """
-        return self["isOnGround"]
+        return self._isOnGround
 
     @property
-    def lastSeen(self) -> datetime:
+    def lastSeen(self) -> float:
         """
         seconds since last message about this :class:`TrafficEntry`
         """
-        return (datetime.utcnow() - self._lastSeen).total_seconds()
+        return time.monotonic() - self._lastSeen
 
     @property
     def msgCount(self):
         """
         Number of messages about this :class:`TrafficEntry`
         """
-        return self["msgCount"]
+        return self._msgCount
+
+    @property
+    def source(self) -> str:
+        """
+        Name of the receiver of the last message, None if the receivers are not named
+        """
+        return self._source
+
+    @property
+    def sources(self) -> frozenset:
+        """
+        Names of all receivers which received messages about this :class:`TrafficEntry`
+        """
+        return self._sources
 
-    def update(self, msg: SBSMessage):
+    def update(self, msg: SBSMessage, source: str = None):
         """
-        Update :class:`TrafficEntry` from :class:`SBSMessage`.
+        Update :class:`TrafficEntry` from :class:`SBSMessage` received by `source`.
+        A position generated before the current one, e.g. by a receiver with a longer delay, is ignored.
         Will raise :class:`TrafficError` on transponder ID mismatch
         """
-        if self["id"] != int(msg.hexIdent, 16):
+        if self._id != int(msg.hexIdent, 16):
             raise TrafficError("Cannot update traffic entry with mismatching hexIdent")
-        if msg.latitude is not None:
-            self["latitude"] = msg.latitude
-        if msg.longitude is not None:
-            self["longitude"] = msg.longitude
+        if msg.latitude is not None or msg.longitude is not None:
+            generated = msg.messageGeneratedDateTime
+            if generated is None or self._positionTime is None or generated >= self._positionTime:
+                if msg.latitude is not None:
+                    self._latitude = msg.latitude
+                if msg.longitude is not None:
+                    self._longitude = msg.longitude
+                self._positionTime = generated
         if msg.altitude is not None:
-            self["altitude"] = msg.altitude
+            self._altitude = msg.altitude
         if msg.track is not None:
-            self["track"] = msg.track
+            self._track = msg.track
         if msg.groundSpeed is not None:
-            self["groundSpeed"] = msg.groundSpeed
+            self._groundSpeed = msg.groundSpeed
         if msg.verticalRate is not None:
-            self["verticalSpeed"] = msg.verticalRate
+            self._verticalSpeed = msg.verticalRate
         if msg.squawk is not None:
-            self["squawk"] = msg.squawk
+            self._squawk = msg.squawk
         if msg.alert is not None:
-            self["alert"] = msg.alert
+            self._alert = msg.alert
         if msg.emergency is not None:
-            self["emergency"] = msg.emergency
+            self._emergency = msg.emergency
         if msg.spi is not None:
-            self["spi"] = msg.spi
+            self._spi = msg.spi
         if msg.isOnGround is not None:
-            self["isOnGround"] = msg.isOnGround
-
-        self._lastSeen = datetime.utcnow()
-        self["lastSeen"] = self._lastSeen.strftime("%H:%M:%S")
-        self["msgCount"] += 1
+            self._isOnGround = msg.isOnGround
+
+        if source is not None:
+            self._source = source
+            if source not in self._sources:
+                # shared with copies of this entry, replaced instead of modified
+                self._sources = self._sources | {source}
+        self._lastSeen = time.monotonic()
+        self._msgCount += 1
+
+    def enrich(self, callsign: str, type: str, name: str, descr: str, wtc: str, category: TrafficCategory):
+        """
+        Update the database information of this :class:`TrafficEntry`, a callsign of None keeps the current one
+        """
+        if callsign is not None:
+            self._callsign = callsign
+        self._type = type
+        self._name = name
+        self._descr = descr
+        self._wtc = wtc
+        self._category = category
+
+    def copy(self) -> "TrafficEntry":
+        """
+        Returns a shallow copy of this :class:`TrafficEntry`
+        """
+        entry = TrafficEntry.__new__(TrafficEntry)
+        for slot in TrafficEntry.__slots__:
+            setattr(entry, slot, getattr(self, slot))
+        return entry
+
+    def asdict(self) -> dict:
+        """
+        Returns a json serializable dictionary of this :class:`TrafficEntry`, `lastSeen` is formatted as UTC time "%H:%M:%S"
+        """
+        lastSeenUtc = time.time() - (time.monotonic() - self._lastSeen)
+        return {
+            "id": self._id,
+            "callsign": self._callsign,
+            "type": self._type,
+            "name": self._name,
+            "descr": self._descr,
+            "wtc": self._wtc,
+            "category": self._category,
+            "latitude": self._latitude,
+            "longitude": self._longitude,
+            "altitude": self._altitude,
+            "track": self._track,
+            "groundSpeed": self._groundSpeed,
+            "verticalSpeed": self._verticalSpeed,
+            "squawk": self._squawk,
+            "alert": self._alert,
+            "emergency": self._emergency,
+            "spi": self._spi,
+            "isOnGround": self._isOnGround,
+            "lastSeen": time.strftime("%H:%M:%S", time.gmtime(lastSeenUtc)),
+            "msgCount": self._msgCount,
+            "source": self._source,
+            "sources": sorted(self._sources),
+        }
 
     def __str__(self):
         return (
@@ -308,52 +422,117 @@ class TrafficEntry(dict):
             "emrg={}, "
             "spi={}, "
             "onGround={}, "
-            "lastSeen={:%H:%M:%S}, "
+            "lastSeen={:.0f}s, "
             "msgCount={})>"
         ).format(
-            self["id"],
-            self["callsign"],
-            self["type"],
-            self["category"],
-            self["latitude"],
-            self["longitude"],
-            self["altitude"],
-            self["track"],
-            self["groundSpeed"],
-            self["verticalSpeed"],
-            self["squawk"],
-            self["alert"],
-            self["emergency"],
-            self["spi"],
-            self["isOnGround"],
-            self["lastSeen"],
-            self["msgCount"],
+            self._id,
+            self._callsign,
+            self._type,
+            self._category,
+            self._latitude,
+            self._longitude,
+            self._altitude,
+            self._track,
+            self._groundSpeed,
+            self._verticalSpeed,
+            self._squawk,
+            self._alert,
+            self._emergency,
+            self._spi,
+            self._isOnGround,
+            self.lastSeen,
+            self._msgCount,
         )
 
 
+class _TrafficShard:
+    """
+    Part of the traffic table of a :class:`TrafficMonitor`, guarded by its own lock
+    """
+
+    __slots__ = ("lock", "traffic", "expiry", "unenriched", "spatial", "generation", "snapshotGeneration", "snapshot")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.traffic = dict()
+        # min-heap of (deadline, hexIdent), one item per entry. deadlines can be outdated, they are checked when due
+        self.expiry = list()
+        # hexIdents of entries created before the databases were set
+        self.unenriched = set()
+        # hexIdents of entries with a position
+        self.spatial = GridIndex()
+        # entries are copy-on-write, entries with a generation <= snapshot generation are shared with a snapshot.
+        # entries returned by queries are shared by resetting their generation to 0
+        self.generation = 0
+        self.snapshotGeneration = 0
+        self.snapshot = dict()
+
+    def takeSnapshot(self) -> dict:
+        with self.lock:
+            if self.snapshotGeneration != self.generation:
+                self.snapshot = dict(self.traffic)
+                self.snapshotGeneration = self.generation
+            return self.snapshot
+
+
 # TODO make this an observable subject
 class TrafficMonitor:
     """
-    Monitors Flight Traffic. Can be updated with :class:`SBSMessage`
+    Monitors Flight Traffic. Can be updated with :class:`SBSMessage`.
+    The traffic table is sharded by hexIdent, updates of aircrafts in different shards do not contend on the same lock
     """
 
-    def __init__(self, aircraftsDb: dict = None, typesDb: dict = None, dbversion: int = None, typesExtensionDb: dict = None):
-        self._traffic = dict()
+    def __init__(
+        self,
+        aircraftsDb: dict = None,
+        typesDb: dict = None,
+        dbversion: int = None,
+        typesExtensionDb: dict = None,
+        timeout: float = 300,
+        cleanupInterval: float = 10,
+        shardCount: int = 16,
+        scheduler=None,
+    ):
+        """
+        Constructor, the databases can be dictionaries or the tables of an `AircraftDb`.
+        Entries unseen for `timeout` seconds are removed by the cleanup, which runs every `cleanupInterval` seconds if enabled.
+        The cleanup is a job of `scheduler` (e.g. `MonitorRuntime`), default is the shared `Scheduler` of the process
+        """
+        self._shards = tuple(_TrafficShard() for _ in range(shardCount))
+        self._timeout = timeout
+        self._cleanupInterval = cleanupInterval
         self._aircraftsDb = aircraftsDb
         self._typesDb = typesDb
         self._dbversion = dbversion
         self._typesExtensionDb = typesExtensionDb
-        self._lock = threading.Lock()
-        self._timer = None
+        self._scheduler = scheduler
+        self._cleanupJob = None
+        self._timerLock = threading.Lock()
         self._observers = list()
+        # shard generations the merged snapshot was built from and the snapshot itself, replaced as one object
+        self._snapshot = (tuple(shard.generation for shard in self._shards), MappingProxyType(dict()))
+        self._snapshotLock = threading.Lock()
 
     @property
-    def traffic(self) -> dict():
-        """
-        Dictionary of :class:`TrafficEntry`
-        """
-        with self._lock:
-            return deepcopy(self._traffic)
+    def traffic(self) -> MappingProxyType:
+        """
+        Read-only snapshot of :class:`TrafficEntry` by hexIdent.
+        The snapshot is never modified, entries must not be modified by the caller.
+        Does not take any lock if no aircraft changed since the last snapshot
+        """
+        generations, snapshot = self._snapshot
+        if generations == tuple(shard.generation for shard in self._shards):
+            return snapshot
+        with self._snapshotLock:
+            generations = tuple(shard.generation for shard in self._shards)
+            if generations == self._snapshot[0]:
+                return self._snapshot[1]
+            merged = dict()
+            for shard in self._shards:
+                merged.update(shard.takeSnapshot())
+            snapshot = MappingProxyType(merged)
+            self._snapshot = (generations, snapshot)
+            return snapshot
 
     @property
     def dbversion(self) -> int:
@@ -362,111 +541,314 @@ class TrafficMonitor:
         """
         return self._dbversion
 
-    def startAutoCleanup(self, interval: int = 10):
+    def setDatabase(self, aircraftsDb, typesDb, dbversion: int, typesExtensionDb):
+        """
+        Set the databases used to enrich traffic information, e.g. once they are loaded in background.
+        Entries created before are enriched and observers are notified about them
+        """
+        # aircraftsDb is set last, updates which see it can rely on the other databases
+        self._typesDb = typesDb
+        self._typesExtensionDb = typesExtensionDb
+        self._dbversion = dbversion
+        self._aircraftsDb = aircraftsDb
+        count = 0
+        for shard in self._shards:
+            with shard.lock:
+                for hexIdent in shard.unenriched:
+                    entry = self._writableEntry(shard, hexIdent)
+                    entry.enrich(*self._lookUp(hexIdent, aircraftsDb))
+                    self._notify(entry)
+                count += len(shard.unenriched)
+                shard.unenriched.clear()
+        log.info("enriched {} traffic entries with database version {}".format(count, dbversion))
+
+    def startAutoCleanup(self):
         """
         Start cleanup timer, removes unseen traffic
         """
-        if self._timer is None:
-            self._timer = threading.Timer(interval, self._cleanup, [True, interval])
-            self._timer.start()
-            log.info("started auto cleanup timer")
+        with self._timerLock:
+            if self._cleanupJob is None:
+                scheduler = self._scheduler if self._scheduler is not None else defaultScheduler()
+                self._cleanupJob = scheduler.callEvery(self._cleanupInterval, self.cleanup, "TrafficCleanup")
+                log.info("started auto cleanup timer")
 
     def stopAutoCleanup(self):
         """
         Stop cleanup timer, removes unseen traffic
         """
-        if self._timer is not None:
-            self._timer.cancel()
-            self._timer = None
-            log.info("stopped auto cleanup timer")
+        with self._timerLock:
+            if self._cleanupJob is not None:
+                self._cleanupJob.cancel()
+                self._cleanupJob = None
+                log.info("stopped auto cleanup timer")
 
     def cleanup(self):
         """
         remove unseen traffic
         """
-        self._cleanup(False)
+        for shard in self._shards:
+            with shard.lock:
+                self._cleanupShard(shard)
 
     def register(self, obj):
         """
-        Register an observer for `TrafficEntry` updates
+        Register an observer for `TrafficEntry` updates.
+        Observers which implement `notifyExpired` are also notified about removed entries.
+        Observers are called from the updating threads, concurrently for aircrafts in different shards
         """
         self._observers.append(obj)
 
-    def update(self, msg: SBSMessage):
-        """
-        Update :class:`TrafficMonitor` from :class:`SBSMessage`
-        """
-        with self._lock:
-            if msg.hexIdent in self._traffic:
-                entry = self._traffic[msg.hexIdent]
-                entry.update(msg)
-            else:
-                callsign, type = self._aircraftLookUp(msg)
-                if callsign is None:
-                    callsign = msg.callsign
-                name, descr, wtc = self._typeLookUp(type)
-                category = self._typesExtensionLookup(type)
-                entry = TrafficEntry(
-                    msg.hexIdent,
-                    callsign,
-                    type,
-                    name,
-                    descr,
-                    wtc,
-                    category,
-                    msg.latitude,
-                    msg.longitude,
-                    msg.altitude,
-                    msg.track,
-                    msg.groundSpeed,
-                    msg.verticalRate,
-                    msg.squawk,
-                    msg.alert,
-                    msg.emergency,
-                    msg.spi,
-                    msg.isOnGround,
-                )
-                self._traffic[msg.hexIdent] = entry
-                log.info("add new {:X}, {}, {}, {} (count {})".format(entry.id, entry.callsign, entry.type, entry.category.name, len(self._traffic)))
+    def update(self, msg: SBSMessage, source: str = None):
+        """
+        Update :class:`TrafficMonitor` from :class:`SBSMessage`, `source` is the name of the receiver
+        """
+        shard = self._shards[hash(msg.hexIdent) % len(self._shards)]
+        with shard.lock:
+            entry = self._updateEntry(shard, msg, source)
             self._notify(entry)
 
+    def updateBatch(self, messages: list, source: str = None):
+        """
+        Update :class:`TrafficMonitor` from a list of :class:`SBSMessage` received by `source`.
+        Takes every affected shard lock only once and notifies observers once per changed :class:`TrafficEntry`
+        """
+        shardCount = len(self._shards)
+        batches = dict()
+        for msg in messages:
+            batch = batches.get(hash(msg.hexIdent) % shardCount)
+            if batch is None:
+                batches[hash(msg.hexIdent) % shardCount] = batch = list()
+            batch.append(msg)
+        for index, batch in batches.items():
+            shard = self._shards[index]
+            with shard.lock:
+                changed = dict()
+                for msg in batch:
+                    changed[msg.hexIdent] = self._updateEntry(shard, msg, source)
+                for entry in changed.values():
+                    self._notify(entry)
+
+    def trafficInRadius(self, latitude: float, longitude: float, radiusNm: float, altitude: int = None, altitudeBand: int = None) -> list:
+        """
+        :class:`TrafficEntry` within `radiusNm` nautical miles around a position, nearest first.
+        If `altitude` and `altitudeBand` are given only entries within `altitude` ± `altitudeBand` feet are returned
+        """
+        found = self._query(boundingBox(latitude, longitude, radiusNm), latitude, longitude, radiusNm, altitude, altitudeBand)
+        found.sort(key=lambda item: item[0])
+        return [entry for _, entry in found]
+
+    def trafficInBoundingBox(self, south: float, west: float, north: float, east: float, altitude: int = None, altitudeBand: int = None) -> list:
+        """
+        :class:`TrafficEntry` within a box of latitudes and longitudes, west is greater than east if the box crosses the antimeridian.
+        If `altitude` and `altitudeBand` are given only entries within `altitude` ± `altitudeBand` feet are returned
+        """
+        return [entry for _, entry in self._query((south, west, north, east), None, None, None, altitude, altitudeBand)]
+
+    def nearestTraffic(self, latitude: float, longitude: float, count: int, altitude: int = None, altitudeBand: int = None) -> list:
+        """
+        the `count` :class:`TrafficEntry` nearest to a position, nearest first.
+        If `altitude` and `altitudeBand` are given only entries within `altitude` ± `altitudeBand` feet are considered
+        """
+        radiusNm = 10.0
+        while True:
+            found = self._query(boundingBox(latitude, longitude, radiusNm), latitude, longitude, radiusNm, altitude, altitudeBand)
+            # nothing outside the radius can be nearer than what is inside
+            if len(found) >= count or radiusNm >= 180 * NM_PER_DEGREE_LATITUDE:
+                break
+            radiusNm *= 4
+        found.sort(key=lambda item: item[0])
+        return [entry for _, entry in found[:count]]
+
+    def _query(self, box, latitude, longitude, radiusNm, altitude, altitudeBand) -> list:
+        south, west, north, east = box
+        found = list()
+        for shard in self._shards:
+            with shard.lock:
+                for k in shard.spatial.candidates(south, west, north, east):
+                    entry = shard.traffic[k]
+                    if altitudeBand is not None and altitude is not None:
+                        if entry._altitude is None or abs(entry._altitude - altitude) > altitudeBand:
+                            continue
+                    if radiusNm is None:
+                        if not _inBox(entry._latitude, entry._longitude, south, west, north, east):
+                            continue
+                        distance = None
+                    else:
+                        distance = distanceNm(latitude, longitude, entry._latitude, entry._longitude)
+                        if distance > radiusNm:
+                            continue
+                    entry._generation = 0
+                    found.append((distance, entry))
+        return found
+
+    def _writableEntry(self, shard: _TrafficShard, hexIdent: str) -> TrafficEntry:
+        shard.generation += 1
+        entry = shard.traffic[hexIdent]
+        if entry._generation <= shard.snapshotGeneration:
+            entry = entry.copy()
+            shard.traffic[hexIdent] = entry
+        entry._generation = shard.generation
+        return entry
+
+    def _updateEntry(self, shard: _TrafficShard, msg: SBSMessage, source: str = None) -> TrafficEntry:
+        entry = shard.traffic.get(msg.hexIdent)
+        if entry is not None:
+            shard.generation += 1
+            if entry._generation <= shard.snapshotGeneration:
+                entry = entry.copy()
+                shard.traffic[msg.hexIdent] = entry
+            entry._generation = shard.generation
+            entry.update(msg, source)
+            if msg.latitude is not None:
+                shard.spatial.update(msg.hexIdent, entry._latitude, entry._longitude)
+            return entry
+        # read once, `setDatabase` can set it concurrently and an entry looked up without it has to be enriched later
+        aircraftsDb = self._aircraftsDb
+        callsign, type, name, descr, wtc, category = self._lookUp(msg.hexIdent, aircraftsDb)
+        if callsign is None:
+            callsign = msg.callsign
+        if aircraftsDb is None:
+            shard.unenriched.add(msg.hexIdent)
+        entry = TrafficEntry(
+            msg.hexIdent,
+            callsign,
+            type,
+            name,
+            descr,
+            wtc,
+            category,
+            msg.latitude,
+            msg.longitude,
+            msg.altitude,
+            msg.track,
+            msg.groundSpeed,
+            msg.verticalRate,
+            msg.squawk,
+            msg.alert,
+            msg.emergency,
+            msg.spi,
+            msg.isOnGround,
+            source,
+            msg.messageGeneratedDateTime,
+        )
+        shard.generation += 1
+        entry._generation = shard.generation
+        shard.traffic[msg.hexIdent] = entry
+        shard.spatial.update(msg.hexIdent, entry._latitude, entry._longitude)
+        heapq.heappush(shard.expiry, (entry._lastSeen + self._timeout, msg.hexIdent))
+        log.info(
+            "add new {:X}, {}, {}, {} (count {})".format(
+                entry.id, entry.callsign, entry.type, entry.category.name, sum(len(s.traffic) for s in self._shards)
+            )
+        )
+        return entry
+
     def _notify(self, trafficEntry):
         for obj in self._observers:
             obj.notify(trafficEntry)
 
-    def _cleanup(self, reschedule=True, interval: int = 10):
-        with self._lock:
-            if reschedule:
-                self._timer = threading.Timer(interval, self._cleanup, [True, interval])
-                self._timer.start()
-            maxLastSeenSeconds = 300
-            for k in list(self._traffic.keys()):
-                entry = self._traffic[k]
-                if entry.lastSeen > maxLastSeenSeconds:
-                    log.info(
-                        "remove {:X}, {}, {}, {} (unseen for >{} seconds)".format(
-                            entry.id, entry.callsign, entry.type, entry.category.name, maxLastSeenSeconds
-                        )
-                    )
-                    del self._traffic[k]
-
-    def _aircraftLookUp(self, msg: SBSMessage) -> tuple[str, str]:
-        if self._aircraftsDb is not None:
-            callsign, type, *_ = self._aircraftsDb[msg.hexIdent] if msg.hexIdent in self._aircraftsDb.keys() else [None, None]
+    def _notifyExpired(self, trafficEntry):
+        for obj in self._observers:
+            notifyExpired = getattr(obj, "notifyExpired", None)
+            if notifyExpired is not None:
+                notifyExpired(trafficEntry)
+
+    def _cleanupShard(self, shard: _TrafficShard):
+        now = time.monotonic()
+        while len(shard.expiry) > 0 and shard.expiry[0][0] <= now:
+            _, k = heapq.heappop(shard.expiry)
+            entry = shard.traffic[k]
+            deadline = entry._lastSeen + self._timeout
+            if deadline > now:
+                heapq.heappush(shard.expiry, (deadline, k))
+                continue
+            log.info(
+                "remove {:X}, {}, {}, {} (unseen for >{} seconds)".format(
+                    entry.id, entry.callsign, entry.type, entry.category.name, self._timeout
+                )
+            )
+            del shard.traffic[k]
+            shard.unenriched.discard(k)
+            shard.spatial.remove(k)
+            shard.generation += 1
+            self._notifyExpired(entry)
+
+    def _lookUp(self, hexIdent: str, aircraftsDb) -> tuple[str, str, str, str, str, TrafficCategory]:
+        callsign, type = self._aircraftLookUp(hexIdent, aircraftsDb)
+        name, descr, wtc = self._typeLookUp(type)
+        category = self._typesExtensionLookup(type)
+        return (callsign, type, name, descr, wtc, category)
+
+    def _aircraftLookUp(self, hexIdent: str, aircraftsDb) -> tuple[str, str]:
+        if aircraftsDb is not None:
+            callsign, type, *_ = aircraftsDb.get(hexIdent, (None, None))
             return (callsign, type)
         else:
             return (None, None)
 
     def _typeLookUp(self, type: str) -> tuple[str, str, str]:
         if self._typesDb is not None:
-            name, descr, wtc, *_ = self._typesDb[type] if type in self._typesDb.keys() else [None, None, None]
+            name, descr, wtc, *_ = self._typesDb.get(type, (None, None, None))
             return (name, descr, wtc)
         else:
             return (None, None, None)
 
     def _typesExtensionLookup(self, type: str) -> TrafficCategory:
         if self._typesExtensionDb is not None:
-            cat, *_ = self._typesExtensionDb[type] if type in self._typesExtensionDb.keys() else [0]
+            cat, *_ = self._typesExtensionDb.get(type, (0,))
             return TrafficCategory(cat)
         else:
             return TrafficCategory.no_info
+
+
+def _inBox(latitude: float, longitude: float, south: float, west: float, north: float, east: float) -> bool:
+    if latitude < south or latitude > north:
+        return False
+    if west <= east:
+        return west <= longitude <= east
+    return longitude >= west or longitude <= east
+
+
+class TrafficBatcher:
+    """
+    Collects :class:`SBSMessage` and feeds them to :func:`TrafficMonitor.updateBatch`.
+    A batch is flushed at the latest `maxLatency` seconds after its first message or as soon as it holds `maxSize` messages.
+    """
+
+    def __init__(self, trafficMonitor: TrafficMonitor, maxLatency: float = 0.05, maxSize: int = 200):
+        self._trafficMonitor = trafficMonitor
+        self._maxLatency = maxLatency
+        self._maxSize = maxSize
+        self._messages = list()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="TrafficBatcher", daemon=True)
+        self._thread.start()
+
+    def put(self, msg: SBSMessage):
+        """
+        add a message to the current batch
+        """
+        with self._cond:
+            self._messages.append(msg)
+            if len(self._messages) == 1 or len(self._messages) >= self._maxSize:
+                self._cond.notify()
+
+    def flush(self):
+        """
+        immediately feed the current batch to the `TrafficMonitor`
+        """
+        with self._cond:
+            batch = self._messages
+            self._messages = list()
+        if len(batch) > 0:
+            self._trafficMonitor.updateBatch(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._messages) > 0)
+                self._cond.wait_for(lambda: len(self._messages) >= self._maxSize, self._maxLatency)
+            try:
+                self.flush()
+            except Exception as ex:
+                log.error("error updating traffic batch, {}".format(str(ex)))
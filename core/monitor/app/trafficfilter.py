@@ -0,0 +1,195 @@
+import threading
+import logging as log
+
+try:
+    from monitor.app.traffic import TrafficEntry
+    from monitor.app.spatial import distanceNm
+except ImportError:
+    from traffic import TrafficEntry
+    from spatial import distanceNm
+
+"""
+Filters deciding which traffic is forwarded to the GDL90 interface.
+
+Filters are evaluated in a fixed order, cheapest first, and the first filter which rejects an entry stops the evaluation.
+Range and altitude filters need the ownship position, as long as it is unknown they accept all traffic.
+"""
+
+FEET_PER_METER = 3.28084
+
+
+class Ownship:
+    """
+    Position of the own aircraft, altitude in ft. Values can be None
+    """
+
+    __slots__ = ("latitude", "longitude", "altitude")
+
+    def __init__(self, latitude: float = None, longitude: float = None, altitude: float = None):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.altitude = altitude
+
+    def fromPosInfo(posInfo) -> "Ownship":
+        """
+        Create :class:`Ownship` from a `PosInfo`, pressure altitude is preferred over GNSS altitude
+        because traffic altitudes are pressure altitudes as well
+        """
+        if posInfo.pressureAltitude is not None:
+            altitude = posInfo.pressureAltitude * FEET_PER_METER
+        elif posInfo.altitudeMeter is not None:
+            altitude = posInfo.altitudeMeter * FEET_PER_METER
+        else:
+            altitude = None
+        return Ownship(posInfo.latitude, posInfo.longitude, altitude)
+
+
+class TrafficFilter:
+    """
+    Base class of traffic filters
+    """
+
+    name = None
+
+    def accept(self, entry: TrafficEntry, ownship: Ownship) -> bool:
+        """
+        True if `entry` shall be forwarded
+        """
+        raise NotImplementedError()
+
+    def asdict(self) -> dict:
+        """
+        Configuration of this filter
+        """
+        return dict()
+
+
+class CallsignFilter(TrafficFilter):
+    """
+    Drops traffic with a callsign, e.g. the own aircraft
+    """
+
+    name = "callsign"
+
+    def __init__(self, callsign: str):
+        self._callsign = callsign
+
+    def accept(self, entry: TrafficEntry, ownship: Ownship) -> bool:
+        return entry.callsign != self._callsign
+
+    def asdict(self) -> dict:
+        return {"callsign": self._callsign}
+
+
+class NoPositionFilter(TrafficFilter):
+    """
+    Drops traffic without position
+    """
+
+    name = "noPosition"
+
+    def accept(self, entry: TrafficEntry, ownship: Ownship) -> bool:
+        return entry.latitude is not None and entry.longitude is not None
+
+
+class AltitudeFilter(TrafficFilter):
+    """
+    Drops traffic more than `band` ft above or below ownship. Traffic without altitude is kept
+    """
+
+    name = "altitude"
+
+    def __init__(self, band: float):
+        self._band = band
+
+    def accept(self, entry: TrafficEntry, ownship: Ownship) -> bool:
+        if ownship.altitude is None or entry.altitude is None:
+            return True
+        return abs(entry.altitude - ownship.altitude) <= self._band
+
+    def asdict(self) -> dict:
+        return {"band": self._band}
+
+
+class RangeFilter(TrafficFilter):
+    """
+    Drops traffic further than `radius` nm from ownship. Traffic without position is kept
+    """
+
+    name = "range"
+
+    def __init__(self, radius: float):
+        self._radius = radius
+
+    def accept(self, entry: TrafficEntry, ownship: Ownship) -> bool:
+        if ownship.latitude is None or ownship.longitude is None or entry.latitude is None or entry.longitude is None:
+            return True
+        return distanceNm(ownship.latitude, ownship.longitude, entry.latitude, entry.longitude) <= self._radius
+
+    def asdict(self) -> dict:
+        return {"radius": self._radius}
+
+
+class TrafficFilterPipeline:
+    """
+    Ordered set of :class:`TrafficFilter`, at most one filter per name.
+    Filters and ownship are replaced atomically, :func:`accept` does not take a lock
+    """
+
+    ORDER = (CallsignFilter.name, NoPositionFilter.name, AltitudeFilter.name, RangeFilter.name)
+
+    def __init__(self):
+        self._filtersByName = dict()
+        self._filters = tuple()
+        self._ownship = Ownship()
+        self._lock = threading.Lock()
+
+    @property
+    def ownship(self) -> Ownship:
+        """
+        ownship position the filters are evaluated against
+        """
+        return self._ownship
+
+    def updateOwnship(self, ownship: Ownship):
+        """
+        set the ownship position
+        """
+        self._ownship = ownship
+
+    def setFilter(self, trafficFilter: TrafficFilter):
+        """
+        add a filter or replace the filter with the same name
+        """
+        with self._lock:
+            self._filtersByName[trafficFilter.name] = trafficFilter
+            self._rebuild()
+        log.info("set traffic filter {}, {}".format(trafficFilter.name, trafficFilter.asdict()))
+
+    def removeFilter(self, name: str):
+        """
+        remove the filter with `name` if it is set
+        """
+        with self._lock:
+            if self._filtersByName.pop(name, None) is not None:
+                self._rebuild()
+                log.info("removed traffic filter {}".format(name))
+
+    def asdict(self) -> dict:
+        """
+        configuration of all filters by name
+        """
+        return {f.name: f.asdict() for f in self._filters}
+
+    def accept(self, entry: TrafficEntry) -> bool:
+        """
+        True if all filters accept `entry`
+        """
+        ownship = self._ownship
+        for f in self._filters:
+            if not f.accept(entry, ownship):
+                return False
+        return True
+
+    def _rebuild(self):
+        self._filters = tuple(self._filtersByName[name] for name in TrafficFilterPipeline.ORDER if name in self._filtersByName)
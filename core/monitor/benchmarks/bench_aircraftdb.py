@@ -0,0 +1,89 @@
+"""
+Startup time and resident memory of the json aircraft database compared to the compiled :class:`AircraftDb`.
+Uses a synthetic database with 500k aircrafts, each variant runs in its own process.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_aircraftdb`
+"""
+import json
+import os
+import random
+import tempfile
+import time
+import multiprocessing
+import monitor.app.aircraftdb as aircraftdb
+
+
+def _rssKiB() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _lookups(aircrafts, types, keys):
+    start = time.perf_counter()
+    for key in keys:
+        _, type, *_ = aircrafts.get(key, (None, None))
+        types.get(type, None)
+    return (time.perf_counter() - start) / len(keys)
+
+
+def _loadJson(path, keys, results):
+    before = _rssKiB()
+    start = time.perf_counter()
+    with open(os.path.join(path, "aircrafts.json")) as f:
+        aircrafts = json.load(f)
+    with open(os.path.join(path, "types.json")) as f:
+        types = json.load(f)
+    startup = time.perf_counter() - start
+    rss = _rssKiB() - before
+    lookup = _lookups(aircrafts, types, keys)
+    results.put(("json", startup, rss, _rssKiB() - before, lookup))
+
+
+def _loadIndex(path, keys, results):
+    before = _rssKiB()
+    start = time.perf_counter()
+    db = aircraftdb.AircraftDb(os.path.join(path, "aircraftdb.bin"))
+    startup = time.perf_counter() - start
+    rss = _rssKiB() - before
+    lookup = _lookups(db.aircrafts, db.types, keys)
+    results.put(("index", startup, rss, _rssKiB() - before, lookup))
+
+
+def _createDb(path, count):
+    rnd = random.Random(1)
+    types = {"T{:03d}".format(i): ["MANUFACTURER MODEL {}".format(i), "L2J", "M"] for i in range(3000)}
+    aircrafts = {
+        "{:06X}".format(rnd.randrange(0xFFFFFF)): ["HB-{:03d}".format(i % 1000), "T{:03d}".format(i % 3000), "00"] for i in range(count)
+    }
+    with open(os.path.join(path, "aircrafts.json"), "w") as f:
+        json.dump(aircrafts, f)
+    with open(os.path.join(path, "types.json"), "w") as f:
+        json.dump(types, f)
+    aircraftdb.compileDb(aircrafts, types, 1, {}, os.path.join(path, "aircraftdb.bin"))
+    keys = rnd.sample(list(aircrafts.keys()), 2000) + ["{:06X}".format(rnd.randrange(0xFFFFFF)) for _ in range(2000)]
+    return keys
+
+
+def main():
+    count = 500000
+    with tempfile.TemporaryDirectory() as path:
+        keys = _createDb(path, count)
+        print("{} aircrafts, json {:.1f} MiB, index {:.1f} MiB".format(
+            count, os.path.getsize(os.path.join(path, "aircrafts.json")) / 2**20, os.path.getsize(os.path.join(path, "aircraftdb.bin")) / 2**20
+        ))
+        results = multiprocessing.Queue()
+        for target in (_loadJson, _loadIndex):
+            process = multiprocessing.Process(target=target, args=(path, keys, results))
+            process.start()
+            name, startup, rss, rssAfterLookups, lookup = results.get()
+            process.join()
+            print("{:<6} startup {:>8.3f} s, resident memory {:>6.1f} MiB ({:>6.1f} MiB after {} lookups), lookup {:.2f} us".format(
+                name, startup, rss / 1024, rssAfterLookups / 1024, len(keys), lookup * 1e6
+            ))
+
+
+if __name__ == "__main__":
+    main()
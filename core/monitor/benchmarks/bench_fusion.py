@@ -0,0 +1,62 @@
+"""
+Cost per message of merging several receivers with :class:`SBSFusion`, compared to feeding the `TrafficMonitor` directly.
+Every receiver hears the same 300 aircrafts (all messages are duplicates of the first receiver), in batches of 100 messages,
+replayed on a simulated clock at 2000 messages/s so the dedup window holds 2000 messages.
+The cost per message should not grow with the number of receivers or messages.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_fusion`
+"""
+import random
+import time
+import monitor.app.fusion as fusion
+import monitor.app.sbs as sbs
+import monitor.app.traffic as traffic
+
+AIRCRAFTS = 300
+BATCH = 100
+RATE = 2000
+
+
+def _messages(count):
+    rnd = random.Random(1)
+    lines = [
+        "MSG,3,1,1,{:06X},1,2023/10/26,07:20:11.481,2023/10/26,07:20:11.491,,{},,,46.91222,7.49917,,,0,,0,0",
+        "MSG,4,1,1,{:06X},1,2023/10/26,07:20:11.512,2023/10/26,07:20:11.520,,,452,273,,,-640,,,,,0",
+        "MSG,5,1,1,{:06X},1,2023/10/26,07:20:11.530,2023/10/26,07:20:11.541,,{},,,,,,,0,,0,0",
+    ]
+    return [
+        sbs.SBSReader.parseTraffic(rnd.choice(lines).format(0x4B0000 + rnd.randrange(AIRCRAFTS), rnd.randrange(0, 40000, 25)), parseDates=True)
+        for _ in range(count)
+    ]
+
+
+def _direct(messages, receivers):
+    monitor = traffic.TrafficMonitor()
+    start = time.perf_counter()
+    for i in range(0, len(messages), BATCH):
+        for _ in range(receivers):
+            monitor.updateBatch(messages[i:i + BATCH])
+    return (time.perf_counter() - start) / (len(messages) * receivers)
+
+
+def _fused(messages, receivers):
+    monitor = traffic.TrafficMonitor()
+    merger = fusion.SBSFusion(monitor)
+    inputs = [merger.addSource("receiver{}".format(n)) for n in range(receivers)]
+    start = time.perf_counter()
+    for i in range(0, len(messages), BATCH):
+        for fusionInput in inputs:
+            merger.updateBatch(fusionInput, messages[i:i + BATCH], now=i / RATE)
+    return (time.perf_counter() - start) / (len(messages) * receivers)
+
+
+def main():
+    print("{:<10} {:>10} {:>14} {:>14}".format("receivers", "messages", "direct us", "fused us"))
+    for receivers in (1, 2, 4):
+        for count in (20000, 100000):
+            messages = _messages(count)
+            print("{:<10} {:>10,} {:>14.2f} {:>14.2f}".format(receivers, count, _direct(messages, receivers) * 1e6, _fused(messages, receivers) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Throughput of GDL90 traffic report encoding.
+`legacy` is the previous implementation (byte wise join, escape loop, crc table rebuilt on every call),
+compared to :func:`encodeTrafficMessage` and :class:`GDL90TrafficEncoder`.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_gdl90_encode`
+"""
+import random
+import timeit
+import monitor.app.gdl90 as gdl
+
+
+def _legacyCrc16(data: bytes):
+    table = list(gdl._CRC16_TABLE)
+    crc = 0
+    for byte in data:
+        crc = (crc << 8) ^ table[(crc >> 8)] ^ byte
+        crc &= 0xFFFF
+    return (crc & 0xFF) << 8 | (crc & 0xFF00) >> 8
+
+
+def _legacyEscape(msg: bytes) -> bytes:
+    escaped = bytes()
+    for b in msg:
+        if b == 0x7D or b == 0x7E:
+            escaped += b"\x7d"
+            escaped += (b ^ 0x20).to_bytes(1, "big")
+        else:
+            escaped += b.to_bytes(1, "big")
+    return escaped
+
+
+def _legacyEncodeTrafficMessage(msg: gdl.GDL90TrafficMessage) -> bytes:
+    enc_alt = gdl._encode_altitude(msg.altitude)
+    enc_misc = msg.trackIndicator | msg.reportIndicator | msg.airborneIndicator
+    enc_hVel = gdl._encode_hVelocity(msg.hVelocity)
+    enc_vVel = gdl._encode_vVelocity(msg.vVelocity)
+    enc_trk = gdl._encode_track(msg.trackHeading)
+    enc_callsign = gdl._encode_callsign(msg.callsign)
+    raw = b"".join(
+        [
+            gdl.GDL90MessageId.TrafficReport.to_bytes(1, "big"),
+            ((msg.status << 4) | msg.addrType).to_bytes(1, "big"),
+            msg.address.to_bytes(3, "big"),
+            gdl._encode_latlon(msg.latitude).to_bytes(3, "big"),
+            gdl._encode_latlon(msg.longitude).to_bytes(3, "big"),
+            ((enc_alt & 0xFF0) >> 4).to_bytes(1, "big"),
+            (((enc_alt & 0x00F) << 4) | enc_misc).to_bytes(1, "big"),
+            (((msg.navIntegrityCat & 0xF) << 4) | (msg.navAccuracyCat & 0xF)).to_bytes(1, "big"),
+            ((enc_hVel & 0xFF0) >> 4).to_bytes(1, "big"),
+            (((enc_hVel & 0x00F) << 4) | ((enc_vVel & 0xF00) >> 8)).to_bytes(1, "big"),
+            (enc_vVel & 0x0FF).to_bytes(1, "big"),
+            enc_trk.to_bytes(1, "big"),
+            msg.emitterCat.to_bytes(1, "big"),
+            enc_callsign.encode("utf-8"),
+            (msg.emergencyCode << 4).to_bytes(1, "big"),
+        ]
+    )
+    raw = b"".join([raw, _legacyCrc16(raw).to_bytes(2, "big")])
+    return b"".join([b"\x7e", _legacyEscape(raw), b"\x7e"])
+
+
+def _messages(count, rnd):
+    return [
+        gdl.GDL90TrafficMessage(
+            address=0x400000 + i,
+            latitude=46.0 + rnd.uniform(-2, 2),
+            longitude=7.0 + rnd.uniform(-2, 2),
+            altitude=rnd.randrange(0, 40000, 25),
+            hVelocity=rnd.randrange(0, 500),
+            vVelocity=rnd.randrange(-3000, 3000, 64),
+            trackHeading=rnd.randrange(0, 360),
+            navIntegrityCat=10,
+            navAccuracyCat=9,
+            callsign="SWR{}".format(i),
+            emitterCat=gdl.GDL90EmitterCategory.large,
+        )
+        for i in range(count)
+    ]
+
+
+def _rate(func, count, repeat=5, number=20):
+    return count * number / min(timeit.repeat(func, repeat=repeat, number=number))
+
+
+def main():
+    rnd = random.Random(1)
+    msgs = _messages(300, rnd)
+    for msg in msgs:
+        assert _legacyEncodeTrafficMessage(msg) == gdl.encodeTrafficMessage(msg)
+    other = _messages(300, rnd)
+    # the first half of the targets is the same in both lists
+    halfChanged = msgs[:150] + other[150:]
+    encoder = gdl.GDL90TrafficEncoder()
+
+    results = [
+        ("legacy", _rate(lambda: [_legacyEncodeTrafficMessage(msg) for msg in msgs], len(msgs))),
+        ("encodeTrafficMessage", _rate(lambda: [gdl.encodeTrafficMessage(msg) for msg in msgs], len(msgs))),
+        ("encoder, all changed", _rate(lambda: ([encoder.encode(msg) for msg in msgs], [encoder.encode(msg) for msg in other]), 2 * len(msgs))),
+        ("encoder, half changed", _rate(lambda: ([encoder.encode(msg) for msg in msgs], [encoder.encode(msg) for msg in halfChanged]), 2 * len(msgs))),
+        ("encodeBatch, half changed", _rate(lambda: (bytes(encoder.encodeBatch(msgs)), bytes(encoder.encodeBatch(halfChanged))), 2 * len(msgs))),
+    ]
+    base = results[0][1]
+    for name, rate in results:
+        print("{:<28} {:>12,.0f} reports/s  x{:.2f}".format(name, rate, rate / base))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Health check of :class:`GDL90Port`.
+CPU time of sending datagrams with a thread reading back every datagram (the previous health check)
+compared to checking the interface with ioctl, and the latency from a link failure until the socket is ready again.
+Uses the loopback interface, a failure is simulated by changing the expected address or closing the socket.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_gdl90_link`
+"""
+import logging
+import socket
+import threading
+import time
+import monitor.app.gdl90 as gdl
+
+DATAGRAMS = 50000
+CYCLES = 10
+
+
+def _sendCpuTime(readback):
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(0.2)
+    destination = receiver.getsockname()
+    datagram = bytes(200)
+
+    def readBack():
+        try:
+            while True:
+                receiver.recv(1000)
+        except socket.timeout:
+            pass
+
+    reader = threading.Thread(target=readBack)
+    if readback:
+        reader.start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    start = time.process_time()
+    for _ in range(DATAGRAMS):
+        sender.sendto(datagram, destination)
+    if readback:
+        reader.join()
+    # the idle read back timeout does not use cpu time
+    elapsed = time.process_time() - start
+    sender.close()
+    receiver.close()
+    return elapsed
+
+
+def _linkCheckTime():
+    port = gdl.GDL90Port("lo", 4000)
+    port._ip, port._netMask = port._getIpAddress("lo")
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        start = time.perf_counter()
+        for _ in range(10000):
+            port._linkProblem(s)
+        return (time.perf_counter() - start) / 10000
+
+
+def _reinitLatency(failure, linkCheckInterval):
+    port = gdl.GDL90Port("lo", 4000, broadcast=False, linkCheckInterval=linkCheckInterval)
+    threading.Thread(target=port.exec, daemon=True).start()
+    detection = list()
+    for cycle in range(CYCLES):
+        while port.reinitCount != cycle or not port.isActive:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        start = time.monotonic()
+        failure(port)
+        while port._failureTime is None and port.reinitCount == cycle:
+            time.sleep(0.0005)
+        detection.append(time.monotonic() - start)
+        while port.reinitCount == cycle:
+            time.sleep(0.001)
+    return sum(detection) / CYCLES, port.lastReinitLatency
+
+
+def _changeAddress(port):
+    port._ip = "10.0.0.1"
+
+
+def _sendError(port):
+    port._socket.close()
+    try:
+        port._sendto(b"\x7e", ("127.0.0.1", 4000))
+    except OSError:
+        pass
+
+
+def main():
+    logging.disable(logging.ERROR)
+    readback = _sendCpuTime(True)
+    linkCheck = _sendCpuTime(False)
+    print("cpu time of {:,} datagrams: with read back {:.3f} s, without {:.3f} s".format(DATAGRAMS, readback, linkCheck))
+    print("link check (3 ioctl) {:.1f} us, every 0.5 s".format(_linkCheckTime() * 1e6))
+    print("{:<24} {:>14} {:>14}".format("failure", "detection ms", "re-init ms"))
+    for name, failure, interval in (("address change", _changeAddress, 0.5), ("send error", _sendError, 0.5)):
+        detection, reinit = _reinitLatency(failure, interval)
+        print("{:<24} {:>14.1f} {:>14.1f}".format(name, detection * 1000, reinit * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Heartbeats under a traffic flood, FIFO queue with tail drop (the previous behaviour) compared to :class:`GDL90OutputQueue`.
+A producer puts 2000 traffic reports and one heartbeat every 100 ms, the consumer takes 5000 messages per second.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_gdl90_queue`
+"""
+import queue
+import threading
+import time
+import monitor.app.gdl90 as gdl
+
+DURATION = 3.0
+PERIOD = 0.1
+BURST = 2000
+CONSUME_RATE = 5000
+
+
+class _FifoQueue:
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, item, messageClass):
+        try:
+            self._queue.put(item, block=False)
+        except queue.Full:
+            pass
+
+    def get(self, timeout):
+        return self._queue.get(timeout=timeout)
+
+
+def _run(q):
+    stop = threading.Event()
+    received = {"heartbeat": [], "traffic": []}
+
+    def consume():
+        while not stop.is_set():
+            try:
+                kind, queued = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            received[kind].append(time.monotonic() - queued)
+            time.sleep(1 / CONSUME_RATE)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    heartbeats = 0
+    start = time.monotonic()
+    while time.monotonic() - start < DURATION:
+        for _ in range(BURST):
+            q.put(("traffic", time.monotonic()), gdl.GDL90OutputQueue.TRAFFIC)
+        q.put(("heartbeat", time.monotonic()), gdl.GDL90OutputQueue.HEARTBEAT)
+        heartbeats += 1
+        time.sleep(PERIOD)
+    stop.set()
+    consumer.join()
+    return heartbeats, received
+
+
+def main():
+    print("{:<16} {:>12} {:>18} {:>16} {:>18}".format("", "heartbeats", "heartbeat max ms", "traffic sent", "traffic avg age ms"))
+    for name, q in (("fifo tail drop", _FifoQueue(1000)), ("priority queue", gdl.GDL90OutputQueue(1000))):
+        heartbeats, received = _run(q)
+        traffic = received["traffic"]
+        print(
+            "{:<16} {:>12} {:>18.1f} {:>16,} {:>18.1f}".format(
+                name,
+                "{}/{}".format(len(received["heartbeat"]), heartbeats),
+                max(received["heartbeat"], default=0) * 1000,
+                len(traffic),
+                sum(traffic) / len(traffic) * 1000 if traffic else 0,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
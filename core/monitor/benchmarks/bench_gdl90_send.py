@@ -0,0 +1,48 @@
+"""
+Send loop of :class:`GDL90Port` with one datagram per frame (maxDatagramSize=0, the previous behaviour)
+compared to frames packed into datagrams of 1400 bytes. Sends bursts of 300 traffic reports to a local UDP socket.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_gdl90_send`
+"""
+import socket
+import threading
+import time
+import monitor.app.gdl90 as gdl
+
+BURSTS = 50
+TARGETS = 300
+
+
+def _run(maxDatagramSize):
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    receiver.bind(("127.0.0.1", 0))
+    port = gdl.GDL90Port("lo", receiver.getsockname()[1], queueSize=BURSTS * TARGETS, maxDatagramSize=maxDatagramSize)
+    port._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    port._broadcastSink.setDestination("127.0.0.1", receiver.getsockname()[1])
+    msgs = [gdl.GDL90TrafficMessage(address=0x400000 + i, latitude=46.0 + i / 1000, longitude=7.0, altitude=5000) for i in range(TARGETS)]
+    for _ in range(BURSTS):
+        for msg in msgs:
+            port.putMessage(msg)
+    sender = threading.Thread(target=port._send)
+    start = time.perf_counter()
+    sender.start()
+    while port.framesSent < BURSTS * TARGETS:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    port._stopFlag.set()
+    port._wakeSender()
+    sender.join()
+    receiver.close()
+    return port.framesSent / elapsed, port.datagramsSent / elapsed, port.datagramsSent
+
+
+def main():
+    print("{:<18} {:>14} {:>20} {:>12}".format("", "frames/s", "datagrams (sendto)/s", "datagrams"))
+    for name, size in (("frame per datagram", 0), ("packed 1400 bytes", 1400)):
+        frames, datagrams, total = _run(size)
+        print("{:<18} {:>14,.0f} {:>20,.0f} {:>12,}".format(name, frames, datagrams, total))
+
+
+if __name__ == "__main__":
+    main()
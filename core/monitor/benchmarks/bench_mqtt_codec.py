@@ -0,0 +1,66 @@
+"""
+Payload size and encode/decode time of the mqtt notification codecs for 300 aircrafts,
+as full traffic list and as delta message with half of the aircrafts moved (see `delta`).
+MessagePack is skipped if `msgpack` is not installed.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_mqtt_codec`
+"""
+import timeit
+import common.mqtt as mqtt
+import monitor.app.delta as delta
+import monitor.app.sbs as sbs
+import monitor.app.traffic as traffic
+
+AIRCRAFTS = 300
+REPEAT = 200
+
+
+def _traffic():
+    monitor = traffic.TrafficMonitor()
+    for i in range(AIRCRAFTS):
+        monitor.update(
+            sbs.SBSMessage(
+                hexIdent="{:06X}".format(0x4B0000 + i),
+                callsign="SWR{}".format(i),
+                altitude=3000 + i * 100,
+                groundSpeed=250,
+                track=i % 360,
+                latitude=46.0 + i / 1000,
+                longitude=7.0 + i / 1000,
+                verticalRate=0,
+                squawk=1000 + i,
+            )
+        )
+    return [entry.asdict() for entry in monitor.traffic.values()]
+
+
+def _payloads():
+    entries = _traffic()
+    encoder = delta.CollectionDeltaEncoder("id")
+    encoder.encode(entries, now=0)
+    moved = [dict(entry) for entry in entries]
+    for entry in moved[: AIRCRAFTS // 2]:
+        entry["latitude"] += 0.001
+        entry["msgCount"] += 5
+    return (("full list", entries), ("delta", encoder.encode(moved, now=1)))
+
+
+def main():
+    codecs = [mqtt.JsonCodec()]
+    if mqtt.msgpack is not None:
+        codecs.append(mqtt.MsgpackCodec())
+    else:
+        print("msgpack is not installed, skip MessagePack")
+    print("{:<10} {:<8} {:>12} {:>12} {:>12}".format("payload", "codec", "bytes", "encode us", "decode us"))
+    for name, obj in _payloads():
+        for codec in codecs:
+            payload = codec.encode(obj)
+            if isinstance(payload, str):
+                payload = payload.encode("utf-8")
+            encode = timeit.timeit(lambda: codec.encode(obj), number=REPEAT) / REPEAT
+            decode = timeit.timeit(lambda: codec.decode(payload), number=REPEAT) / REPEAT
+            print("{:<10} {:<8} {:>12,} {:>12.0f} {:>12.0f}".format(name, codec.name, len(payload), encode * 1e6, decode * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+GDL90 traffic reports per second with and without :class:`TrafficRateLimiter`.
+Simulates 300 aircrafts sending 6 position messages per second each for 10 seconds, ticks every 50 ms.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_ratelimit`
+"""
+import time
+import monitor.app.traffic as traffic
+import monitor.app.sbs as sbs
+import monitor.app.ratelimit as ratelimit
+
+AIRCRAFTS = 300
+RATE = 6
+SECONDS = 10
+TICK = 0.05
+
+
+def main():
+    monitor = traffic.TrafficMonitor()
+    reports = list()
+    limiter = ratelimit.TrafficRateLimiter(reports.append, interval=1.0, tickInterval=TICK)
+    monitor.register(limiter)
+    messagesPerTick = int(AIRCRAFTS * RATE * TICK)
+    now = 0.0
+    sent = 0
+    start = time.perf_counter()
+    for _ in range(int(SECONDS / TICK)):
+        for _ in range(messagesPerTick):
+            monitor.update(sbs.SBSMessage(hexIdent="{:06X}".format(sent % AIRCRAFTS), altitude=sent % 40000, latitude=46.0, longitude=7.0))
+            sent += 1
+        now += TICK
+        limiter.emitDue(now)
+    elapsed = time.perf_counter() - start
+    print("messages/s without rate limit: {:>8.0f}".format(sent / SECONDS))
+    print("reports/s with rate limit:     {:>8.0f}".format(len(reports) / SECONDS))
+    print("coalesced:                     {:>7.1f} %".format(100 * (1 - limiter.emitted / limiter.received)))
+    print("cpu per message:               {:>6.2f} us".format(elapsed / sent * 1e6))
+
+
+if __name__ == "__main__":
+    main()
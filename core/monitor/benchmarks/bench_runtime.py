@@ -0,0 +1,210 @@
+"""
+Periodic jobs with self rescheduling `threading.Timer` (the previous design) compared to :class:`MonitorRuntime`.
+Runs 4 jobs (rate limiter 50 ms, heartbeat, json sender and cleanup scaled to 100 ms) for 5 seconds
+and measures the lateness of every call against the ideal fixed rate schedule, the threads started and the cpu time.
+The runtime is measured again under SBS load (`SBS_RATE` lines/s published by mqtt in batches of `SBS_LINES` lines like dump1090mqtt)
+and one GDL90 ctrl request blocking for `REQUEST_BLOCKING` seconds (like `stopDiscovery` joining its thread),
+once with the handlers on the event loop and once on the worker threads, as `monitor.py` subscribes them.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_runtime`
+"""
+import json
+import threading
+import time
+import common.mqtt as mqtt
+import monitor.app.runtime as runtime
+import monitor.app.sbs as sbs
+import monitor.app.traffic as traffic
+
+DURATION = 5.0
+JOBS = (("rateLimiter", 0.05), ("heartbeat", 0.1), ("jsonSender", 0.1), ("cleanup", 0.1))
+SBS_TOPIC = "/easyadsb/dump1090/sbs"
+SBS_RATE = 5000
+SBS_LINES = 100
+GDL90_CTRL_TOPIC = "/easyadsb/monitor/gdl90/ctrl"
+REQUEST_BLOCKING = 0.5
+SBS_LINE = "MSG,3,1,1,{:06X},1,2023/10/26,07:20:11.481,2023/10/26,07:20:11.491,,30500,,,46.91222,7.49917,,,0,,0,0"
+
+
+class _Job:
+    def __init__(self, interval, start):
+        self.interval = interval
+        self.start = start
+        self.calls = 0
+        self.lateness = list()
+
+    def __call__(self):
+        self.calls += 1
+        self.lateness.append(time.monotonic() - (self.start + self.calls * self.interval))
+
+
+class _TimerChain:
+    def __init__(self, job):
+        self._job = job
+        self._stopped = False
+        self.timers = 0
+
+    def start(self):
+        self._tick(False)
+
+    def _tick(self, call=True):
+        if self._stopped:
+            return
+        timer = threading.Timer(self._job.interval, self._tick)
+        timer.daemon = True
+        timer.start()
+        self.timers += 1
+        if call:
+            self._job()
+
+    def stop(self):
+        self._stopped = True
+
+
+def _runTimers():
+    start = time.monotonic()
+    jobs = [_Job(interval, start) for _, interval in JOBS]
+    chains = [_TimerChain(job) for job in jobs]
+    cpu = time.process_time()
+    for chain in chains:
+        chain.start()
+    time.sleep(DURATION)
+    for chain in chains:
+        chain.stop()
+    return jobs, sum(chain.timers for chain in chains), time.process_time() - cpu
+
+
+def _runRuntime():
+    # let the daemon timer threads of the previous run finish
+    time.sleep(0.5)
+    rt = runtime.MonitorRuntime()
+    threadsBefore = threading.active_count()
+    rt.start()
+    threads = threading.active_count() - threadsBefore
+    start = time.monotonic()
+    jobs = [_Job(interval, start) for _, interval in JOBS]
+    cpu = time.process_time()
+    handles = [rt.callEvery(job.interval, job) for job in jobs]
+    time.sleep(DURATION)
+    for handle in handles:
+        handle.cancel()
+    cpu = time.process_time() - cpu
+    rt.stop()
+    return jobs, threads, cpu
+
+
+class _FakeMqClient:
+    def __init__(self):
+        self.on_message = None
+
+    def subscribe(self, topic):
+        pass
+
+    def publish(self, topic, msg):
+        pass
+
+
+class _FakeMqMessage:
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+class _Observer:
+    def notify(self, entry):
+        # stands for the work of the real observers, e.g. the GDL90 conversion
+        entry.asdict()
+
+
+def _sbsHandler(trafficMonitor, ingested):
+    # the work of `MessageDispatcher.onSbsMessage`
+    def onSbsMessage(msg):
+        messages = [sbs.SBSReader.parseTraffic(line.strip()) for line in msg.split("\n")]
+        trafficMonitor.updateBatch(messages)
+        ingested.append(len(messages))
+    return onSbsMessage
+
+
+def _runRuntimeWithSbs(onWorkers):
+    rt = runtime.MonitorRuntime()
+    rt.start()
+    threads = threading.active_count()
+    trafficMonitor = traffic.TrafficMonitor()
+    trafficMonitor.register(_Observer())
+    ingested = list()
+    subscriptions = {
+        SBS_TOPIC: {"type": mqtt.MqttMessenger.NOTIFICATION, "func": _sbsHandler(trafficMonitor, ingested)},
+        GDL90_CTRL_TOPIC: {"type": mqtt.MqttMessenger.REQUEST, "func": lambda msg: time.sleep(REQUEST_BLOCKING)},
+    }
+    if onWorkers:
+        for subscription in subscriptions.values():
+            subscription["executor"] = rt.workerExecutor
+    mqClient = _FakeMqClient()
+    mqtt.MqttMessenger(mqClient, subscriptions, executor=rt.executor)
+    payloads = [
+        "\n".join(SBS_LINE.format(0x400000 + (i * SBS_LINES + k) % 500) for k in range(SBS_LINES)).encode("UTF-8")
+        for i in range(50)
+    ]
+    stopped = threading.Event()
+
+    def publish():
+        # the network loop of the mqtt client, delivers SBS_RATE lines/s
+        interval = SBS_LINES / SBS_RATE
+        deadline = time.monotonic()
+        i = 0
+        while not stopped.is_set():
+            mqClient.on_message(None, None, _FakeMqMessage(SBS_TOPIC, payloads[i % len(payloads)]))
+            i += 1
+            deadline += interval
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    publisher = threading.Thread(target=publish, daemon=True)
+    publisher.start()
+    start = time.monotonic()
+    jobs = [_Job(interval, start) for _, interval in JOBS]
+    cpu = time.process_time()
+    handles = [rt.callEvery(job.interval, job) for job in jobs]
+    time.sleep(DURATION / 2)
+    request = json.dumps({"requestId": 1, "command": "setDiscovery", "data": {"enabled": False}}).encode("UTF-8")
+    mqClient.on_message(None, None, _FakeMqMessage(GDL90_CTRL_TOPIC + "/request", request))
+    time.sleep(DURATION / 2)
+    for handle in handles:
+        handle.cancel()
+    cpu = time.process_time() - cpu
+    stopped.set()
+    publisher.join()
+    lines = sum(ingested)
+    threads = threading.active_count() - threads
+    rt.stop()
+    print("{:<16} {} of {} sbs lines ingested".format("", lines, int(SBS_RATE * DURATION)))
+    return jobs, threads, cpu
+
+
+def main():
+    print("{:<16} {:>8} {:>16} {:>16} {:>16} {:>16}".format("", "calls", "mean late ms", "max late ms", "last late ms", "threads started"))
+    runs = (
+        ("threading.Timer", _runTimers),
+        ("MonitorRuntime", _runRuntime),
+        ("sbs on loop", lambda: _runRuntimeWithSbs(False)),
+        ("sbs on workers", lambda: _runRuntimeWithSbs(True)),
+    )
+    for name, run in runs:
+        jobs, threads, cpu = run()
+        lateness = [late for job in jobs for late in job.lateness]
+        print(
+            "{:<16} {:>8} {:>16.2f} {:>16.2f} {:>16.2f} {:>16}".format(
+                name,
+                len(lateness),
+                sum(lateness) / len(lateness) * 1000,
+                max(lateness) * 1000,
+                max(job.lateness[-1] for job in jobs) * 1000,
+                threads,
+            )
+        )
+        print("{:<16} cpu time {:.3f} s".format("", cpu))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Throughput of :func:`SBSReader.parse` compared to :func:`SBSReader.parseTraffic`.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_sbs`
+"""
+import timeit
+import monitor.app.sbs as sbs
+
+
+LINES = [
+    "MSG,1,1,1,4B1A2C,1,2023/10/26,07:20:12.001,2023/10/26,07:20:12.002,SWR123  ,,,,,,,,,,,",
+    "MSG,3,1,1,44039E,1,2023/10/26,07:20:11.481,2023/10/26,07:20:11.491,,30500,,,46.91222,7.49917,,,0,,0,0",
+    "MSG,4,1,1,44039E,1,2023/10/26,07:20:11.512,2023/10/26,07:20:11.520,,,452,273,,,-640,,,,,0",
+    "MSG,5,1,1,3C6586,1,2023/10/26,07:20:11.530,2023/10/26,07:20:11.541,,37000,,,,,,,0,,0,0",
+    "MSG,6,1,1,3C6586,1,2023/10/26,07:20:11.602,2023/10/26,07:20:11.611,,,,,,,,7000,0,0,0,0",
+    "MSG,8,1,1,4B1A2C,1,2023/10/26,07:20:11.700,2023/10/26,07:20:11.703,,,,,,,,,,,,0",
+]
+
+
+def _run(func, repeat=5, number=20000):
+    def parseAll():
+        for line in LINES:
+            func(line)
+
+    best = min(timeit.repeat(parseAll, repeat=repeat, number=number))
+    return number * len(LINES) / best
+
+
+def main():
+    results = [
+        ("parse", _run(sbs.SBSReader.parse)),
+        ("parseTraffic", _run(sbs.SBSReader.parseTraffic)),
+        ("parseTraffic(parseDates)", _run(lambda line: sbs.SBSReader.parseTraffic(line, parseDates=True))),
+    ]
+    base = results[0][1]
+    for name, rate in results:
+        print("{:<28} {:>12,.0f} msg/s  x{:.2f}".format(name, rate, rate / base))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+End-to-end latency from dump1090 to the encoded GDL90 traffic report, for the SBS paths of the monitor.
+A fake dump1090 sends bursts of SBS lines for 300 aircrafts (2000 lines/s), the observer of the `TrafficMonitor`
+encodes the GDL90 report and measures the time since the line was sent.
+
+- `tcp source`, :class:`SBSTcpSource` reading straight from dump1090
+- `mqtt`, dump1090mqtt (one read and publish per line) -> broker -> `MqttMessenger` thread pool -> `onSbsMessage`.
+  Uses the broker on `localhost:1883` if there is one, otherwise the broker is emulated by a process internal TCP relay
+  which forwards every line on its own
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_sbs_latency`
+"""
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import common.mqtt as mqtt
+from common.framing import LineFramer
+import monitor.app.gdl90 as gdl
+import monitor.app.sbs as sbs
+import monitor.app.sbssource as sbssource
+import monitor.app.traffic as traffic
+
+AIRCRAFTS = 300
+RATE = 2000
+BURST_INTERVAL = 0.01
+DURATION = 3.0
+TOPIC = "/easyadsb/bench/sbs"
+
+
+class _Observer:
+    def __init__(self, sent):
+        self._sent = sent
+        self.latencies = list()
+
+    def notify(self, entry):
+        gdl.encodeTrafficMessage(
+            gdl.GDL90TrafficMessage(
+                address=entry.id,
+                latitude=entry.latitude or 0,
+                longitude=entry.longitude or 0,
+                altitude=entry.altitude or 0,
+                callsign=entry.callsign or "",
+            )
+        )
+        # the altitude is the sequence number of the line
+        self.latencies.append(time.perf_counter() - self._sent[entry.altitude])
+
+
+class _FakeDump1090:
+    def __init__(self):
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen(1)
+        self.port = self._server.getsockname()[1]
+        self.sent = dict()
+
+    def serve(self):
+        conn, _ = self._server.accept()
+        burst = int(RATE * BURST_INTERVAL)
+        seq = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < DURATION:
+            lines = list()
+            now = time.perf_counter()
+            for _ in range(burst):
+                seq += 1
+                self.sent[seq] = now
+                lines.append(
+                    "MSG,3,1,1,{:06X},1,2023/10/26,07:20:11.481,2023/10/26,07:20:11.491,,{},,,46.91222,7.49917,,,0,,0,0\r\n".format(
+                        0x4B0000 + seq % AIRCRAFTS, seq
+                    )
+                )
+            conn.sendall("".join(lines).encode("ascii"))
+            time.sleep(BURST_INTERVAL)
+        time.sleep(0.5)
+        conn.close()
+        self._server.close()
+
+
+def _readline(skt):
+    # the readline of dump1090mqtt, one peek and one read per line
+    line = skt.recv(4096, socket.MSG_PEEK)
+    if len(line) == 0:
+        raise ConnectionError("connection lost")
+    eol = line.find(b"\n")
+    return skt.recv(eol + 1 if eol >= 0 else len(line))
+
+
+def _onSbsMessage(monitor, msg):
+    monitor.update(sbs.SBSReader.parseTraffic(msg.strip()))
+
+
+def _runTcpSource():
+    server = _FakeDump1090()
+    monitor = traffic.TrafficMonitor()
+    observer = _Observer(server.sent)
+    monitor.register(observer)
+    source = sbssource.SBSTcpSource("127.0.0.1", server.port, monitor)
+    source.start()
+    server.serve()
+    source.stop()
+    return observer.latencies
+
+
+def _runMqtt(client):
+    server = _FakeDump1090()
+    monitor = traffic.TrafficMonitor()
+    observer = _Observer(server.sent)
+    monitor.register(observer)
+    mqtt.MqttMessenger(client, {TOPIC: {"type": mqtt.MqttMessenger.NOTIFICATION, "func": lambda msg: _onSbsMessage(monitor, msg)}})
+    time.sleep(0.5)
+
+    def publish():
+        sock = socket.create_connection(("127.0.0.1", server.port))
+        try:
+            while True:
+                client.publish(TOPIC, _readline(sock))
+        except OSError:
+            pass
+
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    server.serve()
+    publisher.join()
+    client.disconnect()
+    return observer.latencies
+
+
+def _runEmulatedMqtt():
+    server = _FakeDump1090()
+    monitor = traffic.TrafficMonitor()
+    observer = _Observer(server.sent)
+    monitor.register(observer)
+    executor = ThreadPoolExecutor(max_workers=3)
+    relay = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    relay.bind(("127.0.0.1", 0))
+    relay.listen(2)
+
+    def publish():
+        sock = socket.create_connection(("127.0.0.1", server.port))
+        out = socket.create_connection(relay.getsockname())
+        out.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                out.sendall(_readline(sock))
+        except OSError:
+            out.close()
+
+    def broker():
+        inbound, _ = relay.accept()
+        outbound = socket.create_connection(relay.getsockname())
+        outbound.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        framer = LineFramer()
+        try:
+            while True:
+                for line in framer.recvLines(inbound):
+                    outbound.sendall(line + b"\n")
+        except OSError:
+            outbound.close()
+
+    def subscribe():
+        sock, _ = relay.accept()
+        framer = LineFramer()
+        try:
+            while True:
+                for line in framer.recvLines(sock):
+                    executor.submit(_onSbsMessage, monitor, line.decode("ascii"))
+        except OSError:
+            pass
+
+    threads = [threading.Thread(target=f) for f in (broker, publish)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    subscriber = threading.Thread(target=subscribe)
+    subscriber.start()
+    server.serve()
+    for t in threads + [subscriber]:
+        t.join()
+    executor.shutdown()
+    relay.close()
+    return observer.latencies
+
+
+def _mqttClient():
+    try:
+        return mqtt.launch("bench_sbs_latency", "localhost", 1883)
+    except OSError:
+        return None
+
+
+def main():
+    runs = [("tcp source", _runTcpSource)]
+    client = _mqttClient()
+    if client is not None:
+        runs.append(("mqtt", lambda: _runMqtt(client)))
+    else:
+        runs.append(("mqtt (emulated)", _runEmulatedMqtt))
+    print("{:<16} {:>10} {:>10} {:>10} {:>10} {:>10}".format("", "reports", "mean ms", "p50 ms", "p99 ms", "max ms"))
+    for name, run in runs:
+        latencies = sorted(run())
+        print(
+            "{:<16} {:>10,} {:>10.2f} {:>10.2f} {:>10.2f} {:>10.2f}".format(
+                name,
+                len(latencies),
+                sum(latencies) / len(latencies) * 1000,
+                latencies[len(latencies) // 2] * 1000,
+                latencies[int(len(latencies) * 0.99)] * 1000,
+                latencies[-1] * 1000,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Phase and drift of a 1 Hz heartbeat: `time.sleep` loop (bme, sysmgmt), self rescheduling `threading.Timer` (monitor)
+and aligned jobs of the common `Scheduler` and :class:`MonitorRuntime`. Every call does 20 ms of work.
+Offset is the time of the call after the last full UTC second.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_scheduler`
+"""
+import threading
+import time
+import monitor.app.runtime as runtime
+from common.scheduler import Scheduler
+
+CALLS = 6
+WORK = 0.02
+
+
+class _Heartbeat:
+    def __init__(self):
+        self.calls = list()
+        self.done = threading.Event()
+
+    def __call__(self):
+        self.calls.append(time.time())
+        time.sleep(WORK)
+        if len(self.calls) >= CALLS:
+            self.done.set()
+
+
+def _sleepLoop(heartbeat):
+    def loop():
+        while not heartbeat.done.is_set():
+            heartbeat()
+            time.sleep(1)
+
+    threading.Thread(target=loop, daemon=True).start()
+    heartbeat.done.wait()
+
+
+def _timerChain(heartbeat):
+    def tick():
+        if not heartbeat.done.is_set():
+            threading.Timer(1, tick).start()
+            heartbeat()
+
+    tick()
+    heartbeat.done.wait()
+
+
+def _scheduler(heartbeat):
+    scheduler = Scheduler()
+    scheduler.callEvery(1, heartbeat, align=True)
+    scheduler.start()
+    heartbeat.done.wait()
+    scheduler.stop()
+
+
+def _runtime(heartbeat):
+    rt = runtime.MonitorRuntime()
+    rt.start()
+    rt.callEvery(1, heartbeat, align=True)
+    heartbeat.done.wait()
+    rt.stop()
+
+
+def main():
+    print("{:<16} {:>16} {:>16} {:>18}".format("", "first offset ms", "last offset ms", "drift ms/call"))
+    for name, run in (("sleep loop", _sleepLoop), ("threading.Timer", _timerChain), ("Scheduler", _scheduler), ("MonitorRuntime", _runtime)):
+        heartbeat = _Heartbeat()
+        run(heartbeat)
+        calls = heartbeat.calls[:CALLS]
+        drift = (calls[-1] - calls[0]) / (len(calls) - 1) - 1
+        print("{:<16} {:>16.2f} {:>16.2f} {:>18.2f}".format(name, calls[0] % 1 * 1000, calls[-1] % 1 * 1000, drift * 1000))
+
+
+if __name__ == "__main__":
+    main()
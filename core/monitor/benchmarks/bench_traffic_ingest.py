@@ -0,0 +1,74 @@
+"""
+Multi-threaded ingest into :class:`TrafficMonitor`, one shard (a single lock) compared to the default sharding.
+Every worker updates its own set of aircrafts, like the `MqttMessenger` thread pool running `onSbsMessage`,
+while a reader takes a snapshot every 10 ms.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_traffic_ingest`
+"""
+import sys
+import time
+import threading
+import monitor.app.traffic as traffic
+import monitor.app.sbs as sbs
+
+
+class _Observer:
+
+    def notify(self, entry):
+        # stands for the work of the real observers, e.g. the GDL90 conversion
+        entry.asdict()
+
+
+def _run(shardCount, workers, aircrafts=1000, messagesPerWorker=20000):
+    monitor = traffic.TrafficMonitor(shardCount=shardCount)
+    monitor.register(_Observer())
+    perWorker = aircrafts // workers
+    batches = [
+        [
+            sbs.SBSMessage(hexIdent="{:06X}".format(w * perWorker + i % perWorker), altitude=i, latitude=46.0, longitude=7.0)
+            for i in range(messagesPerWorker // workers)
+        ]
+        for w in range(workers)
+    ]
+    barrier = threading.Barrier(workers + 1)
+    done = threading.Event()
+
+    def ingest(messages):
+        barrier.wait()
+        for msg in messages:
+            monitor.update(msg)
+
+    def read():
+        while not done.is_set():
+            monitor.traffic
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=ingest, args=(batch,)) for batch in batches]
+    reader = threading.Thread(target=read)
+    for t in threads:
+        t.start()
+    reader.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    reader.join()
+    return sum(len(batch) for batch in batches) / elapsed
+
+
+def _best(shardCount, workers, repeat=3):
+    return max(_run(shardCount, workers) for _ in range(repeat))
+
+
+def main():
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print("python {}, GIL {}".format(sys.version.split()[0], "enabled" if gil else "disabled"))
+    print("{:>8} {:>18} {:>18}".format("workers", "1 shard (msg/s)", "16 shards (msg/s)"))
+    for workers in (1, 2, 4, 8):
+        print("{:>8} {:>18,.0f} {:>18,.0f}".format(workers, _best(1, workers), _best(16, workers)))
+
+
+if __name__ == "__main__":
+    main()
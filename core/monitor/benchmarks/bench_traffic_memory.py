@@ -0,0 +1,63 @@
+"""
+Memory used by 10k :class:`TrafficEntry` compared to the former dict based entry,
+plus the cost of a single update.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_traffic_memory`
+"""
+import timeit
+import tracemalloc
+from datetime import datetime
+import monitor.app.traffic as traffic
+import monitor.app.sbs as sbs
+
+
+class DictTrafficEntry(dict):
+    """layout of the former dict based `TrafficEntry`"""
+
+    def __init__(self, id: str):
+        for key in (
+            "callsign", "type", "name", "descr", "wtc", "category", "latitude", "longitude", "altitude", "track",
+            "groundSpeed", "verticalSpeed", "squawk", "alert", "emergency", "spi", "isOnGround",
+        ):
+            self[key] = None
+        self["id"] = int(id, 16)
+        self._lastSeen = datetime.utcnow()
+        self["lastSeen"] = self._lastSeen.strftime("%H:%M:%S")
+        self["msgCount"] = 1
+
+    def update(self, msg):
+        self["altitude"] = msg.altitude
+        self._lastSeen = datetime.utcnow()
+        self["lastSeen"] = self._lastSeen.strftime("%H:%M:%S")
+        self["msgCount"] += 1
+
+
+def _slotEntry(id: str):
+    return traffic.TrafficEntry(id, None, None, None, None, None, traffic.TrafficCategory.no_info, *([None] * 11))
+
+
+def _memory(factory, count):
+    tracemalloc.start()
+    entries = [factory("{:06X}".format(i)) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entries
+    return size
+
+
+def main():
+    count = 10000
+    msg = sbs.SBSMessage(hexIdent="000001", altitude=1000)
+    results = [
+        ("dict entry", _memory(DictTrafficEntry, count), DictTrafficEntry("000001")),
+        ("slots entry", _memory(_slotEntry, count), _slotEntry("000001")),
+    ]
+    for name, size, entry in results:
+        updateTime = min(timeit.repeat(lambda: entry.update(msg), repeat=5, number=20000)) / 20000
+        print("{:<12} {:>8.0f} KiB for {} entries, {:>4.0f} bytes/entry, update {:.2f} us".format(
+            name, size / 1024, count, size / count, updateTime * 1e6
+        ))
+
+
+if __name__ == "__main__":
+    main()
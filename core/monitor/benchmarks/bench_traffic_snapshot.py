@@ -0,0 +1,67 @@
+"""
+Cost of reading `TrafficMonitor.traffic` once per second, deepcopy compared to copy-on-write snapshots.
+Between two reads every aircraft receives one update, which is the worst case for copy-on-write.
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_traffic_snapshot`
+"""
+import time
+import tracemalloc
+from copy import deepcopy
+import monitor.app.traffic as traffic
+import monitor.app.sbs as sbs
+
+
+def _populate(count):
+    monitor = traffic.TrafficMonitor()
+    messages = [sbs.SBSMessage(hexIdent="{:06X}".format(i), altitude=1000 + i, latitude=46.0, longitude=7.0) for i in range(count)]
+    monitor.updateBatch(messages)
+    return monitor, messages
+
+
+def _measure(read, update, rounds=50):
+    holdTimes = list()
+    for _ in range(rounds):
+        update()
+        start = time.perf_counter()
+        read()
+        holdTimes.append(time.perf_counter() - start)
+    allocated = 0
+    for _ in range(rounds):
+        update()
+        tracemalloc.start()
+        read()
+        allocated += tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return sorted(holdTimes)[len(holdTimes) // 2], allocated / rounds
+
+
+def _measureUpdates(monitor, messages, rounds=20):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        monitor.traffic
+        monitor.updateBatch(messages)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    print("{:>6} {:>22} {:>22} {:>20}".format("count", "deepcopy (us / KiB)", "snapshot (us / KiB)", "updates/round (us)"))
+    for count in (50, 200, 1000):
+        monitor, messages = _populate(count)
+
+        def deepcopyRead():
+            for shard in monitor._shards:
+                with shard.lock:
+                    deepcopy(shard.traffic)
+
+        deepHold, deepAlloc = _measure(deepcopyRead, lambda: monitor.updateBatch(messages))
+        snapHold, snapAlloc = _measure(lambda: monitor.traffic, lambda: monitor.updateBatch(messages))
+        updateTime = _measureUpdates(monitor, messages)
+        print(
+            "{:>6} {:>13.0f} / {:>6.1f} {:>13.0f} / {:>6.1f} {:>20.0f}".format(
+                count, deepHold * 1e6, deepAlloc / 1024, snapHold * 1e6, snapAlloc / 1024, updateTime * 1e6
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
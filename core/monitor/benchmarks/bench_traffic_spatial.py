@@ -0,0 +1,85 @@
+"""
+Latency of the spatial traffic queries compared to scanning every :class:`TrafficEntry` of the snapshot.
+Traffic is spread uniformly over a 6 x 8 degree area around the query position (central Europe sized).
+
+run from the `core` directory: `PYTHONPATH=.. python -m monitor.benchmarks.bench_traffic_spatial`
+"""
+import random
+import timeit
+import monitor.app.traffic as traffic
+import monitor.app.sbs as sbs
+from monitor.app.spatial import distanceNm
+
+LATITUDE = 47.0
+LONGITUDE = 8.0
+
+
+def _populate(count):
+    rnd = random.Random(1)
+    monitor = traffic.TrafficMonitor()
+    monitor.updateBatch(
+        [
+            sbs.SBSMessage(
+                hexIdent="{:06X}".format(i),
+                latitude=LATITUDE + rnd.uniform(-3, 3),
+                longitude=LONGITUDE + rnd.uniform(-4, 4),
+                altitude=rnd.randrange(0, 40000, 100),
+            )
+            for i in range(count)
+        ]
+    )
+    return monitor
+
+
+def _scan(monitor, radiusNm, altitude, altitudeBand):
+    found = list()
+    for entry in monitor.traffic.values():
+        if abs(entry.altitude - altitude) > altitudeBand:
+            continue
+        distance = distanceNm(LATITUDE, LONGITUDE, entry.latitude, entry.longitude)
+        if distance <= radiusNm:
+            found.append((distance, entry))
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+def _time(func, number=200):
+    return min(timeit.repeat(func, repeat=5, number=number)) / number
+
+
+def main():
+    print(
+        "{:>6} {:>16} {:>16} {:>16} {:>16} {:>16}".format(
+            "count", "scan 20nm (us)", "radius 20nm (us)", "radius 60nm (us)", "bbox 1deg (us)", "nearest 10 (us)"
+        )
+    )
+    for count in (1000, 3000, 10000):
+        monitor = _populate(count)
+        # a changed aircraft between queries, the scan has to rebuild the snapshot like in operation
+        msg = sbs.SBSMessage(hexIdent="000000", altitude=5000)
+
+        def scan():
+            monitor.update(msg)
+            _scan(monitor, 20, 5000, 3000)
+
+        def radius(radiusNm):
+            monitor.update(msg)
+            monitor.trafficInRadius(LATITUDE, LONGITUDE, radiusNm, altitude=5000, altitudeBand=3000)
+
+        def bbox():
+            monitor.update(msg)
+            monitor.trafficInBoundingBox(LATITUDE - 0.5, LONGITUDE - 0.5, LATITUDE + 0.5, LONGITUDE + 0.5)
+
+        def nearest():
+            monitor.update(msg)
+            monitor.nearestTraffic(LATITUDE, LONGITUDE, 10)
+
+        print(
+            "{:>6} {:>16.0f} {:>16.0f} {:>16.0f} {:>16.0f} {:>16.0f}".format(
+                count, _time(scan) * 1e6, _time(lambda: radius(20)) * 1e6, _time(lambda: radius(60)) * 1e6, _time(bbox) * 1e6, _time(nearest) * 1e6
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
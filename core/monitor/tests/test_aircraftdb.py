@@ -0,0 +1,47 @@
+import monitor.app.aircraftdb as aircraftdb
+import monitor.app.traffic as traffic
+import monitor.app.sbs as sbs
+import pytest
+
+
+@pytest.fixture
+def db(tmp_path):
+    aircrafts = {"4B1A2C": ["HB-JCA", "BCS3", "00"], "44039E": ["OO-SNA", "A320", "00"], "3C6586": ["D-AIBA", "A319", "00"]}
+    types = {"A319": ["AIRBUS A-319", "L2J", "M"], "A320": ["AIRBUS A-320", "L2J", "M"], "BCS3": ["AIRBUS A-220-300", "L2J", "M"]}
+    typesExtension = {"": [0], "A319": [3], "A320": [3]}
+    path = tmp_path / "aircraftdb.bin"
+    aircraftdb.compileDb(aircrafts, types, 329, typesExtension, str(path))
+    db = aircraftdb.AircraftDb(str(path))
+    yield db
+    db.close()
+
+
+def test_lookup(db):
+    assert db.version == 329
+    assert len(db.aircrafts) == 3
+    assert db.aircrafts.get("44039E") == ("OO-SNA", "A320", "00")
+    assert db.types["BCS3"] == ("AIRBUS A-220-300", "L2J", "M")
+    assert db.typesExtension.get("") == (0,)
+    assert "3C6586" in db.aircrafts
+
+
+@pytest.mark.parametrize("key", ["000000", "FFFFFF", "4B1A2", "4B1A2C0", "", None])
+def test_lookupMissingKey(db, key):
+    assert db.aircrafts.get(key) is None
+    assert db.aircrafts.get(key, ("default",)) == ("default",)
+
+
+def test_invalidFile(tmp_path):
+    path = tmp_path / "invalid.bin"
+    path.write_bytes(b"\x00" * 64)
+    with pytest.raises(aircraftdb.AircraftDbError):
+        aircraftdb.AircraftDb(str(path))
+
+
+def test_trafficMonitorWithAircraftDb(db):
+    monitor = traffic.TrafficMonitor(db.aircrafts, db.types, db.version, db.typesExtension)
+    monitor.update(sbs.SBSMessage(hexIdent="44039E"))
+    entry = monitor.traffic["44039E"]
+    assert entry.callsign == "OO-SNA"
+    assert entry.name == "AIRBUS A-320"
+    assert entry.category == traffic.TrafficCategory.large
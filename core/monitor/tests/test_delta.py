@@ -0,0 +1,44 @@
+import monitor.app.delta as delta
+
+
+def test_collectionStartsWithSnapshot():
+    encoder = delta.CollectionDeltaEncoder("id")
+    entries = [{"id": 1, "altitude": 1000}, {"id": 2, "altitude": 2000}]
+    msg = encoder.encode(entries, now=0)
+    assert msg == {"type": "snapshot", "seq": 1, "entries": entries}
+    assert encoder.encode(entries, now=1) is None
+    assert encoder.seq == 1
+
+
+def test_collectionDelta():
+    encoder = delta.CollectionDeltaEncoder("id")
+    encoder.encode([{"id": 1, "altitude": 1000, "track": 90}, {"id": 2, "altitude": 2000, "track": 180}], now=0)
+    msg = encoder.encode([{"id": 1, "altitude": 1100, "track": 90}, {"id": 3, "altitude": 3000, "track": 270}], now=1)
+    assert msg == {
+        "type": "delta",
+        "seq": 2,
+        "added": [{"id": 3, "altitude": 3000, "track": 270}],
+        "changed": [{"id": 1, "altitude": 1100}],
+        "removed": [2],
+    }
+    assert encoder.asdict() == {"seq": 2, "snapshots": 1, "deltas": 1}
+
+
+def test_snapshotOnRequestAndInterval():
+    encoder = delta.CollectionDeltaEncoder("svid", snapshotInterval=30)
+    entries = [{"svid": 1, "cno": 20}]
+    encoder.encode(entries, now=0)
+    encoder.requestSnapshot()
+    assert encoder.encode(entries, now=1)["type"] == "snapshot"
+    assert encoder.encode(entries, now=30) is None
+    msg = encoder.encode(entries, now=31)
+    assert msg == {"type": "snapshot", "seq": 3, "entries": entries}
+
+
+def test_objectDelta():
+    encoder = delta.ObjectDeltaEncoder(snapshotInterval=0)
+    position = {"latitude": 46.9, "longitude": 7.4, "utcTime": "10:00:00"}
+    assert encoder.encode(position, now=0) == {"type": "snapshot", "seq": 1, "entry": position}
+    position["utcTime"] = "10:00:01"
+    assert encoder.encode(position, now=1000) == {"type": "delta", "seq": 2, "changed": {"utcTime": "10:00:01"}}
+    assert encoder.encode(position, now=1001) is None
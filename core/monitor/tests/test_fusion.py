@@ -0,0 +1,68 @@
+import monitor.app.fusion as fusion
+import monitor.app.sbs as sbs
+import monitor.app.traffic as traffic
+
+POSITION = "MSG,3,1,1,44039E,1,2023/10/26,{},2023/10/26,07:20:11.491,,30500,,,{},7.49917,,,0,,0,0"
+VELOCITY = "MSG,4,1,1,3C6586,1,2023/10/26,07:20:11.512,2023/10/26,07:20:11.520,,,452,273,,,-640,,,,,0"
+
+
+def _parse(line):
+    return sbs.SBSReader.parseTraffic(line, parseDates=True)
+
+
+def test_duplicatesOfOtherSourceAreDropped():
+    monitor = traffic.TrafficMonitor()
+    merger = fusion.SBSFusion(monitor, dedupWindow=1)
+    roof = merger.addSource("roof")
+    garden = merger.addSource("garden")
+    merger.updateBatch(roof, [_parse(POSITION.format("07:20:11.481", 46.91222))], now=10)
+    merger.updateBatch(garden, [_parse(POSITION.format("07:20:11.482", 46.91222)), _parse(VELOCITY)], now=10.1)
+    # repeated by the same source
+    merger.updateBatch(roof, [_parse(POSITION.format("07:20:12.481", 46.91222))], now=10.2)
+    assert monitor.traffic["44039E"].msgCount == 2
+    assert monitor.traffic["44039E"].sources == {"roof"}
+    assert monitor.traffic["3C6586"].source == "garden"
+    stats = merger.asdict()["sources"]
+    assert stats["garden"]["messages"] == 2
+    assert stats["garden"]["duplicates"] == 1
+    assert stats["garden"]["overlap"] == {"roof": 1}
+    assert stats["roof"]["exclusiveTargets"] == 1
+    assert stats["garden"]["targets"] == 1
+
+
+def test_duplicatesAfterWindowAreAccepted():
+    monitor = traffic.TrafficMonitor()
+    merger = fusion.SBSFusion(monitor, dedupWindow=1)
+    roof = merger.addSource("roof")
+    garden = merger.addSource("garden")
+    merger.updateBatch(roof, [_parse(VELOCITY)], now=10)
+    merger.updateBatch(garden, [_parse(VELOCITY)], now=11.5)
+    merger.updateBatch(roof, [_parse(VELOCITY)], now=11.6)
+    entry = monitor.traffic["3C6586"]
+    assert entry.msgCount == 2
+    assert entry.sources == {"roof", "garden"}
+    assert merger.asdict()["sharedTargets"] == 1
+
+
+def test_olderPositionOfSlowerSourceIsIgnored():
+    monitor = traffic.TrafficMonitor()
+    merger = fusion.SBSFusion(monitor)
+    roof = merger.addSource("roof")
+    garden = merger.addSource("garden")
+    roof.update(_parse(POSITION.format("07:20:12.000", 46.92)))
+    garden.update(_parse(POSITION.format("07:20:11.500", 46.91)))
+    entry = monitor.traffic["44039E"]
+    assert entry.latitude == 46.92
+    assert entry.source == "garden"
+    garden.update(_parse(POSITION.format("07:20:12.500", 46.93)))
+    assert monitor.traffic["44039E"].latitude == 46.93
+
+
+def test_sourceNamesAreUnique():
+    merger = fusion.SBSFusion(traffic.TrafficMonitor())
+    merger.addSource("roof")
+    try:
+        merger.addSource("roof")
+        assert False
+    except ValueError:
+        pass
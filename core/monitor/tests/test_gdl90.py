@@ -1,6 +1,14 @@
 import monitor.app.gdl90 as gdl
 from contextlib import nullcontext as does_not_raise
+import errno
+import ipaddress
+import json
 import pytest
+import queue
+import random
+import socket
+import threading
+import time
 
 
 def toHexStr(raw: bytes) -> str:
@@ -71,6 +79,52 @@ def test_OnwshipMessage_wellformed():
     assert enc == expected
 
 
+def _trafficMessage(**kwargs):
+    fields = dict(
+        address=0xAB4549,
+        latitude=44.90708,
+        longitude=-122.99488,
+        altitude=5000,
+        trackIndicator=gdl.GDL90MiscellaneousIndicatorTrack.tt_true_track_angle,
+        airborneIndicator=gdl.GDL90MiscellaneousIndicatorAirborne.airborne,
+        navIntegrityCat=10,
+        navAccuracyCat=9,
+        hVelocity=123,
+        trackHeading=45,
+        vVelocity=64,
+        callsign="N825V",
+        emitterCat=gdl.GDL90EmitterCategory.light,
+    )
+    fields.update(kwargs)
+    return gdl.GDL90TrafficMessage(**fields)
+
+
+def test_TrafficEncoderMatchesEncodeTrafficMessage():
+    encoder = gdl.GDL90TrafficEncoder()
+    for msg in [_trafficMessage(), _trafficMessage(altitude=5100, vVelocity=-640), _trafficMessage(callsign="SWR123"), _trafficMessage(address=0x7D7E7D)]:
+        assert encoder.encode(msg) == gdl.encodeTrafficMessage(msg)
+        assert encoder.encode(msg, gdl.GDL90MessageId.OwnshipReport) == gdl.encodeOwnshipMessage(msg)
+
+
+def test_TrafficEncoderReusesUnchangedFrame():
+    encoder = gdl.GDL90TrafficEncoder()
+    frame = encoder.encode(_trafficMessage())
+    assert encoder.encode(_trafficMessage()) is frame
+    assert encoder.encode(_trafficMessage(altitude=6000)) is not frame
+
+
+def test_TrafficEncoderBatch():
+    encoder = gdl.GDL90TrafficEncoder()
+    msgs = [_trafficMessage(address=address, latitude=46.0 + address / 1000) for address in range(1, 20)]
+    batch = encoder.encodeBatch(msgs)
+    assert bytes(batch) == b"".join(gdl.encodeTrafficMessage(msg) for msg in msgs)
+    assert len(encoder.encodeBatch([])) == 0
+
+
+def test_escape():
+    assert gdl._escape(b"\x01\x7e\x02\x7d\x03") == b"\x01\x7d\x5e\x02\x7d\x5d\x03"
+
+
 @pytest.mark.parametrize(
     "track, expectation",
     [
@@ -128,3 +182,255 @@ def test_TrafficMessageTrack(track, expectation):
 #    callsign="N825V",
 #    emitterCat=GDL90EmitterCategory.light,
 #    emergencyCode=GDL90EmergencyCode.no_emergency)
+
+
+def test_OutputQueuePrioritizesHeartbeatAndOwnship():
+    q = gdl.GDL90OutputQueue(maxsize=3)
+    for i in range(5):
+        q.put("traffic{}".format(i), gdl.GDL90OutputQueue.TRAFFIC)
+    q.put("ownship", gdl.GDL90OutputQueue.OWNSHIP)
+    q.put("heartbeat", gdl.GDL90OutputQueue.HEARTBEAT)
+    # full traffic class evicts the oldest reports
+    assert [q.get(timeout=0) for _ in range(5)] == ["heartbeat", "ownship", "traffic2", "traffic3", "traffic4"]
+    with pytest.raises(queue.Empty):
+        q.get(timeout=0)
+    stats = q.asdict()
+    assert stats["traffic"]["dropped"] == 2
+    assert stats["traffic"]["sent"] == 3
+    assert stats["heartbeat"]["sent"] == 1
+    assert stats["heartbeat"]["dropped"] == 0
+    assert q.dropped == 2
+
+
+def test_OutputQueueDiscardsStaleTraffic():
+    q = gdl.GDL90OutputQueue(maxTrafficAge=0.05)
+    q.put("traffic", gdl.GDL90OutputQueue.TRAFFIC)
+    q.put("heartbeat", gdl.GDL90OutputQueue.HEARTBEAT)
+    time.sleep(0.1)
+    assert q.get(timeout=0) == "heartbeat"
+    with pytest.raises(queue.Empty):
+        q.get(timeout=0)
+    assert q.asdict()["traffic"]["expired"] == 1
+    assert q.asdict()["heartbeat"]["maxLatency"] >= 0.1
+
+
+def test_OutputQueueWake():
+    q = gdl.GDL90OutputQueue()
+    waiter = threading.Thread(target=lambda: q.get())
+    waiter.start()
+    q.wake()
+    waiter.join(timeout=1)
+    assert not waiter.is_alive()
+
+
+def test_PortSendsHeartbeatDuringTrafficFlood():
+    port = gdl.GDL90Port("lo", 4000, queueSize=100)
+    for address in range(1000):
+        port.putMessage(_trafficMessage(address=address))
+    heartbeat = gdl.GDL90HeartBeatMessage()
+    port.putMessage(heartbeat)
+    assert port._msgQueue.get(timeout=0) is heartbeat
+    assert port.queueStats["traffic"]["dropped"] == 900
+    assert port.queueStats["heartbeat"]["dropped"] == 0
+
+
+def _receiver():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(2)
+    return receiver, receiver.getsockname()[1]
+
+
+def _startPort(**kwargs):
+    receiver, receiverPort = _receiver()
+    port = gdl.GDL90Port("lo", receiverPort, **kwargs)
+    port._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    port._broadcastSink.setDestination("127.0.0.1", receiverPort)
+    sender = threading.Thread(target=port._send)
+    sender.start()
+    return port, receiver, sender
+
+
+def _stopPort(port, sender):
+    port._stopFlag.set()
+    port._wakeSender()
+    sender.join()
+
+
+def _waitFor(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def _receiveAll(receiver, size):
+    received = b""
+    datagrams = 0
+    while len(received) < size:
+        received += receiver.recv(2000)
+        datagrams += 1
+    return received, datagrams
+
+
+def test_PortPacksQueuedFramesIntoDatagrams():
+    port, receiver, sender = _startPort(maxDatagramSize=100, flushLatency=0.05)
+    msgs = [_trafficMessage(address=address) for address in range(1, 8)]
+    for msg in msgs:
+        port.putMessage(msg)
+    expected = b"".join(gdl.encodeTrafficMessage(msg) for msg in msgs)
+    received = b""
+    datagrams = 0
+    while len(received) < len(expected):
+        data = receiver.recv(2000)
+        assert len(data) <= 100
+        received += data
+        datagrams += 1
+    _waitFor(lambda: port.framesSent == 7)
+    _stopPort(port, sender)
+    assert received == expected
+    assert port.datagramsSent == datagrams
+    assert datagrams == 3
+    assert port.timeToFirstTraffic is not None
+
+
+def test_PortSendsToUnicastSinks():
+    port, broadcastReceiver, sender = _startPort(broadcast=False)
+    receivers = [_receiver() for _ in range(2)]
+    for _, receiverPort in receivers:
+        assert port.addSink("127.0.0.1", receiverPort)
+    assert not port.addSink("127.0.0.1", receivers[0][1])
+    msg = _trafficMessage()
+    port.putMessage(msg)
+    for receiver, _ in receivers:
+        assert receiver.recv(2000) == gdl.encodeTrafficMessage(msg)
+    broadcastReceiver.settimeout(0.1)
+    with pytest.raises(socket.timeout):
+        broadcastReceiver.recv(2000)
+    _waitFor(lambda: port.framesSent == 2)
+    assert [(sink["kind"], sink["port"]) for sink in port.sinks] == [(gdl.GDL90Sink.UNICAST, p) for _, p in receivers]
+    # addresses are normalized like in addSink
+    assert port.removeSink(ipaddress.IPv4Address("127.0.0.1"), receivers[0][1])
+    assert not port.removeSink("127.0.0.1", receivers[0][1])
+    with pytest.raises(ValueError):
+        port.removeSink("127.0.0.256", receivers[1][1])
+    assert len(port.sinks) == 1
+    _stopPort(port, sender)
+
+
+def test_SlowSinkDoesNotStallOthers():
+    blocked = threading.Event()
+    sent = []
+
+    def sendto(datagram, destination):
+        if destination[1] == 1:
+            blocked.wait()
+        sent.append(bytes(datagram))
+
+    slow = gdl.GDL90Sink(gdl.GDL90Sink.UNICAST, "127.0.0.1", 1, sendto, queueSize=2)
+    fast = gdl.GDL90Sink(gdl.GDL90Sink.UNICAST, "127.0.0.1", 2, sendto, queueSize=2)
+    slow.start()
+    fast.start()
+    frames = [gdl.encodeTrafficMessage(_trafficMessage(address=address)) for address in range(1, 11)]
+    for count, frame in enumerate(frames, 1):
+        slow.put(frame, gdl.GDL90OutputQueue.TRAFFIC)
+        fast.put(frame, gdl.GDL90OutputQueue.TRAFFIC)
+        _waitFor(lambda: fast.framesSent == count)
+    assert fast.framesSent == 10
+    assert slow.framesDropped >= 7
+    blocked.set()
+    _waitFor(lambda: slow.framesSent + slow.framesDropped == 10)
+    slow.stop()
+    fast.stop()
+
+
+def test_PortDiscoversSinks():
+    port, broadcastReceiver, sender = _startPort(broadcast=False, discoveryTimeout=0.5)
+    receiver, receiverPort = _receiver()
+    announcer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    announcer.bind(("127.0.0.1", 0))
+    discoveryPort = announcer.getsockname()[1]
+    announcer.close()
+    port.startDiscovery(discoveryPort)
+    announcer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    announcement = json.dumps({"App": "ForeFlight", "GDL90": {"port": receiverPort}}).encode()
+
+    def discovered():
+        announcer.sendto(announcement, ("127.0.0.1", discoveryPort))
+        return len(port.sinks) == 1
+
+    _waitFor(discovered)
+    assert port.sinks[0]["kind"] == gdl.GDL90Sink.DISCOVERED
+    port.putMessage(gdl.GDL90HeartBeatMessage(time=1))
+    assert receiver.recv(2000) == gdl.encodeHeartbeatMessage(gdl.GDL90HeartBeatMessage(time=1))
+    # not announced anymore
+    _waitFor(lambda: len(port.sinks) == 0)
+    port.stopDiscovery()
+    _stopPort(port, sender)
+
+
+def _execPort(linkCheckInterval=0.02, **kwargs):
+    port = gdl.GDL90Port("lo", 4000, linkCheckInterval=linkCheckInterval, initRetryInterval=0.02, **kwargs)
+    threading.Thread(target=port.exec, daemon=True).start()
+    _waitFor(lambda: port.isActive)
+    return port
+
+
+def test_PortRecreatesSocketWhenAddressChanges():
+    port = _execPort(broadcast=False)
+    assert port.broadcastIp == "127.255.255.255"
+    assert port.reinitCount == 0
+    port._ip = "10.0.0.1"
+    _waitFor(lambda: port.reinitCount == 1)
+    _waitFor(lambda: port.isActive)
+    assert port.ip == "127.0.0.1"
+    assert port.lastReinitLatency < 2
+
+
+def test_PortRecreatesSocketOnSendError():
+    port = _execPort(broadcast=False, linkCheckInterval=10)
+    port._socket.close()
+    with pytest.raises(OSError):
+        port._sendto(b"\x7e", ("127.0.0.1", 4000))
+    _waitFor(lambda: port.reinitCount == 1)
+    _waitFor(lambda: port.isActive)
+
+
+class _UnreachableSocket:
+    def sendto(self, datagram, destination):
+        raise OSError(errno.ENETUNREACH, "Network is unreachable")
+
+
+def test_PortIgnoresUnreachableUnicastDestination():
+    port = gdl.GDL90Port("lo", 4000)
+    port._broadcastIp = "127.255.255.255"
+    port._socket = _UnreachableSocket()
+    with pytest.raises(OSError):
+        port._sendto(b"\x7e", ("10.0.0.1", 4000))
+    assert not port._sendFailure.is_set()
+    with pytest.raises(OSError):
+        port._sendto(b"\x7e", ("127.255.255.255", 4000))
+    assert port._sendFailure.is_set()
+
+
+def _crc16Reference(data):
+    # the table driven GDL90 CRC of the ICD, table computed from the polynomial 0x1021
+    table = list()
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021 if crc & 0x8000 else crc << 1) & 0xFFFF
+        table.append(crc)
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) ^ table[crc >> 8] ^ byte) & 0xFFFF
+    return ((crc & 0xFF) << 8) | (crc >> 8)
+
+
+def test_crc16():
+    # heartbeat example of the ICD
+    assert gdl._crc16(bytes([0x00, 0x81, 0x41, 0xDB, 0xD0, 0x08, 0x02])).to_bytes(2, "big") == bytes([0xB3, 0x8B])
+    rnd = random.Random(1)
+    for size in range(40):
+        data = bytes(rnd.randrange(256) for _ in range(size))
+        assert gdl._crc16(data) == _crc16Reference(data)
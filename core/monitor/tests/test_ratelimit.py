@@ -0,0 +1,62 @@
+import monitor.app.ratelimit as ratelimit
+import monitor.app.traffic as traffic
+import monitor.app.sbs as sbs
+from monitor.app.trafficfilter import Ownship
+
+
+class Recorder:
+
+    def __init__(self):
+        self.emitted = list()
+
+    def __call__(self, entry):
+        self.emitted.append((entry.id, entry.altitude))
+
+
+def _setup(**kwargs):
+    monitor = traffic.TrafficMonitor()
+    recorder = Recorder()
+    limiter = ratelimit.TrafficRateLimiter(recorder, interval=1.0, priorityInterval=0.25, **kwargs)
+    monitor.register(limiter)
+    return monitor, limiter, recorder
+
+
+def test_coalescesUpdatesPerAircraft():
+    monitor, limiter, recorder = _setup()
+    monitor.update(sbs.SBSMessage(hexIdent="000001", altitude=1000))
+    limiter.emitDue(100.0)
+    assert recorder.emitted == [(1, 1000)]
+    for altitude in (1100, 1200, 1300):
+        monitor.update(sbs.SBSMessage(hexIdent="000001", altitude=altitude))
+        limiter.emitDue(100.5)
+    assert recorder.emitted == [(1, 1000)]
+    limiter.emitDue(101.0)
+    assert recorder.emitted == [(1, 1000), (1, 1300)]
+    limiter.emitDue(102.0)
+    assert len(recorder.emitted) == 2
+    assert limiter.received == 4
+    assert limiter.emitted == 2
+
+
+def test_prioritizesNewEmergencyAndCloseTraffic():
+    monitor, limiter, recorder = _setup(ownship=lambda: Ownship(46.9, 7.4, 5000))
+    monitor.update(sbs.SBSMessage(hexIdent="000001", altitude=1000, latitude=48.0, longitude=7.4))
+    monitor.update(sbs.SBSMessage(hexIdent="000002", altitude=2000, latitude=48.0, longitude=7.4))
+    monitor.update(sbs.SBSMessage(hexIdent="000003", altitude=3000, latitude=48.0, longitude=7.4))
+    limiter.emitDue(100.0)
+    monitor.update(sbs.SBSMessage(hexIdent="000001", altitude=1100))
+    monitor.update(sbs.SBSMessage(hexIdent="000002", altitude=2100, squawk=7700))
+    monitor.update(sbs.SBSMessage(hexIdent="000003", altitude=3100, latitude=46.91, longitude=7.4))
+    monitor.update(sbs.SBSMessage(hexIdent="000004", altitude=4000))
+    limiter.emitDue(100.3)
+    assert recorder.emitted[3:] == [(4, 4000), (2, 2100), (3, 3100)]
+    limiter.emitDue(101.0)
+    assert recorder.emitted[6:] == [(1, 1100)]
+
+
+def test_forgetsExpiredTraffic():
+    monitor, limiter, recorder = _setup()
+    monitor.update(sbs.SBSMessage(hexIdent="000001", altitude=1000))
+    limiter.notifyExpired(monitor.traffic["000001"])
+    limiter.emitDue(100.0)
+    assert recorder.emitted == []
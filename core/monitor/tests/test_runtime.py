@@ -0,0 +1,80 @@
+import monitor.app.runtime as runtime
+import monitor.app.traffic as traffic
+import monitor.app.sbs as sbs
+import threading
+import time
+import pytest
+
+
+@pytest.fixture
+def rt():
+    rt = runtime.MonitorRuntime()
+    rt.start()
+    yield rt
+    rt.stop()
+
+
+def _waitFor(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_periodicJobRunsAtFixedRate(rt):
+    calls = list()
+    job = rt.callEvery(0.02, lambda: calls.append(rt.loop.time()), delay=0)
+    _waitFor(lambda: len(calls) >= 10)
+    job.cancel()
+    # fixed rate, the ticks do not drift with the duration of the calls
+    for i, t in enumerate(calls[:10]):
+        assert t == pytest.approx(calls[0] + i * 0.02, abs=0.015)
+    count = len(calls)
+    time.sleep(0.1)
+    assert len(calls) <= count + 1
+
+
+def test_periodicJobSkipsMissedTicks(rt):
+    def slow():
+        time.sleep(0.05)
+
+    job = rt.callEvery(0.01, slow, delay=0)
+    _waitFor(lambda: job.runs >= 3)
+    job.cancel()
+    assert job.skipped >= 2 * (job.runs - 1)
+
+
+def test_periodicJobContinuesAfterException(rt):
+    calls = list()
+
+    def fail():
+        calls.append(1)
+        raise ValueError("job failed")
+
+    job = rt.callEvery(0.01, fail, delay=0)
+    _waitFor(lambda: len(calls) >= 3)
+    job.cancel()
+
+
+def test_executorRunsOnLoopThread(rt):
+    future = rt.executor.submit(lambda x: (x, threading.current_thread().name), 42)
+    assert future.result(1) == (42, "MonitorRuntime")
+    future = rt.executor.submit(lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        future.result(1)
+
+
+def test_workerDoesNotDelayLoop(rt):
+    blocked = threading.Event()
+    future = rt.workerExecutor.submit(lambda: (blocked.wait(1), threading.current_thread().name)[1])
+    assert rt.executor.submit(lambda: 42).result(1) == 42
+    blocked.set()
+    assert future.result(1).startswith("MonitorWorker")
+
+
+def test_trafficAutoCleanupAsJob(rt):
+    monitor = traffic.TrafficMonitor(timeout=0, cleanupInterval=0.02, scheduler=rt)
+    monitor.update(sbs.SBSMessage(hexIdent="000001"))
+    monitor.startAutoCleanup()
+    _waitFor(lambda: len(monitor.traffic) == 0)
+    monitor.stopAutoCleanup()
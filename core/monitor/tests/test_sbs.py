@@ -0,0 +1,36 @@
+import monitor.app.sbs as sbs
+from datetime import datetime
+import pytest
+
+
+POSITION_MSG = "MSG,3,1,1,44039E,1,2023/10/26,07:20:11.481,2023/10/26,07:20:11.491,,30500,,,46.91222,7.49917,,,0,,0,0"
+IDENT_MSG = "MSG,1,1,1,4B1A2C,1,2023/10/26,07:20:12.001,2023/10/26,07:20:12.002,SWR123  ,,,,,,,,,,,"
+
+
+@pytest.mark.parametrize("line", [POSITION_MSG, IDENT_MSG])
+def test_parseTrafficMatchesParse(line):
+    full = sbs.SBSReader.parse(line)
+    fast = sbs.SBSReader.parseTraffic(line)
+    for field in sbs.SBSTrafficMessage.__slots__:
+        if field == "messageGeneratedDateTime":
+            continue
+        assert getattr(fast, field) == getattr(full, field), field
+    assert fast.messageGeneratedDateTime is None
+
+
+def test_parseTrafficWithDates():
+    msg = sbs.SBSReader.parseTraffic(POSITION_MSG, parseDates=True)
+    assert msg.messageGeneratedDateTime == datetime(2023, 10, 26, 7, 20, 11, 481000)
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "MSG,3,1,1,44039E",
+        "XYZ,3,1,1,44039E,1,2023/10/26,07:20:11.481,2023/10/26,07:20:11.491,,30500,,,,,,,0,,0,0",
+        "MSG,9,1,1,44039E,1,2023/10/26,07:20:11.481,2023/10/26,07:20:11.491,,30500,,,,,,,0,,0,0",
+    ],
+)
+def test_parseTrafficInvalid(line):
+    with pytest.raises(sbs.SBSParseError):
+        sbs.SBSReader.parseTraffic(line)
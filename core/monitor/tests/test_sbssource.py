@@ -0,0 +1,68 @@
+import socket
+import time
+import monitor.app.sbssource as sbssource
+import monitor.app.traffic as traffic
+
+LINES = [
+    b"MSG,3,1,1,44039E,1,2023/10/26,07:20:11.481,2023/10/26,07:20:11.491,,30500,,,46.91222,7.49917,,,0,,0,0\r\n",
+    b"MSG,4,1,1,44039E,1,2023/10/26,07:20:11.512,2023/10/26,07:20:11.520,,,452,273,,,-640,,,,,0\r\n",
+    b"MSG,5,1,1,3C6586,1,2023/10/26,07:20:11.530,2023/10/26,07:20:11.541,,37000,,,,,,,0,,0,0\r\n",
+    b"garbage\r\n",
+]
+
+
+def _waitFor(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def _server():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    return server
+
+
+def test_sourceFeedsTrafficMonitor():
+    server = _server()
+    monitor = traffic.TrafficMonitor()
+    source = sbssource.SBSTcpSource("127.0.0.1", server.getsockname()[1], monitor, reconnectInterval=0.1)
+    source.start()
+    conn, _ = server.accept()
+    data = b"".join(LINES)
+    # split within a line
+    conn.sendall(data[:50])
+    time.sleep(0.05)
+    conn.sendall(data[50:])
+    _waitFor(lambda: source.messages == 3)
+    assert monitor.traffic["44039E"].altitude == 30500
+    assert monitor.traffic["44039E"].groundSpeed == 452
+    assert monitor.traffic["3C6586"].altitude == 37000
+    stats = source.asdict()
+    assert stats["isConnected"] is True
+    assert stats["parseErrors"] == 1
+    assert stats["bytesReceived"] == len(data)
+    source.stop()
+    conn.close()
+    server.close()
+
+
+def test_sourceReconnects():
+    server = _server()
+    monitor = traffic.TrafficMonitor()
+    source = sbssource.SBSTcpSource("127.0.0.1", server.getsockname()[1], monitor, reconnectInterval=0.1)
+    source.start()
+    conn, _ = server.accept()
+    conn.sendall(LINES[0])
+    _waitFor(lambda: source.messages == 1)
+    conn.close()
+    conn, _ = server.accept()
+    conn.sendall(LINES[2])
+    _waitFor(lambda: source.messages == 2)
+    assert source.asdict()["connects"] == 2
+    source.stop()
+    conn.close()
+    server.close()
@@ -0,0 +1,33 @@
+import monitor.app.spatial as spatial
+import pytest
+
+
+def test_distanceNm():
+    # one degree of latitude is 60 nm
+    assert spatial.distanceNm(46.0, 7.0, 47.0, 7.0) == pytest.approx(60.0, rel=0.01)
+    assert spatial.distanceNm(46.0, 7.0, 46.0, 7.0) == 0
+    assert spatial.distanceNm(0.0, 179.5, 0.0, -179.5) == pytest.approx(60.0, rel=0.01)
+
+
+def test_boundingBoxCrossesAntimeridian():
+    south, west, north, east = spatial.boundingBox(0.0, 179.9, 30)
+    assert south == pytest.approx(-0.5)
+    assert north == pytest.approx(0.5)
+    assert west > east
+
+
+def test_gridIndexCandidates():
+    index = spatial.GridIndex(cellSize=1.0)
+    index.update("A", 46.5, 7.5)
+    index.update("B", 48.5, 7.5)
+    index.update("C", 0.5, 179.5)
+    index.update("D", 0.5, -179.5)
+    assert sorted(index.candidates(46.0, 7.0, 47.0, 8.0)) == ["A"]
+    assert sorted(index.candidates(0.0, 179.0, 1.0, -179.0)) == ["C", "D"]
+    index.update("A", 48.2, 7.2)
+    assert sorted(index.candidates(48.0, 7.0, 48.9, 7.9)) == ["A", "B"]
+    index.update("B", None, None)
+    index.remove("C")
+    assert "B" not in index
+    assert len(index) == 2
+    assert sorted(index.candidates(-90.0, -180.0, 90.0, 179.9)) == ["A", "D"]
@@ -1,3 +1,6 @@
+import json
+import time
+import threading
 import monitor.app.traffic as traffic
 import monitor.app.sbs as sbs
 
@@ -8,3 +11,189 @@ def test_updateTrafficMonitor():
     monitor.update(msg)
     assert "AABBCC" in monitor.traffic.keys()
     assert "ABCDEFGH" == monitor.traffic["AABBCC"].callsign
+
+
+class RecordingObserver:
+
+    def __init__(self):
+        self.notified = list()
+
+    def notify(self, entry):
+        self.notified.append(entry.id)
+
+
+def test_updateBatchNotifiesOncePerAircraft():
+    monitor = traffic.TrafficMonitor()
+    observer = RecordingObserver()
+    monitor.register(observer)
+    monitor.updateBatch([
+        sbs.SBSMessage(hexIdent="AABBCC", altitude=1000),
+        sbs.SBSMessage(hexIdent="112233", altitude=2000),
+        sbs.SBSMessage(hexIdent="AABBCC", latitude=46.9, longitude=7.5),
+    ])
+    assert observer.notified == [0xAABBCC, 0x112233]
+    entry = monitor.traffic["AABBCC"]
+    assert entry.altitude == 1000
+    assert entry.latitude == 46.9
+    assert entry.msgCount == 2
+
+
+def test_trafficBatcherFlushesAfterLatency():
+    monitor = traffic.TrafficMonitor()
+    batcher = traffic.TrafficBatcher(monitor, maxLatency=0.01)
+    batcher.put(sbs.SBSMessage(hexIdent="AABBCC", altitude=1000))
+    batcher.put(sbs.SBSMessage(hexIdent="AABBCC", altitude=1100))
+    for _ in range(100):
+        if "AABBCC" in monitor.traffic:
+            break
+        time.sleep(0.01)
+    assert monitor.traffic["AABBCC"].altitude == 1100
+
+
+def test_trafficSnapshotIsNotModifiedByUpdates():
+    monitor = traffic.TrafficMonitor()
+    monitor.update(sbs.SBSMessage(hexIdent="AABBCC", altitude=1000))
+    snapshot = monitor.traffic
+    assert monitor.traffic is snapshot
+    monitor.update(sbs.SBSMessage(hexIdent="AABBCC", altitude=2000))
+    monitor.update(sbs.SBSMessage(hexIdent="112233", altitude=3000))
+    assert snapshot["AABBCC"].altitude == 1000
+    assert "112233" not in snapshot
+    assert monitor.traffic["AABBCC"].altitude == 2000
+    assert monitor.traffic["AABBCC"].msgCount == 2
+
+
+def test_trafficEntryAsDict():
+    monitor = traffic.TrafficMonitor()
+    monitor.update(sbs.SBSMessage(hexIdent="AABBCC", callsign="ABCDEFGH", altitude=1000, verticalRate=-640))
+    data = monitor.traffic["AABBCC"].asdict()
+    assert data["id"] == 0xAABBCC
+    assert data["callsign"] == "ABCDEFGH"
+    assert data["altitude"] == 1000
+    assert data["verticalSpeed"] == -640
+    assert data["category"] == traffic.TrafficCategory.no_info
+    assert data["msgCount"] == 1
+    assert len(data["lastSeen"].split(":")) == 3
+    assert json.loads(json.dumps(data))["id"] == 0xAABBCC
+
+
+def test_setDatabaseEnrichesExistingEntries():
+    monitor = traffic.TrafficMonitor()
+    observer = RecordingObserver()
+    monitor.register(observer)
+    monitor.update(sbs.SBSMessage(hexIdent="44039E", callsign="BEL7PC"))
+    assert monitor.traffic["44039E"].type is None
+    monitor.setDatabase({"44039E": ["OO-SNA", "A320", "00"]}, {"A320": ["AIRBUS A-320", "L2J", "M"]}, 1, {"A320": [3]})
+    entry = monitor.traffic["44039E"]
+    assert entry.callsign == "OO-SNA"
+    assert entry.type == "A320"
+    assert entry.name == "AIRBUS A-320"
+    assert entry.category == traffic.TrafficCategory.large
+    assert observer.notified == [0x44039E, 0x44039E]
+    monitor.update(sbs.SBSMessage(hexIdent="AABBCC", callsign="ABCDEFGH"))
+    assert monitor.traffic["AABBCC"].callsign == "ABCDEFGH"
+
+
+def test_entryLookedUpWhileDatabaseIsSetIsEnriched():
+    monitor = traffic.TrafficMonitor()
+    typeLookUp = monitor._typeLookUp
+
+    def setDuringLookUp(type):
+        # the databases are set after the aircraft was looked up without them
+        monitor._aircraftsDb = {"44039E": ["OO-SNA", "A320", "00"]}
+        return typeLookUp(type)
+
+    monitor._typeLookUp = setDuringLookUp
+    monitor.update(sbs.SBSMessage(hexIdent="44039E", callsign="BEL7PC"))
+    monitor._typeLookUp = typeLookUp
+    assert monitor.traffic["44039E"].type is None
+    monitor.setDatabase({"44039E": ["OO-SNA", "A320", "00"]}, {"A320": ["AIRBUS A-320", "L2J", "M"]}, 1, {"A320": [3]})
+    assert monitor.traffic["44039E"].type == "A320"
+
+
+def test_cleanupRemovesOnlyExpiredEntries():
+    monitor = traffic.TrafficMonitor(timeout=0.2)
+    observer = RecordingObserver()
+    observer.expired = list()
+    observer.notifyExpired = lambda entry: observer.expired.append(entry.id)
+    monitor.register(observer)
+    monitor.update(sbs.SBSMessage(hexIdent="AABBCC"))
+    monitor.update(sbs.SBSMessage(hexIdent="112233"))
+    time.sleep(0.12)
+    monitor.update(sbs.SBSMessage(hexIdent="112233"))
+    time.sleep(0.12)
+    monitor.cleanup()
+    assert list(monitor.traffic.keys()) == ["112233"]
+    assert observer.expired == [0xAABBCC]
+    time.sleep(0.12)
+    monitor.cleanup()
+    assert len(monitor.traffic) == 0
+    assert observer.expired == [0xAABBCC, 0x112233]
+
+
+def test_concurrentUpdatesOfShardedTraffic():
+    monitor = traffic.TrafficMonitor(shardCount=4)
+    hexIdents = ["{:06X}".format(i) for i in range(40)]
+
+    def ingest():
+        for hexIdent in hexIdents:
+            monitor.update(sbs.SBSMessage(hexIdent=hexIdent, altitude=1000))
+            monitor.traffic
+
+    threads = [threading.Thread(target=ingest) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    snapshot = monitor.traffic
+    assert sorted(snapshot.keys()) == hexIdents
+    assert all(entry.msgCount == 4 for entry in snapshot.values())
+
+
+def _populatePositions(monitor):
+    monitor.updateBatch([
+        sbs.SBSMessage(hexIdent="000001", latitude=46.95, longitude=7.45, altitude=3000),
+        sbs.SBSMessage(hexIdent="000002", latitude=47.05, longitude=7.45, altitude=5000),
+        sbs.SBSMessage(hexIdent="000003", latitude=47.45, longitude=8.55, altitude=3500),
+        sbs.SBSMessage(hexIdent="000004", altitude=3000),
+    ])
+
+
+def test_trafficInRadius():
+    monitor = traffic.TrafficMonitor()
+    _populatePositions(monitor)
+    assert [e.id for e in monitor.trafficInRadius(46.95, 7.45, 10)] == [1, 2]
+    assert [e.id for e in monitor.trafficInRadius(46.95, 7.45, 100)] == [1, 2, 3]
+    assert [e.id for e in monitor.trafficInRadius(46.95, 7.45, 100, altitude=3000, altitudeBand=1000)] == [1, 3]
+    monitor.update(sbs.SBSMessage(hexIdent="000003", latitude=46.96, longitude=7.45))
+    assert [e.id for e in monitor.trafficInRadius(46.95, 7.45, 10)] == [1, 3, 2]
+
+
+def test_trafficInBoundingBox():
+    monitor = traffic.TrafficMonitor()
+    _populatePositions(monitor)
+    assert sorted(e.id for e in monitor.trafficInBoundingBox(46.9, 7.4, 47.1, 7.5)) == [1, 2]
+    assert sorted(e.id for e in monitor.trafficInBoundingBox(46.9, 7.4, 47.1, 7.5, altitude=5000, altitudeBand=0)) == [2]
+
+
+def test_nearestTraffic():
+    monitor = traffic.TrafficMonitor()
+    _populatePositions(monitor)
+    assert [e.id for e in monitor.nearestTraffic(47.4, 8.5, 2)] == [3, 2]
+    assert [e.id for e in monitor.nearestTraffic(-30.0, 100.0, 10)] == [3, 1, 2]
+
+
+def test_queriedEntriesAreNotModifiedByUpdates():
+    monitor = traffic.TrafficMonitor()
+    _populatePositions(monitor)
+    entry = monitor.nearestTraffic(46.95, 7.45, 1)[0]
+    monitor.update(sbs.SBSMessage(hexIdent="000001", altitude=4000))
+    assert entry.altitude == 3000
+    assert monitor.nearestTraffic(46.95, 7.45, 1)[0].altitude == 4000
+
+
+def test_cleanupRemovesEntriesFromSpatialIndex():
+    monitor = traffic.TrafficMonitor(timeout=0)
+    _populatePositions(monitor)
+    monitor.cleanup()
+    assert monitor.trafficInRadius(46.95, 7.45, 100) == []
@@ -0,0 +1,53 @@
+import monitor.app.trafficfilter as trafficfilter
+import monitor.app.traffic as traffic
+import monitor.app.sbs as sbs
+from monitor.app.positioning import PosInfo
+import pytest
+
+
+def _entry(**kwargs):
+    monitor = traffic.TrafficMonitor()
+    monitor.update(sbs.SBSMessage(hexIdent="AABBCC", **kwargs))
+    return monitor.traffic["AABBCC"]
+
+
+def test_ownshipPrefersPressureAltitude():
+    posInfo = PosInfo()
+    posInfo["latitude"] = 46.9
+    posInfo["longitude"] = 7.4
+    posInfo["altitudeMeter"] = 1000.0
+    assert trafficfilter.Ownship.fromPosInfo(posInfo).altitude == pytest.approx(3280.84)
+    posInfo["pressureAltitude"] = 1100.0
+    ownship = trafficfilter.Ownship.fromPosInfo(posInfo)
+    assert ownship.altitude == pytest.approx(3608.924)
+    assert (ownship.latitude, ownship.longitude) == (46.9, 7.4)
+
+
+def test_pipelineWithoutOwnshipAcceptsAll():
+    pipeline = trafficfilter.TrafficFilterPipeline()
+    pipeline.setFilter(trafficfilter.RangeFilter(10))
+    pipeline.setFilter(trafficfilter.AltitudeFilter(2000))
+    assert pipeline.accept(_entry(latitude=50.0, longitude=10.0, altitude=30000))
+
+
+def test_pipelineRangeAndAltitude():
+    pipeline = trafficfilter.TrafficFilterPipeline()
+    pipeline.updateOwnship(trafficfilter.Ownship(46.9, 7.4, 5000))
+    pipeline.setFilter(trafficfilter.RangeFilter(10))
+    pipeline.setFilter(trafficfilter.AltitudeFilter(2000))
+    assert pipeline.accept(_entry(latitude=46.95, longitude=7.45, altitude=6000))
+    assert not pipeline.accept(_entry(latitude=46.95, longitude=7.45, altitude=8000))
+    assert not pipeline.accept(_entry(latitude=47.9, longitude=7.4, altitude=5000))
+    assert pipeline.accept(_entry(altitude=5000))
+    pipeline.setFilter(trafficfilter.NoPositionFilter())
+    assert not pipeline.accept(_entry(altitude=5000))
+    pipeline.removeFilter(trafficfilter.AltitudeFilter.name)
+    assert pipeline.accept(_entry(latitude=46.95, longitude=7.45, altitude=8000))
+    assert pipeline.asdict() == {"noPosition": {}, "range": {"radius": 10}}
+
+
+def test_pipelineCallsign():
+    pipeline = trafficfilter.TrafficFilterPipeline()
+    pipeline.setFilter(trafficfilter.CallsignFilter("HBABC"))
+    assert not pipeline.accept(_entry(callsign="HBABC"))
+    assert pipeline.accept(_entry(callsign="HBXYZ"))
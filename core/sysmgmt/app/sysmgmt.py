@@ -2,7 +2,6 @@ import logging as log
 import atexit
 import os
 import uuid
-import time
 import sysinfo
 import threading
 from copy import deepcopy
@@ -12,9 +11,11 @@ import json
 try:
     import common.mqtt as mqtt
     import common.util as util
+    from common.scheduler import Scheduler
 except ImportError:
     import mqtt
     import util
+    from scheduler import Scheduler
 
 
 def onExit(mqClient):
@@ -23,17 +24,21 @@ def onExit(mqClient):
         mqClient.disconnect()
 
 
+def publishSystemInfo(messenger, publishTopic, wifiManager):
+    system = dict()
+    system["wifi"] = wifiManager.wifi
+    system["wifilist"] = list(wifiManager.wifiEntries.values())
+    system["resources"] = sysinfo.Resources.parseMemInfo(sysinfo.Resources.getMemInfoFromProcfs())
+    system["resources"]["cpuTemp"] = sysinfo.Resources.parseCpuTemperature(sysinfo.Resources.getCpuTempFromSysfs())
+    system["resources"]["cpuUsage"] = sysinfo.Resources.parseCpuUsage(sysinfo.Resources.getStatFromProcfs())
+    messenger.sendNotification(publishTopic, json.dumps(system))
+
+
 def runPeriodicPublish(messenger, publishTopic, wifiManager):
     intervalSeconds = 1
-    while True:
-        system = dict()
-        system["wifi"] = wifiManager.wifi
-        system["wifilist"] = list(wifiManager.wifiEntries.values())
-        system["resources"] = sysinfo.Resources.parseMemInfo(sysinfo.Resources.getMemInfoFromProcfs())
-        system["resources"]["cpuTemp"] = sysinfo.Resources.parseCpuTemperature(sysinfo.Resources.getCpuTempFromSysfs())
-        system["resources"]["cpuUsage"] = sysinfo.Resources.parseCpuUsage(sysinfo.Resources.getStatFromProcfs())
-        messenger.sendNotification(publishTopic, json.dumps(system))
-        time.sleep(intervalSeconds)
+    scheduler = Scheduler("SystemInfoPublisher")
+    scheduler.callEvery(intervalSeconds, lambda: publishSystemInfo(messenger, publishTopic, wifiManager), "publishSystemInfo", delay=0)
+    scheduler.run()
 
 
 class WifiEntry(dict):
@@ -66,8 +71,9 @@ class WifiManager:
         self._updateWifiEntriesFromWpaSupplicantConfig()
         self._iwLock = threading.Lock()
         self._propertyLock = threading.Lock()
-        self._timerWifiList = threading.Timer(0, self._getWifiList)
-        self._timerWifiConfig = threading.Timer(0, self._getWifiConfig)
+        # iwlist blocks for seconds, scans do not delay the publishing of system info
+        self._scanner = Scheduler("WifiScanner")
+        self._scanJobs = list()
 
     @property
     def wifi(self):
@@ -81,13 +87,16 @@ class WifiManager:
 
     def startScanning(self):
         with self._iwLock:
-            self._timerWifiList.start()
-            self._timerWifiConfig.start()
+            if len(self._scanJobs) == 0:
+                self._scanJobs.append(self._scanner.callEvery(10, self._getWifiList, "getWifiList", delay=0))
+                self._scanJobs.append(self._scanner.callEvery(3, self._getWifiConfig, "getWifiConfig", delay=0))
+                self._scanner.start()
 
     def stopScanning(self):
         with self._iwLock:
-            self._timerWifiList.cancel()
-            self._timerWifiConfig.cancel()
+            for job in self._scanJobs:
+                job.cancel()
+            self._scanJobs.clear()
 
     def addWifiNetwork(self, ssid, psk):
         if ssid in self._wifiEntries.keys():
@@ -199,8 +208,6 @@ class WifiManager:
 
     def _getWifiList(self):
         with self._iwLock:
-            self._timerWifiList = threading.Timer(10, self._getWifiList)
-            self._timerWifiList.start()
             try:
                 wifilist = sysinfo.Wifi.parseIwList(sysinfo.Wifi.getIwList(self._iface))
                 self._updateWifiEntriesIwListResult(wifilist)
@@ -209,8 +216,6 @@ class WifiManager:
 
     def _getWifiConfig(self):
         with self._iwLock:
-            self._timerWifiConfig = threading.Timer(3, self._getWifiConfig)
-            self._timerWifiConfig.start()
             wifi = sysinfo.Wifi.parseIwConfig(sysinfo.Wifi.getIwConfig(self._iface))
             self._updateWifiEntriesFromIwConfigResult(wifi)
             with self._propertyLock:
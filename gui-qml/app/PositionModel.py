@@ -25,6 +25,7 @@ class PositionModel(QObject):
         self._humidity = None
         self._pressure = None
         self._pressureAltitude = None
+        self._position = None
 
     @pyqtProperty(QVariant, notify=positionChanged)
     def navMode(self):
@@ -98,8 +99,16 @@ class PositionModel(QObject):
     def pressureAltitude(self):
         return self._pressureAltitude
 
+    @pyqtSlot(QVariant)
+    def onPositionDeltaReceived(self, delta):
+        if self._position is None:
+            return
+        self._position.update(delta["changed"])
+        self.onPositionUpdated(self._position)
+
     @pyqtSlot(QVariant)
     def onPositionUpdated(self, position):
+        self._position = dict(position)
         self._navMode = position["navMode"]
         self._opMode = position["opMode"]
         self._pdop = position["pdop"]
@@ -14,6 +14,15 @@ class SatellitesModel(QAbstractListModel):
     PrnRole = roles.getNextRoleId()
     MaxCno = roles.getNextRoleId()
 
+    # roles of satellite fields which can change
+    _fieldRoles = {
+        "elevation": ElevationRole,
+        "azimuth": AzimuthRole,
+        "cno": CnoRole,
+        "used": IsUsedRole,
+        "prn": PrnRole,
+    }
+
     def __init__(self, parent=None):
         QObject.__init__(self, parent)
         self._satellites = []
@@ -84,6 +93,21 @@ class SatellitesModel(QAbstractListModel):
             if oldSvId not in svids:
                 self._removeSatellite(oldSvId)
 
+    @pyqtSlot(QVariant)
+    def onSatellitesDeltaReceived(self, delta):
+        svids = self.svids
+        for sat in delta["added"]:
+            if sat["svid"] in svids:
+                self._updateSatellite(sat)
+            else:
+                self._addSatellite(sat)
+        for fields in delta["changed"]:
+            if fields["svid"] in svids:
+                self._changeSatellite(fields)
+        for svid in delta["removed"]:
+            if svid in svids:
+                self._removeSatellite(svid)
+
     def _addSatellite(self, sat):
         log.debug("add satellite {}".format(sat["svid"]))
         sat["maxCno"] = sat["cno"]
@@ -128,6 +152,23 @@ class SatellitesModel(QAbstractListModel):
         self.dataChanged.emit(ix, ix, changedRoles)
         self.countChanged.emit()
 
+    def _changeSatellite(self, fields):
+        row = self._rowFromSvId(fields["svid"])
+        ix = self.index(row, 0)
+        sat = self._satellites[row]
+        changedRoles = []
+        for field, value in fields.items():
+            if field in SatellitesModel._fieldRoles:
+                sat[field] = value
+                changedRoles.append(SatellitesModel._fieldRoles[field])
+        if "cno" in fields and fields["cno"] is not None:
+            if sat["maxCno"] is None or fields["cno"] > sat["maxCno"]:
+                sat["maxCno"] = fields["cno"]
+                changedRoles.append(SatellitesModel.MaxCno)
+        log.debug("change satellite {}".format(fields["svid"]))
+        self.dataChanged.emit(ix, ix, changedRoles)
+        self.countChanged.emit()
+
     def _removeSatellite(self, svid):
         log.debug("remove satellite {}".format(svid))
         row = self._rowFromSvId(svid)
@@ -48,6 +48,8 @@ class TrafficModel(QAbstractListModel):
         self._monitorCtrlTopic = monitorCtrlTopic
         self._trafficEntries = []
         self._aircraftImagesPath = aircraftImagesPath
+        # roles by traffic entry field, the role names are the field names
+        self._fieldRoles = {name.decode(): role for role, name in self.roleNames().items()}
         self._timer = QTimer(self)
         self._timer.timeout.connect(self._updateLastSeenSeconds)
         self._timer.setInterval(1000)
@@ -159,6 +161,21 @@ class TrafficModel(QAbstractListModel):
             if oldId not in ids:
                 self._removeTrafficEntry(oldId)
 
+    @pyqtSlot(QVariant)
+    def onTrafficDeltaReceived(self, delta):
+        ids = self.ids
+        for entry in delta["added"]:
+            if entry["id"] in ids:
+                self._updateTrafficEntry(entry)
+            else:
+                self._addTrafficEntry(entry)
+        for fields in delta["changed"]:
+            if fields["id"] in ids:
+                self._changeTrafficEntry(fields)
+        for id in delta["removed"]:
+            if id in ids:
+                self._removeTrafficEntry(id)
+
     def _sendRequest(self, request, topic):
         try:
             response = self._messenger.sendRequestAndWait(topic, request)
@@ -254,6 +271,26 @@ class TrafficModel(QAbstractListModel):
             log.debug("update traffic entry {}".format(entry["id"]))
         self.dataChanged.emit(ix, ix, changedRoles)
 
+    def _changeTrafficEntry(self, fields):
+        row = self._rowFromId(fields["id"])
+        ix = self.index(row, 0)
+        entry = self._trafficEntries[row]
+        changedRoles = []
+        for field, value in fields.items():
+            if field in self._fieldRoles and field != "id":
+                entry[field] = value if field != "category" else self._getCategoryName(value)
+                changedRoles.append(self._fieldRoles[field])
+        if "type" in fields:
+            entry["imageSourcePath"] = self._getImageSourcePath(entry["type"])
+            changedRoles.append(TrafficModel.ImageSourcePathRole)
+        if "lastSeen" in fields:
+            entry["lastSeenSeconds"] = self._getLastSeenSeconds(entry["lastSeen"])
+            entry["lastSeenDeltaTime"] = time.strftime("%H:%M:%S", time.gmtime(entry["lastSeenSeconds"])).replace("00h", "")
+            changedRoles.append(TrafficModel.LastSeenSecondsRole)
+            changedRoles.append(TrafficModel.LastSeenDeltaTimeRole)
+        log.debug("change traffic entry {}".format(fields["id"]))
+        self.dataChanged.emit(ix, ix, changedRoles)
+
     def _removeTrafficEntry(self, id):
         log.debug("remove traffic entry {}".format(id))
         row = self._rowFromId(id)
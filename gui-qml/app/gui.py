@@ -9,7 +9,9 @@ from SystemModel import SystemModel
 from TrafficModel import TrafficModel
 from KeyboardController import KeyboardController
 from WifiSettingsModel import WifiSettingsModel
-import json
+import logging as log
+import threading
+import time
 
 try:
     try:
@@ -26,40 +28,98 @@ except ImportError:
 
 class MessageDispatcher(QObject):
     """
-    parse and dispatch incoming mqtt messages to correct receiver
+    dispatch incoming mqtt messages, decoded by the codec of their topic, to correct receiver.
+    Traffic, satellites and position are published as full lists or as snapshot followed by deltas.
+    Deltas are only dispatched in sequence, after a gap a snapshot is requested and deltas are dropped until it arrives.
     """
 
     satellitesUpdated = pyqtSignal(QVariant)
+    satellitesDeltaReceived = pyqtSignal(QVariant)
     positionUpdated = pyqtSignal(QVariant)
+    positionDeltaReceived = pyqtSignal(QVariant)
     trafficEntriesUpdated = pyqtSignal(QVariant)
+    trafficDeltaReceived = pyqtSignal(QVariant)
     statusUpdated = pyqtSignal(QVariant)
     systemUpdated = pyqtSignal(QVariant)
     wifilistUpdated = pyqtSignal(QVariant)
 
-    def __init__(self, parent=None):
+    def __init__(self, snapshotRequestInterval=3, parent=None):
         QObject.__init__(self, parent)
-
-    def updateSatellites(self, msg):
-        satellites = json.loads(msg)
-        self.satellitesUpdated.emit(satellites)
-
-    def updatePosition(self, msg):
-        position = json.loads(msg)
-        self.positionUpdated.emit(position)
-
-    def updateTraffic(self, msg):
-        entries = json.loads(msg)
-        self.trafficEntriesUpdated.emit(entries)
-
-    def updateSystem(self, msg):
-        system = json.loads(msg)
+        self._messenger = None
+        self._snapshotTopic = None
+        self._snapshotRequestInterval = snapshotRequestInterval
+        self._lastSnapshotRequest = None
+        # sequence number of the last dispatched message by topic, None until a snapshot was received
+        self._seq = dict()
+        self._lock = threading.Lock()
+
+    def setMessenger(self, messenger, snapshotTopic):
+        """
+        messenger used to request snapshots on `snapshotTopic`
+        """
+        self._messenger = messenger
+        self._snapshotTopic = snapshotTopic
+
+    def updateSatellites(self, satellites):
+        if isinstance(satellites, list):
+            self.satellitesUpdated.emit(satellites)
+            return
+        with self._lock:
+            if self._inSequence("satellites", satellites):
+                if satellites["type"] == "snapshot":
+                    self.satellitesUpdated.emit(satellites["entries"])
+                else:
+                    self.satellitesDeltaReceived.emit(satellites)
+
+    def updatePosition(self, position):
+        if "seq" not in position:
+            self.positionUpdated.emit(position)
+            return
+        with self._lock:
+            if self._inSequence("position", position):
+                if position["type"] == "snapshot":
+                    self.positionUpdated.emit(position["entry"])
+                else:
+                    self.positionDeltaReceived.emit(position)
+
+    def updateTraffic(self, entries):
+        if isinstance(entries, list):
+            self.trafficEntriesUpdated.emit(entries)
+            return
+        with self._lock:
+            if self._inSequence("traffic", entries):
+                if entries["type"] == "snapshot":
+                    self.trafficEntriesUpdated.emit(entries["entries"])
+                else:
+                    self.trafficDeltaReceived.emit(entries)
+
+    def updateSystem(self, system):
         self.systemUpdated.emit(system)
         self.wifilistUpdated.emit(system)
 
-    def updateStatus(self, msg):
-        status = json.loads(msg)
+    def updateStatus(self, status):
         self.statusUpdated.emit(status)
 
+    def _inSequence(self, name, msg):
+        lastSeq = self._seq.get(name)
+        if msg["type"] == "snapshot" or (lastSeq is not None and msg["seq"] == lastSeq + 1):
+            self._seq[name] = msg["seq"]
+            return True
+        log.debug("{} delta {} out of sequence, last {}".format(name, msg["seq"], lastSeq))
+        self._seq[name] = None
+        self._requestSnapshot()
+        return False
+
+    def _requestSnapshot(self):
+        now = time.monotonic()
+        if self._messenger is None:
+            return
+        if self._lastSnapshotRequest is not None and now - self._lastSnapshotRequest < self._snapshotRequestInterval:
+            return
+        self._lastSnapshotRequest = now
+        log.info("request snapshot")
+        self._messenger.sendRequest(self._snapshotTopic, mqtt.RequestMessage("requestSnapshot", {}))
+
 
 def main():
     log_level = str(os.getenv("GUI_LOG_LEVEL"))
@@ -70,6 +130,7 @@ def main():
     sysInfoTopic = str(os.getenv("GUI_MQTT_SYSMGMT_INFO_TOPIC"))
     sysCtrlTopic = str(os.getenv("GUI_MQTT_SYSMGMT_CTRL_TOPIC"))
     aircraftImagesPath = str(os.getenv("GUI_AIRCRAFT_IMAGES_PATH"))
+    topicsConfPath = str(os.getenv("GUI_MQTT_TOPICS_CONF", "../../conf/topics.json"))
     util.setupLogging(log_level)
 
     trafficCtrlTopic = trafficTopic + "/ctrl"
@@ -104,7 +165,9 @@ def main():
         },
     }
     mqClient = mqtt.launch("easyadsb-gui", "localhost", 1883)
-    messenger = mqtt.MqttMessenger(mqClient, subscriptions)
+    codecs = mqtt.loadTopicCodecs(topicsConfPath, [satelliteTopic, trafficTopic, positionTopic, statusTopic, sysInfoTopic], receive=True)
+    messenger = mqtt.MqttMessenger(mqClient, subscriptions, codecs=codecs)
+    msgDispatcher.setMessenger(messenger, trafficCtrlTopic)
     app = QGuiApplication(sys.argv)
     satellitesModel = SatellitesModel()
     positionModel = PositionModel()
@@ -112,8 +175,11 @@ def main():
     systemModel = SystemModel(messenger, trafficCtrlTopic, aliveTimeout=5000)
     wifiSettingsModel = WifiSettingsModel(messenger, sysCtrlTopic)
     msgDispatcher.satellitesUpdated.connect(satellitesModel.onSatellitesUpdated, Qt.QueuedConnection)
+    msgDispatcher.satellitesDeltaReceived.connect(satellitesModel.onSatellitesDeltaReceived, Qt.QueuedConnection)
     msgDispatcher.positionUpdated.connect(positionModel.onPositionUpdated, Qt.QueuedConnection)
+    msgDispatcher.positionDeltaReceived.connect(positionModel.onPositionDeltaReceived, Qt.QueuedConnection)
     msgDispatcher.trafficEntriesUpdated.connect(trafficModel.onTrafficEntriesUpdated, Qt.QueuedConnection)
+    msgDispatcher.trafficDeltaReceived.connect(trafficModel.onTrafficDeltaReceived, Qt.QueuedConnection)
     msgDispatcher.statusUpdated.connect(systemModel.onStatusUpdated, Qt.QueuedConnection)
     msgDispatcher.systemUpdated.connect(systemModel.onSystemUpdated, Qt.QueuedConnection)
     msgDispatcher.wifilistUpdated.connect(wifiSettingsModel.onWifiListUpdated, Qt.QueuedConnection)
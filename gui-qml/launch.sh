@@ -18,5 +18,6 @@ export GUI_MQTT_POSITION_TOPIC=/easyadsb/monitor/position
 export GUI_MQTT_STATUS_TOPIC=/easyadsb/monitor/status
 export GUI_MQTT_SYSMGMT_INFO_TOPIC=/easyadsb/sysmgmt/info
 export GUI_MQTT_SYSMGMT_CTRL_TOPIC=/easyadsb/sysmgmt/ctrl
+export GUI_MQTT_TOPICS_CONF=../../conf/topics.json
 cd app
 /usr/bin/python gui.py -platform eglfs
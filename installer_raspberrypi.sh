@@ -126,6 +126,7 @@ while true; do
 # sudo apt install python3-pyqt5 python3-pyqt5.qtquick
 # sudo apt install qml-module-qtlocation
 # sudo apt install qml-module-qtpositioning
+# pip install -r gui-qml/requirements.txt
 # TODO setup to boot into console. disable boot into desktop
 
 # TODO setup init i2c and load kernel modules